@@ -39,13 +39,19 @@ import data_pipeline.utils.filesystem as filesystem_utils
 import data_pipeline.utils.mailer as mailer
 
 from .exceptions import ApplyError
+from .net_changes import NetChanges
+from .target_connection import TargetConnection
 from abc import ABCMeta, abstractmethod
 from data_pipeline.audit.audit_dao import SourceSystemProfile
 from data_pipeline.audit.factory import AuditFactory, get_audit_db
 from data_pipeline.common import SignalHandler
+from data_pipeline.stream.envelope import is_envelope, unpack
 from data_pipeline.stream.file_writer import FileWriter
+from data_pipeline.stream.partitions import get_apply_partitions
 from data_pipeline.processor.exceptions import UnsupportedSqlError
-from data_pipeline.utils.args import get_program_args
+from data_pipeline.utils.args import (get_program_args,
+                                      get_partition_args,
+                                      rollover_workdirectory)
 
 
 LSN = "lsn"
@@ -104,9 +110,22 @@ class CdcApplyRecord:
         self.status = status
 
 
+def _get_bulk_shape(statement):
+    """Returns the SET clause fields of an UPDATE statement, flagging those
+    assigned a SQL expression rather than a value. Statements staged together
+    for a table must share the same shape"""
+    if statement.statement_type != const.UPDATE:
+        return None
+
+    return tuple(sorted([(field, sql_utils.is_sql_expression(value))
+                         for (field, value) in statement.set_values.items()]))
+
+
 class BulkOperation(object):
     def __init__(self):
         self._buff = {}
+        self._keys = {}
+        self._shapes = {}
         self.reset()
 
     def keys(self):
@@ -127,6 +146,29 @@ class BulkOperation(object):
         self.max_offset = 0
         self.start_offset = 0
         self.statement_type = None
+        self._keys.clear()
+        self._shapes.clear()
+
+    def accepts(self, statement):
+        """Returns True if the statement can be added to this bulk operation
+        without changing the outcome of applying the buffered statements.
+        UPDATEs and DELETEs are applied per table as a single set-based
+        statement, so a table's buffer can't hold the same key twice nor
+        UPDATEs setting different fields
+        """
+        if self.empty():
+            return True
+
+        if self.statement_type != statement.statement_type:
+            return False
+
+        keys = self._keys.get(statement.table_name)
+        if keys is None:
+            return True
+
+        return (_get_bulk_shape(statement) ==
+                self._shapes[statement.table_name] and
+                sql_utils.get_primary_key_values(statement) not in keys)
 
     def add(self, statement, commit_lsn, offset):
         if (self.statement_type and
@@ -145,6 +187,11 @@ class BulkOperation(object):
         statements = self._buff.setdefault(statement.table_name, [])
         statements.append((statement, commit_lsn, offset))
 
+        if statement.statement_type in [const.UPDATE, const.DELETE]:
+            keys = self._keys.setdefault(statement.table_name, set())
+            keys.add(sql_utils.get_primary_key_values(statement))
+            self._shapes[statement.table_name] = _get_bulk_shape(statement)
+
         self.max_count = max(self.max_count, len(statements))
         self.max_lsn = max(self.max_lsn, commit_lsn)
         self.max_offset = max(self.max_offset, offset)
@@ -160,6 +207,7 @@ class Applier(SignalHandler):
         super(Applier, self).__init__(mode, argv, audit_factory)
         self._target_db = target_db
         self._source_processor = source_processor
+        self._apply_workers = None
         self._output_file = None
         self._batch_started = False
         self._target_conn_details = dbuser.get_dbuser_properties(
@@ -169,8 +217,21 @@ class Applier(SignalHandler):
         self._target_conn_details.sslrootcert = self._argv.sslrootcert
         self._target_conn_details.sslkey = self._argv.sslkey
         self._target_conn_details.sslcrl = self._argv.sslcrl
+        self._target_connection = TargetConnection(
+            target_db,
+            self._target_conn_details,
+            persistent=self._argv.persistenttargetconnection,
+            idle_timeout=self._argv.targetidletimeout)
+
+        # Each applier applies a single partition of the stream, recovering
+        # from the offsets recorded against that partition. The
+        # executor_partition audit column is only used by partitioned streams
+        # so unpartitioned streams run against audit schemas without it
+        self._partition = get_apply_partitions(argv)[0]
+        self._partitioned = argv.streampartitions > 1
 
         self._init()
+        self._load_inactive_applied_tables()
         self._init_auditing()
         self._init_output_file()
 
@@ -184,11 +245,16 @@ class Applier(SignalHandler):
         self._first_batch_received = False
         self._skip_batches = int(self._argv.skipbatch)
 
-        stream = file(argv.datatypemap)
-        self._config = yaml.load(stream)
+        self._load_datatypemap()
         self._stream_message = None
+        self._parsed_message = None
+        self._message = None
+        self._target_table_names = {}
+        self._commit_points_deferred = False
+        self._next_offset_to_commit = None
 
         self._bulk_ops = BulkOperation()
+        self._net_changes = NetChanges()
 
         self._committed_state = {}
         self._last_executed_state = {}
@@ -238,9 +304,39 @@ class Applier(SignalHandler):
     def next_message_offset(self):
         return self._stream_message.offset() + 1
 
-    def apply(self, stream_message):
+    @property
+    def next_offset_to_commit(self):
+        """The offset to commit on the stream, or None to commit the
+        stream's current position, as all messages read have been applied
+        """
+        return self._next_offset_to_commit
+
+    def collect_status(self):
+        """Messages are applied synchronously, so there is never any status
+        left to collect after apply() returns
+        """
+        return None
+
+    def discard_pending(self):
+        pass
+
+    def apply(self, stream_message, parsed_message=None):
+        """Applies the stream message to target
+        :param Message stream_message: The message read off the stream
+        :param ParsedMessage parsed_message: The message, already deserialised
+            and parsed by an ApplyPipeline. If None, it is parsed here
+        """
+        if is_envelope(stream_message.value()):
+            return self._apply_envelope(stream_message, parsed_message)
+
         self._stream_message = stream_message
-        message = self._source_processor.deserialise(stream_message.value())
+        self._parsed_message = parsed_message
+        if parsed_message is None:
+            message = self._source_processor.deserialise(
+                stream_message.value())
+        else:
+            message = parsed_message.message
+        self._message = message
         batch_committed = False
         retries_remaining = self._argv.retry
 
@@ -257,7 +353,7 @@ class Applier(SignalHandler):
                     else:
                         self._apply_data(message)
 
-                if not batch_committed:
+                if not batch_committed and not self._commit_points_deferred:
                     self._audit_commit()
                     self._target_commit(message)
 
@@ -280,6 +376,95 @@ class Applier(SignalHandler):
 
         return const.COMMITTED if batch_committed else const.UNCOMMITTED
 
+    def _apply_envelope(self, stream_message, parsed_records=None):
+        """Applies each record packed in the envelope. Commit points are only
+        checked once the whole envelope is applied, so offsets are only ever
+        committed at envelope boundaries
+        :param Message stream_message: The envelope read off the stream
+        :param list parsed_records: A ParsedMessage per packed record, as
+            parsed by an ApplyPipeline. If None, records are parsed here
+        """
+        records = unpack(stream_message)
+        if parsed_records is None:
+            parsed_records = [None] * len(records)
+
+        received_count_before = self._received_count
+        deferred = self._commit_points_deferred
+        self._commit_points_deferred = True
+        try:
+            for (record, parsed_record) in zip(records, parsed_records):
+                result = self.apply(record, parsed_record)
+                if result in [const.KILLED, const.ERROR]:
+                    self._logger.error("Failed to apply record {i} of {n} in "
+                                       "envelope at offset {o}"
+                                       .format(i=record.index,
+                                               n=len(records),
+                                               o=stream_message.offset()))
+                    return result
+        finally:
+            self._commit_points_deferred = deferred
+
+        if not deferred:
+            try:
+                self._commit_points_passed(received_count_before)
+            except Exception, e:
+                self.report_error("{err}\n".format(err=str(e)))
+                return const.ERROR
+
+        return const.UNCOMMITTED
+
+    def apply_many(self, stream_messages):
+        """Applies the stream messages in order, checking audit and target
+        commit points once for all messages rather than after each one
+        :param list stream_messages: The messages read off the stream
+        :return: KILLED or ERROR if applying stopped at a message, leaving
+            the remaining messages unapplied. Otherwise COMMITTED if any batch
+            was committed, else UNCOMMITTED. next_offset_to_commit is set to
+            follow the last message committed
+        """
+        status = const.UNCOMMITTED
+        result = None
+        received_count_before = self._received_count
+        self._next_offset_to_commit = None
+
+        self._commit_points_deferred = True
+        try:
+            for stream_message in stream_messages:
+                result = self.apply(stream_message)
+
+                if result in [const.COMMITTED, const.KILLED]:
+                    self._next_offset_to_commit = self.next_message_offset
+                if result in [const.KILLED, const.ERROR]:
+                    return result
+                if result == const.COMMITTED:
+                    status = const.COMMITTED
+
+                # The counts are reset when a new batch starts
+                if self._received_count < received_count_before:
+                    received_count_before = 0
+        finally:
+            self._commit_points_deferred = False
+
+        if result == const.UNCOMMITTED:
+            try:
+                self._commit_points_passed(received_count_before)
+            except Exception, e:
+                self.report_error("{err}\n".format(err=str(e)))
+                return const.ERROR
+
+        return status
+
+    def _commit_points_passed(self, received_count_before):
+        def passed(commitpoint):
+            return (self._received_count / commitpoint >
+                    received_count_before / commitpoint)
+
+        if passed(self._argv.auditcommitpoint):
+            self._commit_audit()
+
+        if passed(self._argv.targetcommitpoint):
+            self._commit_target(self._message)
+
     def _log_terminate(self):
         self._init_auditing()
         warn_message = ("Termination message received. "
@@ -291,39 +476,47 @@ class Applier(SignalHandler):
         self._pc.update()
         self._logger.warn(warn_message)
 
+    def _get_target_table_name(self, table_name):
+        """Returns the lowercased, schema qualified target table name"""
+        fullname = self._target_table_names.get(table_name)
+        if fullname is None:
+            fullname = sql_utils.TableName(
+                self._argv.targetschema, table_name).fullname.lower()
+            self._target_table_names[table_name] = fullname
+        return fullname
+
     def _can_apply(self, message):
-        t = sql_utils.TableName(self._argv.targetschema.lower(),
-                                message.table_name.lower())
+        fullname = self._get_target_table_name(message.table_name)
 
-        if t.fullname in self._inactive_applied_tables:
+        if fullname in self._inactive_applied_tables:
             self._logger.warn("Table {t} marked as inactive for applies. "
                               "Message will not be applied."
-                              .format(t=t.fullname))
+                              .format(t=fullname))
             return False
 
-        if t.fullname in self._maxlsns_per_table:
+        if fullname in self._maxlsns_per_table:
             if not message.commit_lsn:
                 self._logger.warn("[{t}] Message LSN is not set for message. "
                                   "Allowing message to be applied "
                                   "to target: {message}"
-                                  .format(t=t.fullname,
+                                  .format(t=fullname,
                                           message=str(message)))
                 return True
 
-            if not self._maxlsns_per_table[t.fullname]:
+            if not self._maxlsns_per_table[fullname]:
                 self._logger.warn("[{t}] Max LSN is not set in "
                                   "source_system_profile table. Allowing "
                                   "message to be applied to target: {message}"
-                                  .format(t=t.fullname,
+                                  .format(t=fullname,
                                           message=str(message)))
                 return True
 
             message_lsn = int(message.commit_lsn)
-            max_lsn = int(self._maxlsns_per_table[t.fullname])
+            max_lsn = int(self._maxlsns_per_table[fullname])
 
             self._logger.debug("[{t}] Making sure message LSN ({msglsn}) > "
                                "Max recorded LSN ({maxlsn})"
-                               .format(t=t.fullname,
+                               .format(t=fullname,
                                        msglsn=message_lsn,
                                        maxlsn=max_lsn))
 
@@ -333,11 +526,20 @@ class Applier(SignalHandler):
                                   "Message will not be applied."
                                   .format(msglsn=message_lsn,
                                           maxlsn=max_lsn,
-                                          t=t.fullname))
+                                          t=fullname))
                 return False
 
         return True
 
+    def _process(self, message):
+        if self._parsed_message is None:
+            return self._source_processor.process(message)
+
+        if self._parsed_message.error:
+            raise self._parsed_message.error
+
+        return self._parsed_message.statement
+
     def _get_last_apply_record(self):
         if self._last_apply_record is None:
             self._last_apply_record = CdcApplyRecord(
@@ -352,6 +554,14 @@ class Applier(SignalHandler):
             self._last_apply_record.status = const.SUCCESS
             return
 
+        partition_filter = const.EMPTY_STRING
+        bind_variables = (self._argv.profilename,
+                          self._argv.profileversion,
+                          self._mode)
+        if self._partitioned:
+            partition_filter = "AND executor_partition = %s"
+            bind_variables += (self._partition,)
+
         sql = """
         SELECT executor_run_id, executor_status, status
         FROM {audit_schema}.process_control
@@ -362,12 +572,10 @@ class Applier(SignalHandler):
                       AND profile_name    = %s
                       AND profile_version = %s
                       AND process_code    = %s
+                      {partition_filter}
                    )
         """.format(audit_schema=self._argv.auditschema,
-                   committed=const.COMMITTED)
-        bind_variables = (self._argv.profilename,
-                          self._argv.profileversion,
-                          self._mode)
+                   partition_filter=partition_filter)
 
         with get_audit_db(self._argv) as audit_db:
             query_results = audit_db.execute_query(
@@ -414,9 +622,7 @@ class Applier(SignalHandler):
         elif self._skip_batches == 0:
             self._received_count += 1
 
-            table = sql_utils.TableName(self._argv.targetschema,
-                                        message.table_name)
-            tablename = table.fullname.lower()
+            tablename = self._get_target_table_name(message.table_name)
             self._delta_maxlsns_per_table[tablename] = message.commit_lsn
 
             if not self._batch_started:
@@ -431,14 +637,20 @@ class Applier(SignalHandler):
                                  "specified in message")
 
             try:
-                statement = self._source_processor.process(message)
+                statement = self._process(message)
                 if statement:
                     # Create an entry in source_system_profile if the
                     # table_name doesn't already exist
                     self._ensure_table_name_in_ssp(
                         statement.statement_type, message)
 
-                    self.execute_statement(statement, message.commit_lsn)
+                    if self._can_compact(statement):
+                        self._compact_statement(statement, message.commit_lsn)
+                    else:
+                        # Net changes must be applied before any statement
+                        # that wasn't folded into them
+                        self._execute_net_changes()
+                        self.execute_statement(statement, message.commit_lsn)
 
             except UnsupportedSqlError, err:
                 self._logger.warn("Unsupported SQL in {msg}: {error}"
@@ -547,6 +759,7 @@ class Applier(SignalHandler):
         self._received_count = 0
         self._executed_count = 0
         self._processed_count = 0
+        self._compacted_count = 0
         self._pc = None
         self._pcds = {}
         self._recovery_offset = None
@@ -554,10 +767,15 @@ class Applier(SignalHandler):
     def _init_output_file(self):
         self._output_file = FileWriter(self._argv.outputfile, 'a+')
 
-    def _init_auditing(self, comment=const.EMPTY_STRING):
+    def _load_inactive_applied_tables(self):
         self._inactive_applied_tables = get_inactive_applied_tables(
             self._audit_conn_details, self._argv, self._logger)
 
+    def _load_datatypemap(self):
+        stream = file(self._argv.datatypemap)
+        self._config = yaml.load(stream)
+
+    def _init_auditing(self, comment=const.EMPTY_STRING):
         self._pc = self._audit_factory.build_process_control(self._mode)
         self._pc.comment = comment
 
@@ -566,9 +784,21 @@ class Applier(SignalHandler):
             self._pc.errorlog = logging_loader.get_logfile(const.ERROR_HANDLER)
 
         self._pc.insert()
+        if self._partitioned:
+            self._set_executor_partition()
         self._pcds.clear()
         self._logger.debug("Initialised process control for Applier")
 
+    def _set_executor_partition(self):
+        sql = ("UPDATE {audit_schema}.process_control "
+               "SET executor_partition = %s "
+               "WHERE id = %s"
+               .format(audit_schema=self._argv.auditschema))
+
+        with get_audit_db(self._argv) as audit_db:
+            audit_db.execute(sql, (self._partition, self._pc.id))
+            audit_db.commit()
+
     @property
     def process_control(self):
         return self._pc
@@ -637,6 +867,22 @@ class Applier(SignalHandler):
         """
         pass
 
+    def build_upsert_sql(self, statement):
+        # A merged net change may be either an insert or an update of the
+        # row; they are counted as updates
+        pcd = self.get_pcd(statement.table_name)
+        pcd.update_row_count += 1
+        return self._build_upsert_sql(statement)
+
+    def _build_upsert_sql(self, statement):
+        """Builds target-specific insert-or-update sql statement
+        :param UpsertStatement statement: The representation of an
+            Upsert statement containing all necessary details to
+            create an insert-or-update SQL statement
+        """
+        raise ApplyError("{t} targets do not support upserts"
+                         .format(t=self._argv.targetdbtype))
+
     def build_alter_sql(self, statement):
         pcd = self.get_pcd(statement.table_name)
         pcd.alter_count += 1
@@ -690,6 +936,17 @@ class Applier(SignalHandler):
         """
         pass
 
+    def _increment_row_count(self, statement):
+        """Counts a DML statement applied to target without going through
+        the build_*_sql methods"""
+        pcd = self.get_pcd(statement.table_name)
+        if statement.statement_type == const.INSERT:
+            pcd.insert_row_count += 1
+        elif statement.statement_type == const.UPDATE:
+            pcd.update_row_count += 1
+        elif statement.statement_type == const.DELETE:
+            pcd.delete_row_count += 1
+
     def get_pcd(self, table_name):
         pcd = self._pcds.get(table_name, None)
 
@@ -734,34 +991,49 @@ class Applier(SignalHandler):
             self._pc.executor_status = const.COMMITTED
 
         self._logger.info(comment)
-        self._pc.comment = comment
-        self._pc.status = status
-        self._pc.update()
 
         for pcd in self._pcds.itervalues():
             pcd.status = status
             pcd.comment = comment
             pcd.update()
 
+        # Updated last so, with write-behind auditing, the committed offset
+        # is flushed together with all of the details above
+        self._pc.comment = comment
+        self._pc.status = status
+        self._pc.update()
+
         return committed
 
     def _audit_commit(self):
         if self.at_auditcommitpoint:
-            self._logger.debug("Audit commit point reached ({msgcount}). "
-                               "Committing..."
-                               .format(msgcount=self._received_count))
-            self._pc.update()
-            for pcd in self._pcds.itervalues():
-                pcd.update()
+            self._commit_audit()
+
+    def _commit_audit(self):
+        self._logger.debug("Audit commit point reached ({msgcount}). "
+                           "Committing..."
+                           .format(msgcount=self._received_count))
+        self._pc.update()
+        for pcd in self._pcds.itervalues():
+            pcd.update()
 
     def _target_commit(self, message):
         if self.at_targetcommitpoint:
-            self._logger.info("Target commit point reached ({c}). "
-                              "Committing...".format(c=self._received_count))
+            self._commit_target(message)
 
-            self._commit(message, status=const.IN_PROGRESS)
+    def _commit_target(self, message):
+        self._logger.info("Target commit point reached ({c}). "
+                          "Committing...".format(c=self._received_count))
+
+        self._execute_net_changes()
+        self._commit(message, status=const.IN_PROGRESS)
 
     def _check_record_counts(self, end_of_batch_count, name_count_pairs):
+        """Compares the count of records written by the extractor, as sent
+        with END_OF_BATCH, with the counts of records applied. START_OF_BATCH
+        counts are not checked as extracts deferring the record count send
+        0 there
+        """
         for (name, actual_count) in name_count_pairs:
             if end_of_batch_count != actual_count:
                 self._logger.warn(
@@ -772,7 +1044,12 @@ class Applier(SignalHandler):
                             actual_count=actual_count))
 
     def _end_batch(self, message):
+        if not self._pc.total_count:
+            # The extract deferred the record count to END_OF_BATCH
+            self._pc.total_count = message.record_count
+
         # Empty out the buffer of statements
+        self._execute_net_changes()
         self._execute_bulk_ops()
 
         committed = self._commit(message)
@@ -786,7 +1063,8 @@ class Applier(SignalHandler):
         else:
             name_count_pairs = [("received", self._received_count),
                                 ("processed", self._processed_count),
-                                ("executed", self._executed_count)]
+                                ("executed", (self._executed_count +
+                                              self._compacted_count))]
 
             self._check_record_counts(message.record_count, name_count_pairs)
             if not self._batch_started:
@@ -794,12 +1072,12 @@ class Applier(SignalHandler):
 
         self._batch_started = False
 
-        self._logger.info("Disconnecting from target")
-        self._target_db.close()
+        self._target_connection.release()
 
-        self._update_ssp_max_lsn()
+        if self._apply_workers:
+            self._apply_workers.close()
 
-        assert self._target_db.closed()
+        self._update_ssp_max_lsn()
 
         return committed
 
@@ -834,7 +1112,9 @@ class Applier(SignalHandler):
         self._delta_maxlsns_per_table.clear()
 
     def renew_workdirectory(self):
-        self._argv = get_program_args(self._mode)
+        # Re-parsed args are narrowed back down to this applier's partition
+        self._argv = get_partition_args(get_program_args(self._mode),
+                                        self._partition)
         logging_loader.setup_logging(self._argv.workdirectory)
         self._init_output_file()
         self._logger = logging.getLogger(__name__)
@@ -843,14 +1123,41 @@ class Applier(SignalHandler):
         self._source_processor.renew_workdirectory()
         self._target_db.renew_workdirectory()
 
+    def _reload_config(self):
+        """Re-reads program args, logging config and other static config
+        that's otherwise cached across batches
+        """
+        self._logger.info("Reloading configuration")
+        self._reload_requested = False
+        self.renew_workdirectory()
+        self._target_table_names.clear()
+        self._load_datatypemap()
+        self._load_inactive_applied_tables()
+
+    def _rollover_workdirectory(self):
+        """Moves logs and output onto a new work directory for the next
+        batch, keeping all cached config
+        """
+        rollover_workdirectory(self._argv)
+        logging_loader.rotate_logfiles(self._argv.workdirectory)
+        self._init_output_file()
+        self._logger.debug("New workdirectory set to: {workdir}"
+                           .format(workdir=self._argv.workdirectory))
+
     def _start_batch(self, message):
-        self._logger.info("Connecting to target")
-        assert self._target_db.closed()
-        self._target_db.connect(self._target_conn_details)
-        assert not self._target_db.closed()
+        if self._target_connection.acquire():
+            self._target_connected()
+
+        # Workers are only closed at the end of a batch, so are still
+        # connected if the last one never ended
+        if self._apply_workers and not self._apply_workers.connected():
+            self._apply_workers.connect(self._target_conn_details)
 
         if self._first_batch_received:
-            self.renew_workdirectory()
+            if self._reload_requested:
+                self._reload_config()
+            else:
+                self._rollover_workdirectory()
 
             self._init()
             self._init_auditing()
@@ -868,6 +1175,12 @@ class Applier(SignalHandler):
         if self._skip_batches > 0:
             self._logger.warn("Warning: This batch will be skipped...")
 
+    def _target_connected(self):
+        """Called whenever a new target session is established, as opposed
+        to an existing one being reused
+        """
+        pass
+
     def connect_data_target(self, conn_details):
         """Connect to the target data store
         :param ConnectionDetails conn_details: The object containing
@@ -884,6 +1197,33 @@ class Applier(SignalHandler):
             self._pc.comment = ("Committed {c} transactions to target"
                                 .format(c=self._executed_count))
 
+    def _can_compact(self, statement):
+        return (self._argv.compactchanges and
+                self._net_changes.can_fold(statement))
+
+    def _compact_statement(self, statement, commit_lsn):
+        folded_statements = self._net_changes.add(statement,
+                                                  commit_lsn,
+                                                  self.current_message_offset)
+
+        # Folded statements never reach the build_*_sql methods, so count
+        # them here to keep the audit counts in line with the source
+        for folded_statement in folded_statements:
+            self._increment_row_count(folded_statement)
+
+        self._compacted_count += len(folded_statements)
+
+    def _execute_net_changes(self):
+        """Execute the net changes of all compacted statements."""
+        if not self._net_changes.empty():
+            self._logger.debug("Executing net changes of {c} compacted "
+                               "statements".format(c=self._net_changes.count))
+
+            for (statement, commit_lsn, offset) in self._net_changes.items():
+                self.execute_statement(statement, commit_lsn)
+
+            self._net_changes.reset()
+
     def _execute_bulk_ops(self):
         """Execute statements for all tables."""
         if not self._bulk_ops.empty():
@@ -916,7 +1256,8 @@ class Applier(SignalHandler):
                 if sql:
                     self._execute_sql(sql,
                                       self._bulk_ops.max_lsn,
-                                      self._bulk_ops.max_offset)
+                                      self._bulk_ops.max_offset,
+                                      table_name=table_name)
 
                     pcd.insert_row_count += len(statements)
 
@@ -927,7 +1268,8 @@ class Applier(SignalHandler):
                 raise Exception("Unsupported bulk operation: {op}"
                                 .format(op=statement_type))
 
-    def _execute_sql(self, sql, commit_lsn=None, offset=None):
+    def _execute_sql(self, sql, commit_lsn=None, offset=None, values=None,
+                     table_name=None):
         if commit_lsn is None and offset is None:
             lsn_comment_str = const.EMPTY_STRING
         else:
@@ -937,15 +1279,27 @@ class Applier(SignalHandler):
         sql = ("{sql}{lsn_comment_str}"
                .format(sql=sql, lsn_comment_str=lsn_comment_str))
 
-        self._last_executed_state[SQL] = sql
+        executed_sql = sql
+        if values is not None:
+            executed_sql = ("{sql} -- values: {values}"
+                            .format(sql=sql, values=values))
+
+        self._last_executed_state[SQL] = executed_sql
         if commit_lsn:
             self._last_executed_state[LSN] = commit_lsn
         if offset:
             self._last_executed_state[OFFSET] = offset
 
-        self._logger.debug("Executing: {}".format(sql))
-        count = self._target_db.execute(sql)
-        self._output_file.write("{}\n".format(sql))
+        self._logger.debug("Executing: {}".format(executed_sql))
+        if self._apply_workers and table_name:
+            # Executed asynchronously, errors are raised on commit
+            self._apply_workers.execute(table_name, sql, values)
+            count = None
+        elif values is None:
+            count = self._target_db.execute(sql)
+        else:
+            count = self._target_db.execute(sql, values)
+        self._output_file.write("{}\n".format(executed_sql))
         self._logger.debug("Successfully executed - {c}".format(c=count))
 
     def _can_buffer(self, statement):
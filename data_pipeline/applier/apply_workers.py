@@ -0,0 +1,200 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    apply_workers
+# Purpose:   Executes SQL on target over a number of worker connections in
+#            parallel
+#
+# Notes:     SQL is partitioned across workers by target table, so all SQL
+#            for a given table is executed in order on the same connection.
+#            Threads are used as workers spend most of their time waiting
+#            on the target db.
+#
+#            Each worker commits its own connection, so a batch is not
+#            committed atomically on target: if a worker's commit fails once
+#            others have committed, their part of the batch stays applied
+#            and is applied again when the batch is restarted from its start
+#            offset. Failures before the commit roll back all workers.
+#
+###############################################################################
+
+import logging
+import threading
+import Queue
+import data_pipeline.constants.const as const
+
+from .exceptions import ApplyError
+
+
+def _execute(db, sql, values):
+    if values is None:
+        db.execute(sql)
+    else:
+        db.execute(sql, values)
+
+
+def _commit(db):
+    db.commit()
+
+
+def _rollback(db):
+    db.rollback()
+
+
+class ApplyWorker(threading.Thread):
+    def __init__(self, worker_id, db, queue_size):
+        super(ApplyWorker, self).__init__(
+            name="ApplyWorker-{id}".format(id=worker_id))
+        self.daemon = True
+        self.error = None
+        self._db = db
+        self._queue = Queue.Queue(maxsize=queue_size)
+        self._logger = logging.getLogger(__name__)
+
+    def run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+
+                # Once failed, discard all work until the error is reported
+                # back at the next commit, as the transaction is aborted
+                if self.error is None:
+                    (func, args) = task
+                    func(self._db, *args)
+
+            except Exception, e:
+                self._logger.exception("{name} failed: {err}"
+                                       .format(name=self.name, err=str(e)))
+                self.error = e
+                self._rollback()
+            finally:
+                self._queue.task_done()
+
+    def _rollback(self):
+        try:
+            self._db.rollback()
+        except Exception, e:
+            self._logger.exception("{name} failed to rollback: {err}"
+                                   .format(name=self.name, err=str(e)))
+
+    def submit(self, func, *args):
+        self._queue.put((func, args))
+
+    def wait(self):
+        """Blocks until all submitted work has been processed"""
+        self._queue.join()
+
+    def stop(self):
+        self._queue.put(None)
+        self.join()
+        self._db.close()
+
+
+class ApplyWorkerPool(object):
+    def __init__(self, size, db_builder,
+                 queue_size=const.APPLY_WORKER_QUEUE_SIZE):
+        """Construct a new pool of apply workers
+        :param int size: The number of workers, each with its own target
+            connection
+        :param function db_builder: Returns a new, unconnected Db instance
+        :param int queue_size: The max number of statements queued per worker
+            before submitting blocks
+        """
+        self._size = size
+        self._db_builder = db_builder
+        self._queue_size = queue_size
+        self._workers = []
+        self._failure = None
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def size(self):
+        return self._size
+
+    def connected(self):
+        return len(self._workers) > 0
+
+    def connect(self, conn_details):
+        for worker_id in range(self._size):
+            db = self._db_builder()
+            db.connect(conn_details)
+            worker = ApplyWorker(worker_id, db, self._queue_size)
+            worker.start()
+            self._workers.append(worker)
+
+        self._logger.info("Started {n} apply workers".format(n=self._size))
+
+    def _get_worker(self, table_name):
+        return self._workers[hash(table_name) % self._size]
+
+    def execute(self, table_name, sql, values=None):
+        """Queues the sql for execution on the worker assigned to table_name
+        """
+        self._get_worker(table_name).submit(_execute, sql, values)
+
+    def commit(self):
+        """Commits all workers once they've all executed their queued SQL
+        without error. Raises an ApplyError, committing no worker, if any
+        worker has failed since the pool was connected. A failed pool never
+        commits again until closed, as the batch must be restarted from its
+        start offset
+        """
+        self._wait()
+        self._raise_on_error()
+
+        for worker in self._workers:
+            worker.submit(_commit)
+
+        self._wait()
+        self._raise_on_error()
+
+    def _wait(self):
+        for worker in self._workers:
+            worker.wait()
+
+    def _raise_on_error(self):
+        if self._failure is None:
+            errors = ["{name}: {err}".format(name=worker.name,
+                                             err=str(worker.error))
+                      for worker in self._workers
+                      if worker.error is not None]
+            if not errors:
+                return
+
+            self._failure = "; ".join(errors)
+
+            # Discard the work of the other workers too, so no part of the
+            # batch is committed
+            for worker in self._workers:
+                worker.submit(_rollback)
+            self._wait()
+
+        raise ApplyError("Apply workers failed. The batch has been rolled "
+                         "back on all workers and must be restarted from its "
+                         "start offset. {errors}"
+                         .format(errors=self._failure))
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+
+        del self._workers[:]
+        self._failure = None
+        self._logger.info("Stopped apply workers")
@@ -35,13 +35,11 @@ from .exceptions import ApplyError
 
 class GreenplumCdcApplier(PostgresCdcApplier):
 
-    def _build_update_sql(self, update_statement):
+    def _update_field_filter(self, update_statement):
 
         def is_not_a_primary_key(field_name):
             if update_statement.primary_key_list:
                 return field_name not in update_statement.primary_key_list
             return True
 
-        return sql_utils.build_update_sql(update_statement,
-                                          schema=self._argv.targetschema,
-                                          filter_func=is_not_a_primary_key)
+        return is_not_a_primary_key
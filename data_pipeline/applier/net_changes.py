@@ -0,0 +1,152 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    net_changes
+# Purpose:   Folds the CDCs applied to each primary key into a single net
+#            change prior to applying them to target
+#
+# Notes:     Changes are keyed on (table, primary key values), so the
+#            primary key list is assumed to identify a row on target.
+#            Net changes are emitted in source order, each at the position
+#            of the last change folded into it. Changes to other rows made
+#            between a key's first and last change are assumed not to
+#            depend on the key's intermediate state, e.g. through a foreign
+#            key to a row that was inserted and then updated, or a unique
+#            value it held only in between. Tables with such constraints
+#            should not be applied with compacted changes.
+#
+###############################################################################
+
+import collections
+import heapq
+import data_pipeline.constants.const as const
+import data_pipeline.sql.utils as sql_utils
+
+from data_pipeline.sql.insert_statement import InsertStatement
+from data_pipeline.sql.update_statement import UpdateStatement
+
+
+def _merge_update_into_insert(insert_statement, update_statement):
+    field_values = insert_statement.get_field_values().copy()
+    field_values.update(update_statement.set_values)
+    return InsertStatement(insert_statement.table_name, field_values,
+                           insert_statement.primary_key_list)
+
+
+def _merge_updates(first_update, second_update):
+    set_values = first_update.set_values.copy()
+    set_values.update(second_update.set_values)
+    return UpdateStatement(first_update.table_name, set_values,
+                           first_update.conditions,
+                           first_update.primary_key_list)
+
+
+class NetChanges(object):
+    def __init__(self):
+        self._changes = collections.OrderedDict()
+        self.reset()
+
+    def empty(self):
+        return self.count == 0
+
+    def reset(self):
+        self._changes.clear()
+        self.count = 0
+        self.start_offset = 0
+
+    def can_fold(self, statement):
+        """Returns True if the statement is a DML statement identified by its
+        full primary key, and doesn't change the primary key itself
+        """
+        if statement.statement_type not in [const.INSERT,
+                                            const.UPDATE,
+                                            const.DELETE]:
+            return False
+
+        if sql_utils.get_primary_key_values(statement) is None:
+            return False
+
+        if statement.statement_type == const.UPDATE:
+            return not any([pk in statement.set_values
+                            for pk in statement.primary_key_list])
+
+        return True
+
+    def add(self, statement, commit_lsn, offset):
+        """Folds the statement into the net change of its key
+        :param Statement statement: A statement for which can_fold is True
+        :param str commit_lsn: The commit lsn of the statement
+        :param int offset: The stream offset of the statement
+        :return: The statements folded away, which will never be applied
+            to target as-is
+        :rtype: list
+        """
+        if self.empty():
+            self.start_offset = offset
+
+        self.count += 1
+
+        # Orders the net changes by the last change folded into each
+        sequence = self.count
+
+        key = (statement.table_name,
+               sql_utils.get_primary_key_values(statement))
+        changes = self._changes.setdefault(key, [])
+
+        if not changes:
+            changes.append((sequence, statement, commit_lsn, offset))
+            return []
+
+        (_, last_statement, last_commit_lsn, last_offset) = changes[-1]
+        last_type = last_statement.statement_type
+        new_type = statement.statement_type
+
+        if last_type == const.INSERT and new_type == const.UPDATE:
+            merged = _merge_update_into_insert(last_statement, statement)
+            changes[-1] = (sequence, merged, commit_lsn, offset)
+            return [statement]
+
+        if last_type == const.INSERT and new_type == const.DELETE:
+            changes.pop()
+            return [last_statement, statement]
+
+        if last_type == const.UPDATE and new_type == const.UPDATE:
+            merged = _merge_updates(last_statement, statement)
+            changes[-1] = (sequence, merged, commit_lsn, offset)
+            return [statement]
+
+        if last_type == const.UPDATE and new_type == const.DELETE:
+            changes[-1] = (sequence, statement, commit_lsn, offset)
+            return [last_statement]
+
+        # Nothing to fold, e.g. an INSERT following a DELETE, so both
+        # are kept and applied in order
+        changes.append((sequence, statement, commit_lsn, offset))
+        return []
+
+    def items(self):
+        """Yields the net (statement, commit_lsn, offset) changes in source
+        order, each at the position of the last change folded into it
+        """
+        # Each key's changes are already in sequence order
+        for (sequence, statement, commit_lsn, offset) in heapq.merge(
+                *self._changes.itervalues()):
+            yield (statement, commit_lsn, offset)
+
+    def __str__(self):
+        return str(self._changes)
@@ -0,0 +1,158 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+###############################################################################
+# Module:    parse_pool
+# Purpose:   Parses batches of stream messages across a pool of processes
+#
+# Notes:     Messages are deserialised in the parent, and only the values of
+#            those holding a statement are sent to the workers, which return
+#            just the parsed statement or parse error. Results are matched
+#            back to their messages by position, so they are handed to the
+#            single execute thread in stream offset order.
+#
+###############################################################################
+
+import signal
+import cPickle
+import multiprocessing
+import data_pipeline.processor.factory as processor_factory
+
+from .pipeline import ParsedMessage, is_parseable
+from data_pipeline.stream.envelope import is_envelope, unpack
+
+
+# The source processor of a worker process
+_processor = None
+
+# Workers would otherwise inherit the parent's handlers, which audit and exit
+# the application. Only the parent handles Ctrl-C, closing the pool on exit
+_WORKER_SIGNAL_HANDLERS = [(signal.SIGINT, signal.SIG_IGN),
+                           (signal.SIGTERM, signal.SIG_DFL),
+                           (signal.SIGHUP, signal.SIG_DFL)]
+
+
+def _init_worker(source_dbtype, metacols, redoparser, shapecachesize):
+    for (signum, handler) in _WORKER_SIGNAL_HANDLERS:
+        signal.signal(signum, handler)
+
+    global _processor
+    _processor = processor_factory.build(source_dbtype, metacols,
+                                         redoparser, shapecachesize)
+
+
+def _process_value(value):
+    """Parses the value of a stream message on a worker
+    :param dict value: The message's value, as read off the stream
+    :return: The parsed statement, or None, and the parse error, or None
+    :rtype: tuple
+    """
+    try:
+        statement = _processor.process(_processor.deserialise(value))
+    except Exception, e:
+        return (None, _picklable_error(e))
+
+    if getattr(statement, 'shape', None) is not None:
+        # Shapes are cached per worker, and sending one back with every
+        # statement would send its field names twice
+        statement.shape = None
+    return (statement, None)
+
+
+def _picklable_error(error):
+    """Parse errors are raised in the parent when the message is applied, so
+    must survive being sent back from the worker
+    """
+    try:
+        cPickle.loads(cPickle.dumps(error, cPickle.HIGHEST_PROTOCOL))
+        return error
+    except Exception:
+        return Exception("{t}: {err}".format(t=type(error).__name__,
+                                             err=str(error)))
+
+
+class ParsePool(object):
+    def __init__(self, source_processor, argv):
+        """Starts the worker processes, each with its own source processor
+        :param Processor source_processor: The processor used to deserialise
+            messages in the parent
+        :param argv: Program args, giving the number of workers and how to
+            build their processors
+        """
+        self._source_processor = source_processor
+
+        # Workers are forked with the worker handlers already set, as a
+        # signal arriving before a worker is initialised would otherwise
+        # run the parent's handler in the worker
+        previous_handlers = [(signum, signal.signal(signum, handler))
+                             for (signum, handler)
+                             in _WORKER_SIGNAL_HANDLERS]
+        try:
+            self._pool = multiprocessing.Pool(
+                argv.parseworkers,
+                initializer=_init_worker,
+                initargs=(argv.sourcedbtype, argv.metacols,
+                          argv.redoparser, argv.shapecachesize))
+        finally:
+            for (signum, handler) in previous_handlers:
+                signal.signal(signum, handler)
+
+    def parse_many(self, stream_messages):
+        """Deserialises the messages and parses them across the pool
+        :param list stream_messages: The messages read off the stream
+        :return: A ParsedMessage per stream message, or a list of them, one
+            per packed record, if the message is an envelope. In the order of
+            stream_messages
+        :rtype: list
+        """
+        values = []
+        messages = []
+        for stream_message in stream_messages:
+            if is_envelope(stream_message.value()):
+                messages.append([self._deserialise(record.value(), values)
+                                 for record in unpack(stream_message)])
+            else:
+                messages.append(self._deserialise(stream_message.value(),
+                                                  values))
+
+        results = iter(self._pool.map(_process_value, values))
+
+        parsed_messages = []
+        for message in messages:
+            if isinstance(message, list):
+                parsed_messages.append([self._to_parsed(record, results)
+                                        for record in message])
+            else:
+                parsed_messages.append(self._to_parsed(message, results))
+        return parsed_messages
+
+    def close(self):
+        """Stops the worker processes once they have finished parsing"""
+        self._pool.close()
+        self._pool.join()
+
+    def _deserialise(self, value, values):
+        message = self._source_processor.deserialise(value)
+        if is_parseable(message):
+            values.append(value)
+        return message
+
+    def _to_parsed(self, message, results):
+        if not is_parseable(message):
+            return ParsedMessage(message, None, None)
+
+        (statement, error) = next(results)
+        return ParsedMessage(message, statement, error)
@@ -0,0 +1,215 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    pipeline
+# Purpose:   Pipelines an applier, overlapping the parsing of stream messages
+#            with the execution of previously parsed messages on target
+#
+# Notes:     Messages are deserialised and parsed into statements on the
+#            caller's (stream consumer's) thread and queued for an execute
+#            thread, which applies them in order. All applier state,
+#            including recovery offsets, is only ever updated by the execute
+#            thread, so only reflects messages that have been executed.
+#
+###############################################################################
+
+import collections
+import logging
+import threading
+import Queue
+import data_pipeline.constants.const as const
+
+from data_pipeline.stream.envelope import is_envelope, unpack
+
+
+ParsedMessage = collections.namedtuple('ParsedMessage',
+                                       ['message', 'statement', 'error'])
+
+_STOPPED_STATUSES = [const.KILLED, const.ERROR]
+
+
+def _is_data(message):
+    return message.record_type not in [const.START_OF_BATCH,
+                                       const.END_OF_BATCH,
+                                       const.KILL]
+
+
+def is_parseable(message):
+    """Returns True if the deserialised message holds a statement to parse"""
+    return bool(_is_data(message) and message.table_name)
+
+
+def parse(source_processor, stream_message):
+    """Deserialises and parses the stream message into a statement. Parse
+    errors are kept with the result, to be raised when the message is applied
+    :param Processor source_processor: The processor for the stream's source
+    :param Message stream_message: The message read off the stream
+    :return: ParsedMessage, or a list of them, one per packed record, if the
+        message is an envelope
+    """
+    if is_envelope(stream_message.value()):
+        return [parse(source_processor, record)
+                for record in unpack(stream_message)]
+
+    message = source_processor.deserialise(stream_message.value())
+    statement = None
+    error = None
+
+    if is_parseable(message):
+        try:
+            statement = source_processor.process(message)
+        except Exception, e:
+            error = e
+
+    return ParsedMessage(message, statement, error)
+
+
+class ApplyPipeline(object):
+    def __init__(self, applier, source_processor, queue_size,
+                 parse_pool=None):
+        """Construct a new pipeline in front of the applier
+        :param Applier applier: The applier executing parsed messages
+        :param Processor source_processor: The processor used to parse
+            messages. Must not be used by anything else while pipelined
+        :param int queue_size: Max number of parsed messages waiting to be
+            executed before apply() blocks
+        :param ParsePool parse_pool: Parses the messages given to
+            apply_many() across processes. If None, they are parsed on the
+            caller's thread
+        """
+        self._applier = applier
+        self._source_processor = source_processor
+        self._parse_pool = parse_pool
+        self._queue = Queue.Queue(maxsize=queue_size)
+        self._results = collections.deque()
+        self._next_offset_to_commit = None
+        self._stopped = False
+        self._discarding = False
+        self._logger = logging.getLogger(__name__)
+
+        self._thread = threading.Thread(target=self._run,
+                                        name="ApplyPipeline")
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def process_control(self):
+        return self._applier.process_control
+
+    @property
+    def next_offset_to_read(self):
+        return self._applier.next_offset_to_read
+
+    @property
+    def next_offset_to_commit(self):
+        """The offset following the last executed and committed message"""
+        return self._next_offset_to_commit
+
+    def report_error(self, err_message):
+        self._applier.report_error(err_message)
+
+    def apply(self, stream_message):
+        """Parses the message and queues it for execution
+        :return: The collected status of messages executed since the last
+            call, as opposed to the status of this message
+        """
+        parsed_message = parse(self._source_processor, stream_message)
+        self._queue.put((stream_message, parsed_message))
+        return self.collect_status()
+
+    def apply_many(self, stream_messages):
+        """Parses the messages and queues them for execution
+        :return: The collected status of messages executed since the last
+            call
+        """
+        if self._parse_pool is None:
+            parsed_messages = [parse(self._source_processor, m)
+                               for m in stream_messages]
+        else:
+            parsed_messages = self._parse_pool.parse_many(stream_messages)
+
+        for (stream_message, parsed_message) in zip(stream_messages,
+                                                    parsed_messages):
+            self._queue.put((stream_message, parsed_message))
+        return self.collect_status()
+
+    def collect_status(self):
+        """Collects the status of messages executed since the last call
+        :return: KILLED or ERROR if the applier has stopped, COMMITTED if any
+            were committed, otherwise UNCOMMITTED
+        """
+        status = const.UNCOMMITTED
+        while self._results:
+            (result, next_offset) = self._results.popleft()
+            if result in [const.COMMITTED, const.KILLED]:
+                self._next_offset_to_commit = next_offset
+
+            if result in _STOPPED_STATUSES:
+                status = result
+            elif status not in _STOPPED_STATUSES:
+                status = const.COMMITTED
+
+        return status
+
+    def wait(self):
+        """Blocks until all queued messages have been executed"""
+        self._queue.join()
+
+    def close(self):
+        """Discards all queued messages, returning once the message currently
+        being executed, if any, has completed. Called once the stream is no
+        longer consumed; discarded messages are re-read on restart, from
+        next_offset_to_commit. The parse pool is closed by its owner
+        """
+        self.discard_pending()
+
+    def discard_pending(self):
+        """Discards all queued messages, returning once the message currently
+        being executed, if any, has completed. Used when the stream is
+        rewound to next_offset_to_read, so queued messages will be re-read
+        """
+        self._discarding = True
+        try:
+            self._queue.join()
+        finally:
+            self._discarding = False
+
+    def _run(self):
+        while True:
+            (stream_message, parsed_message) = self._queue.get()
+            try:
+                if self._stopped or self._discarding:
+                    continue
+
+                status = self._applier.apply(stream_message, parsed_message)
+                if status != const.UNCOMMITTED:
+                    self._results.append((status,
+                                          stream_message.offset() + 1))
+
+                if status in _STOPPED_STATUSES:
+                    self._logger.warn("Applier stopped with status {s}. "
+                                      "Discarding queued messages"
+                                      .format(s=status))
+                    self._stopped = True
+            except Exception, e:
+                self._logger.exception("Failed to apply message: {err}"
+                                       .format(err=str(e)))
+                self._results.append((const.ERROR, None))
+                self._stopped = True
+            finally:
+                self._queue.task_done()
@@ -100,6 +100,10 @@ class PostgresApplier(Applier):
         """
         pass
 
+    def _build_upsert_sql(self, upsert_statement):
+        return sql_utils.build_upsert_sql(upsert_statement,
+                                          self._argv.targetschema)
+
     def _build_delete_sql(self, delete_statement):
         return sql_utils.build_delete_sql(delete_statement,
                                           self._argv.targetschema)
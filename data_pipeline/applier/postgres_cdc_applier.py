@@ -24,10 +24,16 @@
 #
 ###############################################################################
 
+import collections
 import logging
 import data_pipeline.constants.const as const
+import data_pipeline.db.factory as db_factory
 import data_pipeline.sql.utils as sql_utils
 
+from cStringIO import StringIO
+
+from .applier import LSN, SQL, OFFSET
+from .apply_workers import ApplyWorkerPool
 from .postgres_applier import PostgresApplier
 from .exceptions import ApplyError
 
@@ -37,10 +43,68 @@ class PostgresCdcApplier(PostgresApplier):
         super(PostgresCdcApplier, self).__init__(
             target_db, argv, audit_factory, source_processor)
         self._logger = logging.getLogger(__name__)
+        self._prepared_statements = collections.OrderedDict()
+        self._prepared_statement_count = 0
+
+        if self._argv.applyworkers > 1:
+            self._init_apply_workers()
+
+    def _init_apply_workers(self):
+        # These all depend on state bound to a single target session
+        # (temp tables and prepared statements) or on a COPY in that
+        # session, so can't be spread across worker connections
+        if (self._argv.bulkinsertcopy or
+                self._argv.bulkapplyupdatedelete or
+                self._argv.preparedstatements):
+            raise ApplyError("--applyworkers > 1 is not supported with "
+                             "--bulkinsertcopy, --bulkapplyupdatedelete or "
+                             "--preparedstatements")
+
+        targetdbtype = self._argv.targetdbtype
+        self._apply_workers = ApplyWorkerPool(
+            self._argv.applyworkers,
+            lambda: db_factory.build(targetdbtype))
+
+    def _target_connected(self):
+        # Prepared statements only live as long as the target session,
+        # which may be reused across batches
+        self._prepared_statements.clear()
+        self._prepared_statement_count = 0
+
+    def _update_field_filter(self, update_statement):
+        """Returns the function determining whether a field of the
+        update_statement should be present in the SET clause
+        """
+        return sql_utils.default_update_field_filter
 
     def _build_update_sql(self, update_statement):
-        return sql_utils.build_update_sql(update_statement,
-                                          self._argv.targetschema)
+        return sql_utils.build_update_sql(
+            update_statement,
+            schema=self._argv.targetschema,
+            filter_func=self._update_field_filter(update_statement))
+
+    def _can_buffer(self, statement):
+        if super(PostgresCdcApplier, self)._can_buffer(statement):
+            return True
+
+        return (self._argv.bulkapply and
+                self._argv.bulkapplyupdatedelete and
+                self._can_stage(statement))
+
+    def _can_stage(self, statement):
+        """Only UPDATEs and DELETEs identified by their full primary key,
+        which leave the primary key itself untouched, can be applied via a
+        staging table
+        """
+        if statement.statement_type == const.DELETE:
+            return sql_utils.get_primary_key_values(statement) is not None
+
+        if statement.statement_type == const.UPDATE:
+            return (sql_utils.get_primary_key_values(statement) is not None and
+                    not any([pk in statement.set_values
+                             for pk in statement.primary_key_list]))
+
+        return False
 
     def _execute_statement(self, statement, commit_lsn):
         if self._can_buffer(statement):
@@ -51,6 +115,14 @@ class PostgresCdcApplier(PostgresApplier):
 
                 self._execute_bulk_ops()
 
+            elif not self._bulk_ops.accepts(statement):
+                self._logger.debug("Statement {s} can't be added to current "
+                                   "bulk {op}. Executing bulk {op}..."
+                                   .format(s=statement,
+                                           op=self._bulk_ops.statement_type))
+
+                self._execute_bulk_ops()
+
             self._bulk_ops.add(statement,
                                commit_lsn,
                                self.current_message_offset)
@@ -62,12 +134,21 @@ class PostgresCdcApplier(PostgresApplier):
                 .format(s=statement,
                         c=len(self._bulk_ops[statement.table_name])))
         else:
-            # We've received a type other than insert, so we'll flush
-            # all the accumulated insert statements out
+            # We've received a statement that can't be buffered, so we'll
+            # flush all the accumulated statements out
             self._execute_bulk_ops()
 
-            # Then execute the non-insert statement individually
+            # Then execute the statement individually
             self.recovery_offset = self.current_message_offset
+
+            if self._can_prepare(statement):
+                self._execute_prepared_statement(statement, commit_lsn)
+                return
+
+            if self._prepared_statements:
+                # DDL may change the tables prepared statements refer to
+                self._deallocate_prepared_statements()
+
             sql = statement.tosql(self)
 
             if not sql:
@@ -76,11 +157,265 @@ class PostgresCdcApplier(PostgresApplier):
                     "{statement}. Not executing..."
                     .format(statement=statement))
             else:
-                self._execute_sql(sql, commit_lsn, self.current_message_offset)
+                self._execute_sql(sql, commit_lsn, self.current_message_offset,
+                                  table_name=statement.table_name)
+
+    def _can_prepare(self, statement):
+        return (self._argv.preparedstatements and
+                statement.statement_type in [const.INSERT,
+                                             const.UPDATE,
+                                             const.DELETE])
+
+    def _build_parameterised_sql(self, statement):
+        if statement.statement_type == const.INSERT:
+            return sql_utils.build_parameterised_insert_sql(
+                statement, schema=self._argv.targetschema)
+
+        if statement.statement_type == const.UPDATE:
+            return sql_utils.build_parameterised_update_sql(
+                statement,
+                schema=self._argv.targetschema,
+                filter_func=self._update_field_filter(statement))
+
+        return sql_utils.build_parameterised_delete_sql(
+            statement, schema=self._argv.targetschema)
+
+    def _execute_prepared_statement(self, statement, commit_lsn):
+        """Executes the statement via a prepared statement, preparing one
+        for each distinct table, operation and set of fields on first use.
+        Values are bound as parameters rather than inlined as literals
+        """
+        self._increment_row_count(statement)
+
+        (sql, values) = self._build_parameterised_sql(statement)
+        if not sql:
+            self._logger.warn(
+                "No resulting SQL string built from statement: "
+                "{statement}. Not executing..."
+                .format(statement=statement))
+            return
+
+        name = self._prepared_statements.pop(sql, None)
+        if name is None:
+            name = self._prepare_statement(sql)
+        # Reinserted as the most recently used
+        self._prepared_statements[sql] = name
+
+        self._execute_sql(
+            sql_utils.build_execute_prepared_sql(name, len(values)),
+            commit_lsn,
+            self.current_message_offset,
+            values)
+
+    def _prepare_statement(self, sql):
+        """Prepares the sql on target, first deallocating the least recently
+        used prepared statement if the limit has been reached
+        :return: The name of the prepared statement
+        """
+        limit = self._argv.preparedstatementlimit
+        if limit and len(self._prepared_statements) >= limit:
+            (_, evicted_name) = self._prepared_statements.popitem(last=False)
+            self._execute_sql(sql_utils.build_deallocate_sql(evicted_name))
+
+        name = "dp_stmt_{n}".format(n=self._prepared_statement_count)
+        self._prepared_statement_count += 1
+        self._execute_sql(sql_utils.build_prepare_sql(name, sql))
+        return name
+
+    def _deallocate_prepared_statements(self):
+        self._execute_sql("DEALLOCATE ALL")
+        self._prepared_statements.clear()
+        self._prepared_statement_count = 0
 
     def _commit_statements(self):
+        if self._apply_workers:
+            self._apply_workers.commit()
+
         self._target_db.commit()
         self._logger.debug("Batch committed")
 
         self._output_file.write("{};\n".format(const.COMMIT))
         self._output_file.flush()
+
+    def _execute_bulk_op(self, statement_type, table_name, statements):
+        if statements and statement_type in [const.UPDATE, const.DELETE]:
+            self._execute_staged_bulk_op(statement_type, table_name,
+                                         statements)
+        elif (statements and statement_type == const.INSERT and
+                self._argv.bulkinsertcopy):
+            self._execute_copy_bulk_insert(table_name, statements)
+        else:
+            super(PostgresCdcApplier, self)._execute_bulk_op(
+                statement_type, table_name, statements)
+
+    def _execute_staged_bulk_op(self, statement_type, table_name, statements):
+        """COPY the row images of the given UPDATE or DELETE statements into
+        a temp staging table, then apply them to the target table with a
+        single set-based statement joined on the primary keys
+        """
+        first_statement = statements[0][0]
+        key_fields = first_statement.primary_key_list
+        c = const.SPECIAL_CHAR_REPLACEMENT
+
+        set_fields = []
+        expression_set_values = {}
+        if statement_type == const.UPDATE:
+            filter_func = self._update_field_filter(first_statement)
+            for (field, value) in sorted(first_statement.set_values.items()):
+                if not filter_func(field):
+                    continue
+                if sql_utils.is_sql_expression(value):
+                    column = sql_utils.replace_special_chars(field, c)
+                    expression_set_values[column] = value
+                else:
+                    set_fields.append(field)
+
+            if not set_fields and not expression_set_values:
+                self._logger.warn(
+                    "[{t}] No SET fields remain for bulk update. "
+                    "Not executing...".format(t=table_name))
+                return
+
+        key_columns = [sql_utils.replace_special_chars(f, c)
+                       for f in key_fields]
+        set_columns = [sql_utils.replace_special_chars(f, c)
+                       for f in set_fields]
+        staging_key_columns = ["k{}".format(i)
+                               for i in range(len(key_columns))]
+        staging_set_columns = ["v{}".format(i)
+                               for i in range(len(set_columns))]
+
+        staging_table_name = sql_utils.build_staging_table_name(
+            table_name, statement_type)
+
+        self._execute_sql(sql_utils.build_staging_table_sql(
+            staging_table_name, table_name,
+            key_columns + set_columns,
+            staging_key_columns + staging_set_columns,
+            schema=self._argv.targetschema))
+
+        rows = []
+        for (statement, commit_lsn, offset) in statements:
+            values = [statement.conditions[k] for k in key_fields]
+            values.extend([statement.set_values[f] for f in set_fields])
+            rows.append(sql_utils.build_copy_row(values))
+
+        self._copy_rows(staging_table_name,
+                        staging_key_columns + staging_set_columns,
+                        rows)
+
+        pcd = self.get_pcd(table_name)
+        if statement_type == const.UPDATE:
+            sql = sql_utils.build_bulk_update_sql(
+                table_name, staging_table_name,
+                key_columns, staging_key_columns,
+                set_columns, staging_set_columns,
+                expression_set_values=expression_set_values,
+                schema=self._argv.targetschema)
+            pcd.update_row_count += len(statements)
+        else:
+            sql = sql_utils.build_bulk_delete_sql(
+                table_name, staging_table_name,
+                key_columns, staging_key_columns,
+                schema=self._argv.targetschema)
+            pcd.delete_row_count += len(statements)
+
+        self._execute_sql(sql,
+                          self._bulk_ops.max_lsn,
+                          self._bulk_ops.max_offset)
+
+        self._execute_sql(sql_utils.build_drop_table_sql(staging_table_name))
+
+        self._logger.debug("{t} bulk {op} of {c} rows"
+                           .format(t=table_name, op=statement_type,
+                                   c=len(statements)))
+
+    def _execute_copy_bulk_insert(self, table_name, statements):
+        """COPY the values of the given INSERT statements straight into the
+        target table. Fields assigned a SQL expression (metadata columns)
+        can't be COPY-loaded, so those inserts go via a staging table and an
+        INSERT ... SELECT instead
+        """
+        first_statement = statements[0][0]
+        c = const.SPECIAL_CHAR_REPLACEMENT
+
+        fields = []
+        expression_values = {}
+        for field in sorted(first_statement.get_fields()):
+            value = first_statement.get_value(field)
+            if sql_utils.is_sql_expression(value):
+                column = sql_utils.replace_special_chars(field, c)
+                expression_values[column] = value
+            else:
+                fields.append(field)
+
+        columns = [sql_utils.replace_special_chars(f, c) for f in fields]
+
+        rows = [sql_utils.build_copy_row([s.get_value(f) for f in fields])
+                for (s, commit_lsn, offset) in statements]
+
+        if not expression_values:
+            table = sql_utils.TableName(self._argv.targetschema, table_name)
+            self._copy_rows(table.fullname, columns, rows,
+                            self._bulk_ops.max_lsn,
+                            self._bulk_ops.max_offset)
+        else:
+            staging_columns = ["v{}".format(i) for i in range(len(columns))]
+            staging_table_name = sql_utils.build_staging_table_name(
+                table_name, const.INSERT)
+
+            self._execute_sql(sql_utils.build_staging_table_sql(
+                staging_table_name, table_name, columns, staging_columns,
+                schema=self._argv.targetschema))
+
+            self._copy_rows(staging_table_name, staging_columns, rows)
+
+            self._execute_sql(
+                sql_utils.build_insert_from_staging_sql(
+                    table_name, staging_table_name, columns, staging_columns,
+                    expression_values=expression_values,
+                    schema=self._argv.targetschema),
+                self._bulk_ops.max_lsn,
+                self._bulk_ops.max_offset)
+
+            self._execute_sql(
+                sql_utils.build_drop_table_sql(staging_table_name))
+
+        pcd = self.get_pcd(table_name)
+        pcd.insert_row_count += len(statements)
+        self._logger.debug("{t} insert row count = {c}"
+                           .format(t=table_name, c=pcd.insert_row_count))
+
+    def _copy_rows(self, table_name, column_list, rows,
+                   commit_lsn=None, offset=None):
+        payload = const.EMPTY_STRING.join(rows)
+        if isinstance(payload, unicode):
+            payload = payload.encode(self._argv.clientencoding)
+
+        copy_comment = ("-- COPY {c} rows into {t}"
+                        .format(c=len(rows), t=table_name))
+        if commit_lsn is not None or offset is not None:
+            copy_comment += (", lsn: {lsn}, offset: {offset}"
+                             .format(lsn=commit_lsn, offset=offset))
+
+        self._last_executed_state[SQL] = copy_comment
+        if commit_lsn:
+            self._last_executed_state[LSN] = commit_lsn
+        if offset:
+            self._last_executed_state[OFFSET] = offset
+
+        self._logger.debug("Executing: {}".format(copy_comment))
+
+        count = self._target_db.copy_expert(
+            StringIO(payload),
+            table_name,
+            sep=const.FIELD_DELIMITER,
+            null_string=const.COPY_NULL_STRING,
+            column_list=column_list,
+            quote_char=const.COPY_QUOTE_CHAR,
+            escape_char=const.COPY_ESCAPE_CHAR,
+            size=const.COPY_BUFFER_SIZE)
+
+        self._output_file.write("{}\n".format(copy_comment))
+        self._logger.debug("Successfully copied - {c}".format(c=count))
+        return count
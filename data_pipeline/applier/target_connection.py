@@ -0,0 +1,138 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    target_connection
+# Purpose:   Manages the lifecycle of the applier's target db connection
+#            across batches
+#
+# Notes:     A connection is acquired at the start of each batch and released
+#            at the end. If persistent, a released connection is kept open
+#            and reused by the next batch, provided it has not been idle for
+#            too long and still passes a health check. Otherwise it's
+#            transparently replaced with a new connection.
+#
+###############################################################################
+
+import logging
+import time
+
+from .exceptions import ApplyError
+
+
+DISCONNECTED = 'DISCONNECTED'
+IDLE = 'IDLE'
+ACTIVE = 'ACTIVE'
+
+
+class TargetConnection(object):
+    def __init__(self, db, conn_details, persistent=False, idle_timeout=0):
+        """Construct a new target connection
+        :param Db db: The target db client
+        :param ConnectionDetails conn_details: Target connection details
+        :param bool persistent: Keep the connection open between batches
+        :param int idle_timeout: Max number of seconds a persistent
+            connection may sit idle and still be reused. 0 for no limit
+        """
+        self._db = db
+        self._conn_details = conn_details
+        self._persistent = persistent
+        self._idle_timeout = idle_timeout
+        self._state = DISCONNECTED
+        self._released_time = None
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def state(self):
+        return self._state
+
+    def acquire(self):
+        """Acquires the connection for a batch, connecting if required
+        :return: True if a new connection was established, False if an
+            existing connection was reused
+        """
+        if self._state == ACTIVE:
+            raise ApplyError("Target connection is already acquired")
+
+        if self._state == IDLE and not self._is_reusable():
+            self._disconnect()
+
+        if self._state == IDLE:
+            self._logger.info("Reusing target connection")
+            self._state = ACTIVE
+            return False
+
+        self._logger.info("Connecting to target")
+        self._db.connect(self._conn_details)
+        if self._db.closed():
+            raise ApplyError("Failed to connect to target")
+
+        self._state = ACTIVE
+        return True
+
+    def _is_reusable(self):
+        idle_time = time.time() - self._released_time
+        if self._idle_timeout and idle_time > self._idle_timeout:
+            self._logger.info("Target connection idle for {t:.0f}s, "
+                              "exceeding idle timeout of {timeout}s. "
+                              "Reconnecting..."
+                              .format(t=idle_time,
+                                      timeout=self._idle_timeout))
+            return False
+
+        if not self._db.ping():
+            self._logger.warn("Target connection failed health check. "
+                              "Reconnecting...")
+            return False
+
+        return True
+
+    def release(self):
+        """Releases the connection at the end of a batch, closing it unless
+        persistent
+        """
+        if self._state != ACTIVE:
+            raise ApplyError("Target connection released while {state}"
+                             .format(state=self._state))
+
+        if self._persistent:
+            # Discard anything left uncommitted (e.g. with --donotcommit) so
+            # it doesn't leak into the next batch, as a close would have
+            try:
+                self._db.rollback()
+                self._state = IDLE
+                self._released_time = time.time()
+                return
+            except Exception, e:
+                self._logger.warn("Failed to reset target connection, "
+                                  "closing it: {}".format(str(e)))
+
+        self._disconnect()
+
+    def close(self):
+        if self._state != DISCONNECTED:
+            self._disconnect()
+
+    def _disconnect(self):
+        self._logger.info("Disconnecting from target")
+        try:
+            self._db.close()
+        except Exception, e:
+            self._logger.warn("Failed to close target connection: {}"
+                              .format(str(e)))
+        self._state = DISCONNECTED
+        self._released_time = None
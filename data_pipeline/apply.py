@@ -23,6 +23,8 @@
 #
 ###############################################################################
 
+import os
+import signal
 import logging
 import data_pipeline.constants.const as const
 import data_pipeline.stream.factory as stream_factory
@@ -32,7 +34,17 @@ import data_pipeline.db.factory as db_factory
 import data_pipeline.logger.logging_loader as logging_loader
 
 from .common import set_process_control_schema, get_program_args, log_version
+from multiprocessing import Process
+from data_pipeline.applier.pipeline import ApplyPipeline
+from data_pipeline.applier.parse_pool import ParsePool
 from data_pipeline.audit.factory import AuditFactory
+from data_pipeline.stream.partitions import get_apply_partitions
+from data_pipeline.utils.args import get_partition_args
+
+
+# Signals received by the parent of the partition processes that are
+# forwarded to each of them
+FORWARDED_SIGNALS = [signal.SIGINT, signal.SIGTERM, signal.SIGHUP]
 
 
 def get_target_db(argv):
@@ -44,12 +56,157 @@ def build_applier(mode, argv):
     Build an applier to apply CDCs to target db
     """
     source_processor = processor_factory.build(argv.sourcedbtype,
-                                               argv.metacols)
+                                               argv.metacols,
+                                               argv.redoparser,
+                                               argv.shapecachesize)
     db = get_target_db(argv)
     return applier_factory.build(mode, source_processor,
                                  db, argv, AuditFactory(argv))
 
 
+def build_parse_pool(argv):
+    """
+    Build a pool of processes to parse CDCs across, if parseworkers are given
+    """
+    if not argv.parseworkers:
+        return None
+
+    source_processor = processor_factory.build(argv.sourcedbtype,
+                                               argv.metacols,
+                                               argv.redoparser,
+                                               argv.shapecachesize)
+    return ParsePool(source_processor, argv)
+
+
+def build_apply_pipeline(applier, argv, parse_pool=None):
+    """
+    Build a pipeline to parse CDCs ahead of the applier executing them
+    """
+    # Parsing uses its own processor so it never shares parser state with
+    # the applier
+    source_processor = processor_factory.build(argv.sourcedbtype,
+                                               argv.metacols,
+                                               argv.redoparser,
+                                               argv.shapecachesize)
+    return ApplyPipeline(applier, source_processor, argv.pipelinequeuesize,
+                         parse_pool)
+
+
+def get_partition_argv(argv, partition):
+    """
+    Returns a copy of program args for applying a single stream partition
+    """
+    return get_partition_args(argv, partition)
+
+
+def apply_partition(mode, argv):
+    """
+    Applies the single stream partition given in argv
+    """
+    partition = get_apply_partitions(argv)[0]
+    if argv.streampartitions > 1:
+        logging_loader.setup_logging(argv.workdirectory)
+
+    # Forked before the applier starts its audit writer and apply worker
+    # threads, so no lock held by another thread is inherited by a worker
+    parse_pool = build_parse_pool(argv)
+    try:
+        applier = build_applier(mode, argv)
+        try:
+            _consume_partition(applier, partition, argv, parse_pool)
+        finally:
+            applier.close()
+    finally:
+        if parse_pool is not None:
+            parse_pool.close()
+
+
+def _consume_partition(applier, partition, argv, parse_pool=None):
+    logger = logging.getLogger(__name__)
+
+    if argv.pipelinedapply or argv.parseworkers:
+        logger.info("Pipelining apply with queue size {}"
+                    .format(argv.pipelinequeuesize))
+        if argv.parseworkers:
+            logger.info("Parsing across {} processes"
+                        .format(argv.parseworkers))
+            if not argv.consumebatchsize:
+                logger.warn("Only messages consumed in batches are parsed "
+                            "across processes. Set consumebatchsize to use "
+                            "parseworkers")
+        pipeline = build_apply_pipeline(applier, argv, parse_pool)
+        try:
+            _consume(pipeline, partition, argv)
+        finally:
+            # Stops executing before the applier is closed
+            pipeline.close()
+    else:
+        _consume(applier, partition, argv)
+
+
+def _consume(client, partition, argv):
+    logger = logging.getLogger(__name__)
+
+    if argv.streampartitions > 1:
+        logger.info("Applying partition {}".format(partition))
+        kafka_consumer = stream_factory.build_kafka_consumer(
+            argv, client, partition)
+    else:
+        kafka_consumer = stream_factory.build_kafka_consumer(argv, client)
+
+    if not kafka_consumer:
+        logger.warn("Stream consumer is not defined! "
+                    "Please check your configuration.")
+    else:
+        kafka_consumer.consumer_loop()
+
+
+def _apply_partition_process(mode, argv):
+    # Leave the parent's process group so signals sent to the group, like a
+    # Ctrl-C, only reach this process through the parent, and only once
+    os.setpgrp()
+    apply_partition(mode, argv)
+
+
+def apply_partitions(mode, argv, partitions):
+    """
+    Applies each stream partition in its own process, forwarding the
+    signals received by this process to each of them
+    """
+    logger = logging.getLogger(__name__)
+
+    processes = []
+    for partition in partitions:
+        process = Process(target=_apply_partition_process,
+                          args=(mode, get_partition_argv(argv, partition)))
+        process.start()
+        processes.append(process)
+
+    def forward_signal(signum, frame):
+        logger.info("Forwarding signal {sig} to partition processes"
+                    .format(sig=signum))
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    # Installed only once all processes are started so none inherits it
+    previous_handlers = {}
+    for signum in FORWARDED_SIGNALS:
+        previous_handlers[signum] = signal.signal(signum, forward_signal)
+
+    try:
+        for process in processes:
+            process.join()
+    finally:
+        for signum, handler in previous_handlers.iteritems():
+            signal.signal(signum, handler)
+
+    for partition, process in zip(partitions, processes):
+        if process.exitcode:
+            logger.error("Applying partition {p} exited with code {code}"
+                         .format(p=partition, code=process.exitcode))
+
+
 def main():
     mode = const.CDCAPPLY
     argv = get_program_args(mode)
@@ -60,22 +217,22 @@ def main():
 
     set_process_control_schema(argv.auditschema)
 
-    applier = build_applier(mode, argv)
-
     if argv.inputfile is not None:
         logger.info("Applying from file: {}".format(argv.inputfile))
+        applier = build_applier(mode, argv)
         filereader = stream_factory.build_file_reader(argv.inputfile)
-        filereader.read_to(applier)
+        try:
+            filereader.read_to(applier)
+        finally:
+            applier.close()
     else:
         logger.info("Applying from kafka stream")
-        kafka_consumer = stream_factory.build_kafka_consumer(argv, applier)
-
-        if not kafka_consumer:
-            logger.warn("Stream consumer is not defined! "
-                        "Please check your configuration.")
+        partitions = get_apply_partitions(argv)
+        if len(partitions) > 1:
+            logger.info("Applying partitions {}".format(partitions))
+            apply_partitions(mode, argv, partitions)
         else:
-            kafka_consumer.consumer_loop()
-
+            apply_partition(mode, get_partition_argv(argv, partitions[0]))
 
 if __name__ == "__main__":
     main()
@@ -39,15 +39,26 @@ Base = declarative_base()
 
 
 class ProcessControlBase(object):
-    def __init__(self, session, argv):
+    def __init__(self, session, argv, audit_writer=None):
         self._session = session
         self._logger = logging.getLogger(__name__)
         self._argv = argv
+        self._audit_writer = audit_writer
 
     def _truncate_comment(self):
         self.comment = self.comment[:const.MAX_COMMENT_LENGTH]
 
     def insert(self):
+        if self._session and self._audit_writer:
+            # Flush buffered updates first so they aren't written after,
+            # and over, the newer state flushed by this session commit
+            with self._audit_writer.lock:
+                self._audit_writer.flush()
+                self._insert()
+        else:
+            self._insert()
+
+    def _insert(self):
         if self._session:
             try:
                 self._truncate_comment()
@@ -62,13 +73,19 @@ class ProcessControlBase(object):
                 self._logger.exception("Insert failed. Transaction rolled "
                                        "back. {}".format(str(e)))
 
+    def _pre_update(self):
+        self._truncate_comment()
+        self.process_endtime = datetime.datetime.now()
+        timediff = self.process_endtime - self.process_starttime
+        self.duration = timediff.total_seconds()
+
     def update(self):
-        if self._session:
+        if self._session and self._audit_writer:
+            self._pre_update()
+            self._audit_writer.update(self)
+        elif self._session:
             try:
-                self._truncate_comment()
-                self.process_endtime = datetime.datetime.now()
-                timediff = self.process_endtime - self.process_starttime
-                self.duration = timediff.total_seconds()
+                self._pre_update()
                 self._session.commit()
                 if self._argv.veryverbose:
                     self._logger.debug("update(): {}".format(self))
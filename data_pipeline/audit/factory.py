@@ -30,6 +30,7 @@ import data_pipeline.audit.connection_factory as audit_conn_factory
 import data_pipeline.db.factory as db_factory
 
 from contextlib import contextmanager
+from data_pipeline.audit.write_behind import AuditWriter
 from data_pipeline.audit.audit_dao import (ProcessControl,
                                            ProcessControlDetail,
                                            SourceSystemProfile)
@@ -59,11 +60,23 @@ class AuditFactory(object):
         self.session = audit_conn_factory.build_session(
             self._audit_conn_details)
 
+        self.audit_writer = None
+        if self._argv.auditflushinterval and self._audit_conn_details:
+            self.audit_writer = AuditWriter(self.session.get_bind(),
+                                            self._argv.auditflushinterval)
+            self.audit_writer.start()
+
+    def close(self):
+        """Writes all buffered audit updates, stopping the audit writer"""
+        if self.audit_writer:
+            self.audit_writer.stop()
+            self.audit_writer = None
+
     def get_process_control(self, id):
         return self.session.query(ProcessControl).get(id)
 
     def build_process_control(self, mode):
-        pc = ProcessControl(self.session, self._argv)
+        pc = ProcessControl(self.session, self._argv, self.audit_writer)
         self._init_common_process_control(pc, mode)
 
         if mode == const.CDCEXTRACT:
@@ -80,7 +93,8 @@ class AuditFactory(object):
         return pc
 
     def build_process_control_detail(self, parent):
-        pcd = ProcessControlDetail(self.session, self._argv)
+        pcd = ProcessControlDetail(self.session, self._argv,
+                                   self.audit_writer)
         self._init_process_control_detail(parent, pcd)
 
         return pcd
@@ -0,0 +1,200 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:  write_behind
+# Purpose: Buffers process control audit updates, writing them to the audit
+#          db in bulk
+#
+# Notes:   Updates are snapshotted on the caller's thread and written on a
+#          background thread at most max_staleness seconds later, with one
+#          multi-row UPDATE per audit table. Status-critical transitions of
+#          process control records are written synchronously, along with
+#          everything buffered before them, in one transaction. These are
+#          the terminal statuses, which later runs check to decide where to
+#          start from, and committed offsets. Detail records are only
+#          buffered, so a batch's details are written with its process
+#          control record. A failed synchronous write is raised to the
+#          caller. The writer must be stopped on shutdown to write anything
+#          left buffered.
+#
+###############################################################################
+
+import logging
+import threading
+import data_pipeline.constants.const as const
+
+from collections import OrderedDict
+from sqlalchemy.dialects import postgresql
+
+
+CRITICAL_STATUSES = [const.SUCCESS, const.WARNING, const.SKIPPED,
+                     const.ERROR, const.KILLED]
+
+
+def build_bulk_update_sql(table, rows):
+    """Builds a single UPDATE statement applying all rows to the table
+    :param sqlalchemy.Table table: The audit table to update
+    :param list rows: Lists of column values, in table column order
+    :return: A tuple of the sql and flattened list of bind values
+    """
+    dialect = postgresql.dialect()
+    column_names = [c.name for c in table.columns]
+    row_placeholders = "({})".format(", ".join(["%s"] * len(column_names)))
+
+    set_entries = []
+    for c in table.columns:
+        if c.primary_key:
+            continue
+        set_entries.append("{col} = v.{col}::{coltype}"
+                           .format(col=c.name,
+                                   coltype=c.type.compile(dialect=dialect)))
+
+    key_entries = []
+    for c in table.primary_key.columns:
+        key_entries.append("t.{col} = v.{col}".format(col=c.name))
+
+    sql = ("UPDATE {table} AS t SET {set_entries} "
+           "FROM (VALUES {rows}) AS v ({columns}) "
+           "WHERE {keys}"
+           .format(table=table.name,
+                   set_entries=", ".join(set_entries),
+                   rows=", ".join([row_placeholders] * len(rows)),
+                   columns=", ".join(column_names),
+                   keys=" AND ".join(key_entries)))
+
+    values = []
+    for row in rows:
+        values.extend(row)
+
+    return (sql, values)
+
+
+class AuditWriter(object):
+    def __init__(self, engine, max_staleness):
+        """Construct a new write-behind audit writer
+        :param sqlalchemy.engine.Engine engine: The audit db engine. Flushes
+            use their own connection from the engine's pool
+        :param int max_staleness: Max number of seconds an update is buffered
+            before being written to the audit db
+        """
+        self._engine = engine
+        self._max_staleness = max_staleness
+        self._logger = logging.getLogger(__name__)
+
+        # Serialises all writes of audit records so an older snapshot can
+        # never be written over a newer one
+        self.lock = threading.RLock()
+
+        self._pending = OrderedDict()
+        self._tables = {}
+        self._flushed_offsets = {}
+
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run,
+                                        name="AuditWriter")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush(critical=True)
+
+    def _run(self):
+        # Failures are retried on the next flush
+        while not self._stopped.wait(self._max_staleness):
+            self.flush()
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def update(self, record):
+        """Buffers the current state of the audit record, flushing all
+        buffered records immediately if the record is a process control
+        record in a status-critical state
+        :param ProcessControlBase record: The audit record to write
+        """
+        table = record.__table__
+        key = (table.name, record.id)
+        row = [getattr(record, c.name) for c in table.columns]
+
+        with self.lock:
+            self._tables[table.name] = table
+            self._pending[key] = row
+
+        if self._is_critical(key, record):
+            self.flush(critical=True)
+
+    def _is_critical(self, key, record):
+        if record.__table__.name != const.PROCESS_CONTROL_TABLE:
+            return False
+
+        if record.status in CRITICAL_STATUSES:
+            return True
+
+        # Committed offsets are what a restart recovers from
+        if getattr(record, 'executor_status', None) == const.COMMITTED:
+            return (self._flushed_offsets.get(key) !=
+                    record.executor_run_id)
+
+        return False
+
+    def flush(self, critical=False):
+        """Writes all buffered audit records to the audit db in a single
+        transaction. On failure, records remain buffered for the next flush
+        :param bool critical: Raise on failure, rather than only logging it
+        """
+        with self.lock:
+            if not self._pending:
+                return
+
+            rows_by_table = OrderedDict()
+            for (table_name, id), row in self._pending.iteritems():
+                rows_by_table.setdefault(table_name, []).append(row)
+
+            try:
+                with self._engine.begin() as conn:
+                    for table_name, rows in rows_by_table.iteritems():
+                        (sql, values) = build_bulk_update_sql(
+                            self._tables[table_name], rows)
+                        conn.execute(sql, tuple(values))
+
+                self._logger.debug("Flushed {n} audit records"
+                                   .format(n=len(self._pending)))
+                self._record_flushed_offsets()
+                self._pending.clear()
+            except Exception, e:
+                self._logger.exception("Audit flush failed. {n} records "
+                                       "remain buffered. {err}"
+                                       .format(n=len(self._pending),
+                                               err=str(e)))
+                if critical:
+                    raise
+
+    def _record_flushed_offsets(self):
+        for key, row in self._pending.iteritems():
+            table = self._tables[key[0]]
+            if 'executor_run_id' in table.columns:
+                index = table.columns.keys().index('executor_run_id')
+                self._flushed_offsets[key] = row[index]
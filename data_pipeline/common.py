@@ -53,10 +53,21 @@ def log_version(logger):
                 .format(version=get_version()))
 
 
+def acts_on_reload(mode, argv):
+    """Returns True if the mode runs long enough to reload its config on
+    SIGHUP between batches, rather than being stopped by it
+    """
+    return (mode == const.CDCAPPLY or
+            (mode == const.CDCEXTRACT and getattr(argv, 'streaming', False)))
+
+
 class SignalHandler(object):
     def __init__(self, mode, argv, audit_factory):
         signal.signal(signal.SIGINT, self.exit_gracefully)
         signal.signal(signal.SIGTERM, self.exit_gracefully)
+        if acts_on_reload(mode, argv):
+            signal.signal(signal.SIGHUP, self.request_reload)
+        self._reload_requested = False
 
         self._mode = mode
         self._argv = argv
@@ -71,4 +82,17 @@ class SignalHandler(object):
                           .format(sig=signum))
         self._pc.status = const.KILLED
         self._pc.update()
+        self.close()
         sys.exit(signum)
+
+    def close(self):
+        """Writes all audit updates still buffered. Called on shutdown"""
+        self._audit_factory.close()
+
+    def request_reload(self, signum, frame):
+        # Only flag the request here; the reload itself happens at a safe
+        # point in the main loop
+        self._logger.info("Signal {sig} received. Configuration will be "
+                          "reloaded at the next opportunity"
+                          .format(sig=signum))
+        self._reload_requested = True
@@ -116,6 +116,7 @@ DEFAULT_ARRAYSIZE = 1000
 INSERT = 'INSERT'
 UPDATE = 'UPDATE'
 DELETE = 'DELETE'
+UPSERT = 'UPSERT'
 DDL = 'DDL'
 CREATE = 'CREATE'
 CREATE_TABLE = 'CREATE TABLE'
@@ -134,17 +135,21 @@ COMMIT = "COMMIT"
 MSSQL_DELETE_ACTION = '1'
 MSSQL_INSERT_ACTION = '2'
 MSSQL_UPDATE_ACTION = '4'
+# Insert or update of a net change queried with 'all with merge'
+MSSQL_MERGE_ACTION = '5'
 MSSQL_DEFAULT_SCHEMA = 'dbo'
 
 ORACLE_SET_NULL = "= NULL"
 ORACLE_EMPTY_CLOB = "EMPTY_CLOB()"
 ORACLE_EMPTY_BLOB = "EMPTY_BLOB()"
+ORACLE_INSERT_VALUES_SEPARATOR = ") values ("
 
 # Record types
 START_OF_BATCH = 'SOB'
 END_OF_BATCH = 'EOB'
 DATA = 'DATA'
 KILL = 'KILL'
+ENVELOPE = 'ENVELOPE'
 
 # Data types
 DICT = 'dict'
@@ -153,6 +158,10 @@ DICT = 'dict'
 NEW_PARSING_STATE = "new_parsing_state"
 ASSIGN_VALUE = "assign_value"
 
+# Oracle redo parser engines
+STATE_MACHINE_PARSER = 'statemachine'
+TOKENIZER_PARSER = 'tokenizer'
+
 # Oracle Extractor
 ONLINE_DICT = 'online'
 REDOLOG_DICT = 'redolog'
@@ -175,6 +184,9 @@ ALTER_NLS_TIMESTAMP_FORMAT_COMMAND = sql
 
 # Initsync constants
 HEARTBEAT_PERIOD = 1000
+
+# Work directory of each partition of a partitioned stream
+PARTITION_DIRECTORY = "partition{partition}"
 SOURCE = "source"
 TARGET = "target"
 
@@ -203,6 +215,20 @@ KAFKA_MAX_BUFFERED_MS = 100
 KAFKA_MAX_BUFFERED_MSG = 10000000
 KAFKA_AUTO_OFFSET_RESET = 'earliest'
 KAFKA_STATS_INTERVAL_MS = 10
+KAFKA_BATCH_LINGER_MS = 100
+KAFKA_BATCH_NUM_MESSAGES = 10000
+
+# Kafka producer profiles
+PRODUCER_PROFILE_DEFAULT = 'default'
+PRODUCER_PROFILE_THROUGHPUT = 'throughput'
+PRODUCER_PROFILE_RELIABLE = 'reliable'
+
+# Kafka compression codecs
+COMPRESSION_NONE = 'none'
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_SNAPPY = 'snappy'
+COMPRESSION_LZ4 = 'lz4'
+COMPRESSION_ZSTD = 'zstd'
 
 # Email constants
 MAX_SUBJECT_LENGTH = 80
@@ -215,6 +241,16 @@ ASCII_CARRIAGERETURN = 13
 ASCII_GROUPSEPARATOR = 29
 ASCII_RECORDSEPARATOR = 30
 
+# Bulk COPY constants. These follow the initsync conventions of using rarely
+# seen ASCII control chars as the quote and escape chars
+COPY_QUOTE_CHAR = chr(ASCII_GROUPSEPARATOR)
+COPY_ESCAPE_CHAR = chr(ASCII_RECORDSEPARATOR)
+COPY_NULL_STRING = EMPTY_STRING
+COPY_BUFFER_SIZE = 65536
+
+# Max number of SQL statements queued per apply worker before blocking
+APPLY_WORKER_QUEUE_SIZE = 1000
+
 # Metadata constants
 METADATA_INSERT_TS_COL = 'insert_timestamp_column'
 METADATA_UPDATE_TS_COL = 'update_timestamp_column'
@@ -107,6 +107,12 @@ class Db(object):
     def closed(self):
         return not self._connected
 
+    def ping(self):
+        """Checks whether the connection is still usable
+        :return: True if the connection is usable
+        """
+        return not self.closed()
+
     def disconnect(self):
         if self._cursor:
             self._cursor.close()
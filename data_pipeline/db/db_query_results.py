@@ -23,11 +23,53 @@
 # Notes:
 ###############################################################################
 
+import operator
+
+from itertools import izip
 from .query_results import QueryResults
 
 COL_NAME_INDEX = 0
 
 
+class RowDecoder(object):
+    """Decodes rows into message dicts. Column positions are resolved once
+    per cursor, so decoding a row is a single itemgetter call and zip
+    rather than a column name lookup per field
+    """
+
+    def __init__(self, query_results, field_columns, defaults=None,
+                 null_value=None):
+        """
+        :param QueryResults query_results: Results the rows are fetched from
+        :param list field_columns: (message field, column name) pairs
+        :param dict defaults: Fields set to the same value for every row
+        :param null_value: Replaces NULL column values, if not None
+        """
+        self._fields = tuple(field for (field, column) in field_columns)
+        indexes = [query_results.get_col_index(column)
+                   for (field, column) in field_columns]
+        # itemgetter only returns a tuple when given more than one index
+        indexes.append(indexes[0])
+        self._getter = operator.itemgetter(*indexes)
+        self._defaults = dict(defaults or {})
+        self._null_value = null_value
+
+    def decode(self, row):
+        """
+        :param row: A row fetched from the query results
+        :return: A new message dict with the defaults and decoded fields
+        :rtype: dict
+        """
+        values = self._getter(row)
+        if self._null_value is not None and None in values:
+            null_value = self._null_value
+            values = [null_value if v is None else v for v in values]
+
+        message = self._defaults.copy()
+        message.update(izip(self._fields, values))
+        return message
+
+
 class DbQueryResults(QueryResults):
     def __init__(self, cursor):
         super(DbQueryResults, self).__init__()
@@ -35,10 +35,11 @@ class OracleQueryResults(DbQueryResults):
     def _is_complete(self, record):
         return self.get(record, const.CSF_FLAG_FIELD) == '0'
 
-    def _append_redo_statement(self, parent_record, child_record):
-        partial_redo = self.get(child_record, const.SQLREDOSTMT_FIELD)
+    def _join_redo_statement(self, parent_record, redo_chunks):
+        # Joined once all chunks are read, so a large multi-part (LOB) redo
+        # statement is copied once rather than once per chunk
         redo_col_i = self.get_col_index(const.SQLREDOSTMT_FIELD)
-        parent_record[redo_col_i] += partial_redo
+        parent_record[redo_col_i] = const.EMPTY_STRING.join(redo_chunks)
 
     def next(self):
         parent_record = super(OracleQueryResults, self).next()
@@ -49,6 +50,7 @@ class OracleQueryResults(DbQueryResults):
 
         parent_statement_id = self.get(parent_record, const.STATEMENT_ID_FIELD)
         curr_record = parent_record
+        redo_chunks = None
 
         while not self._is_complete(curr_record):
             curr_record = super(OracleQueryResults, self).next()
@@ -60,6 +62,13 @@ class OracleQueryResults(DbQueryResults):
                     "in previous message but statement_ids differ: {} != {}"
                     .format(curr_statement_id, parent_statement_id))
 
-            self._append_redo_statement(parent_record, curr_record)
+            if redo_chunks is None:
+                redo_chunks = [self.get(parent_record,
+                                        const.SQLREDOSTMT_FIELD)]
+            redo_chunks.append(self.get(curr_record,
+                                        const.SQLREDOSTMT_FIELD))
+
+        if redo_chunks is not None:
+            self._join_redo_statement(parent_record, redo_chunks)
 
         return parent_record
@@ -147,6 +147,20 @@ class PostgresDb(Db):
     def commit(self):
         self._connection.commit()
 
+    def ping(self):
+        if self.closed() or self._connection.closed:
+            return False
+
+        try:
+            self._cursor.execute("SELECT 1")
+            self._cursor.fetchone()
+            self._connection.rollback()
+            return True
+        except Exception, e:
+            self._logger.warn("Connection health check failed: {}"
+                              .format(str(e)))
+            return False
+
     def is_client_present(self):
         pass
 
@@ -33,15 +33,27 @@ import data_pipeline.logger.logging_loader as logging_loader
 
 from .common import set_process_control_schema, get_program_args, log_version
 from data_pipeline.audit.factory import AuditFactory
+from data_pipeline.extractor.parallel_logminer import build_mining_pool
 
 
 def get_source_db(argv):
     return db_factory.build(argv.sourcedbtype)
 
 
-def build_extractor(mode, argv):
+def build_extractor(mode, argv, mining_pool=None):
     db = get_source_db(argv)
-    return extractor_factory.build(mode, db, argv, AuditFactory(argv))
+    return extractor_factory.build(mode, db, argv, AuditFactory(argv),
+                                   mining_pool)
+
+
+def build_extractor_mining_pool(argv):
+    """
+    Build the processes to mine Oracle SCN ranges in, if miningprocesses are
+    given
+    """
+    if argv.sourcedbtype != const.ORACLE or argv.miningprocesses <= 1:
+        return None
+    return build_mining_pool(argv.miningprocesses)
 
 
 def main():
@@ -54,8 +66,20 @@ def main():
 
     set_process_control_schema(argv.auditschema)
 
-    extractor = build_extractor(mode, argv)
-    extractor.extract()
+    # Forked before the extractor starts its audit writer and stream
+    # producer threads, so no lock held by another thread is inherited
+    mining_pool = build_extractor_mining_pool(argv)
+    try:
+        extractor = build_extractor(mode, argv, mining_pool)
+        try:
+            extractor.extract()
+        finally:
+            extractor.close()
+    finally:
+        if mining_pool is not None:
+            # Also stops any sessions still mining on an abnormal exit
+            mining_pool.terminate()
+            mining_pool.join()
 
 
 if __name__ == "__main__":
@@ -29,6 +29,7 @@ import data_pipeline.constants.const as const
 
 from .exceptions import InvalidArgumentsError
 from .extractor import Extractor
+from .key_metadata_cache import KeyMetadataCache
 from abc import ABCMeta, abstractmethod
 
 
@@ -74,19 +75,66 @@ class CdcExtractor(Extractor):
     def __init__(self, db, argv, audit_factory):
         super(CdcExtractor, self).__init__(
             const.CDCEXTRACT, db, argv, audit_factory)
+        self._keycolumns_profile = None
+        self._last_end_lsn = None
+        self._key_cache = None
+        if argv.keycachefile:
+            self._key_cache = KeyMetadataCache(argv.keycachefile,
+                                               argv.keycachettl)
 
     def _extract_source_data(self):
-        self.build_keycolumnlist(self._active_schemas, self._active_tables)
+        # Key columns are only looked up again if the profile changes
+        profile = (frozenset(self._active_schemas or []),
+                   frozenset(self._active_tables or []))
+        if profile != self._keycolumns_profile:
+            self._load_key_columns()
+            self._keycolumns_profile = profile
 
         (self._start_lsn, self._end_lsn) = self._get_cdc_query_range()
         if self._end_lsn is not None:
             self.poll_cdcs(self._start_lsn, self._end_lsn)
             self.flush()
+            self._last_end_lsn = self._end_lsn
         else:
             self._report_no_cdcs_found()
 
         return self._end_lsn
 
+    def _get_key_cache_id(self):
+        return "{dbtype}:{name}:{version}".format(
+            dbtype=self._argv.sourcedbtype,
+            name=self._argv.profilename,
+            version=self._argv.profileversion)
+
+    def _load_key_columns(self):
+        """Loads the key columns of the active tables from the key cache,
+        falling back to looking them up from the source"""
+        self._keyfieldslist.clear()
+
+        if self._key_cache:
+            keys = self._key_cache.load(self._get_key_cache_id(),
+                                        self._active_schemas,
+                                        self._active_tables)
+            if keys is not None:
+                self._logger.info("Using cached key columns of {n} tables"
+                                  .format(n=len(keys)))
+                self._keyfieldslist.update(keys)
+                return
+
+        self.build_keycolumnlist(self._active_schemas, self._active_tables)
+
+        if self._key_cache:
+            self._key_cache.save(self._get_key_cache_id(),
+                                 self._active_schemas, self._active_tables,
+                                 self._keyfieldslist)
+
+    def _invalidate_key_columns(self):
+        """Called on DDL that may change the key columns of a table, so they
+        are looked up from the source again by the next extract"""
+        self._keycolumns_profile = None
+        if self._key_cache:
+            self._key_cache.invalidate(self._get_key_cache_id())
+
     def _get_cdc_query_range(self):
         (prev_min_cdc_point, prev_max_cdc_point) = get_prev_run_cdcs(
             self._audit_conn_details, self._argv)
@@ -115,6 +163,19 @@ class CdcExtractor(Extractor):
 
         return (min_cdc_point, max_cdc_point)
 
+    def _clear_window_cache(self):
+        super(CdcExtractor, self)._clear_window_cache()
+        self._keycolumns_profile = None
+
+    def _new_cdcs_available(self):
+        if not self._source_connected or self._last_end_lsn is None:
+            return True
+
+        (min_cdc_point, max_cdc_point) = self.get_source_minmax_cdc_point(
+            self._last_end_lsn)
+        return (max_cdc_point is not None and
+                str(max_cdc_point) != str(self._last_end_lsn))
+
     def _report_no_cdcs_found(self):
         message = "Completed CDCExtract - No new CDC Records detected ..."
         self._pc.comment = message
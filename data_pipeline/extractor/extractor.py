@@ -41,6 +41,8 @@ from abc import ABCMeta, abstractmethod
 from data_pipeline.common import SignalHandler
 from data_pipeline.stream.factory import (build_kafka_producer,
                                           build_file_writer)
+from data_pipeline.stream.envelope import EnvelopePacker
+from data_pipeline.stream.partitions import partition_for_table
 
 
 logger = logging.getLogger(__name__)
@@ -131,8 +133,17 @@ class Extractor(SignalHandler):
         self._sob_message_written = False
         self._last_written_lsn = None
         self._records_written_to_stream = 0
+        self._partition_record_counts = [0] * self._argv.streampartitions
+        self._envelope_packer = None
+        if self._argv.enveloperecords or self._argv.envelopebytes:
+            self._envelope_packer = EnvelopePacker(
+                self._argv.enveloperecords, self._argv.envelopebytes)
         self._start_lsn = None
         self._end_lsn = None
+        self._source_connected = False
+        self._windows_started = 0
+        self._window_delivery_error_start = 0
+        self._running = False
 
         self._pcd = audit_factory.build_process_control_detail(self._pc)
 
@@ -146,23 +157,102 @@ class Extractor(SignalHandler):
                 "A earlier extract is currently running. Aborting extract...")
             return
 
+        self._running = True
+        if not self._argv.streaming:
+            self._extract_window()
+            return
+
+        self._logger.info("Streaming extract. Checking for new CDCs every "
+                          "{i} seconds".format(i=self._argv.extractinterval))
+
+        while self._running and self._extract_window():
+            self._wait_for_new_cdcs()
+
+    def stop(self):
+        """Stops a streaming extract once the current window is extracted"""
+        self._running = False
+
+    def _extract_window(self):
+        """Extracts all CDCs available since the last window as a batch,
+        audited in its own process_control record. The source session,
+        and state cached with it, is kept for the next window
+        :return: False if no further windows should be extracted
+        """
+        self._start_window()
+
         self._insert_pc()
         if self._write_terminate():
-            return
+            return False
 
         self._ensure_profile_is_set()
         self._ensure_schemas_and_tables_are_set()
 
         try:
-            self.connect_to_source_db()
+            if not self._source_connected:
+                self.connect_to_source_db()
+                self._source_connected = True
             self._extract_source_data()
             self._pc.status = const.SUCCESS
         except Exception, err:
             self._report_error(err)
+            self._close_source_session()
         finally:
             self._write_eob_message()
             self.flush()
 
+        return True
+
+    def _start_window(self):
+        if self._windows_started > 0:
+            self._pc = self._audit_factory.build_process_control(self._mode)
+            self._pcd = self._audit_factory.build_process_control_detail(
+                self._pc)
+
+        if self._reload_requested:
+            self._reload_requested = False
+            self._logger.info("Discarding state cached across windows")
+            self._clear_window_cache()
+
+        self._windows_started += 1
+        if self._kafka_producer:
+            # The producer's count spans windows, so each window only
+            # reports failures since it started
+            self._window_delivery_error_start = (
+                self._kafka_producer.delivery_error_count)
+        self._sob_message_written = False
+        self._last_written_lsn = None
+        self._records_written_to_stream = 0
+
+    def _clear_window_cache(self):
+        """Discards state cached with the source session across windows"""
+        pass
+
+    def _close_source_session(self):
+        """Closes the source session, so the next window reconnects"""
+        if self._source_connected:
+            try:
+                self._source_db.close()
+            except Exception, e:
+                self._logger.warn("Failed to close source db: {err}"
+                                  .format(err=str(e)))
+        self._source_connected = False
+        self._clear_window_cache()
+
+    def _wait_for_new_cdcs(self):
+        while self._running:
+            time.sleep(self._argv.extractinterval)
+            try:
+                if self._new_cdcs_available():
+                    return
+            except Exception, e:
+                # Left to the next window to report and recover from
+                self._logger.warn("Failed to check for new CDCs: {err}"
+                                  .format(err=str(e)))
+                return
+
+    def _new_cdcs_available(self):
+        return True
+
     @abstractmethod
     def _extract_source_data(self):
         pass
@@ -339,7 +429,66 @@ class Extractor(SignalHandler):
                 raise TypeError("Message is not a dict type. Message type "
                                 "passed: {}".format(t))
 
-            if not self._kafka_producer.write(message):
+            if self._envelope_packer is None:
+                self._send(message)
+            elif message.get("record_type") == const.DATA:
+                for envelope in self._envelope_packer.add(
+                        self._get_partition(message), message):
+                    self._send(envelope)
+            else:
+                # Envelopes never span batch boundaries
+                self._send_envelopes()
+                self._send(message)
+
+    def _send_envelopes(self):
+        if self._envelope_packer is not None:
+            for (partition, envelope) in self._envelope_packer.drain():
+                self._send(envelope)
+
+    def _send(self, message):
+        if self._argv.streampartitions > 1:
+            self._write_to_partitions(message)
+        elif not self._kafka_producer.write(message):
+            raise Exception("Failed to write to kafka stream")
+
+    def _get_partition(self, message):
+        if self._argv.streampartitions > 1:
+            return partition_for_table(message.get("table_name"),
+                                       self._argv.streampartitions)
+        return None
+
+    def _write_to_partitions(self, message):
+        """DATA records are written to their table's partition. All other
+        records mark batch boundaries, so are written to every partition
+        """
+        partition_count = self._argv.streampartitions
+        record_type = message.get("record_type")
+
+        if record_type in [const.DATA, const.ENVELOPE]:
+            # An envelope only packs records of the same partition
+            partition = self._get_partition(message)
+            if record_type == const.ENVELOPE:
+                self._partition_record_counts[partition] += (
+                    message.get("record_count"))
+            else:
+                self._partition_record_counts[partition] += 1
+            partition_messages = [(partition, message)]
+        else:
+            if record_type == const.START_OF_BATCH:
+                self._partition_record_counts = [0] * partition_count
+
+            partition_messages = []
+            for partition in range(partition_count):
+                partition_message = message
+                if record_type == const.END_OF_BATCH:
+                    # Each partition's applier checks its own record count
+                    partition_message = dict(
+                        message,
+                        record_count=self._partition_record_counts[partition])
+                partition_messages.append((partition, partition_message))
+
+        for (partition, partition_message) in partition_messages:
+            if not self._kafka_producer.write(partition_message, partition):
                 raise Exception("Failed to write to kafka stream")
 
     def disconnect_process_control(self):
@@ -360,13 +509,29 @@ class Extractor(SignalHandler):
             self._pc.comment = ("Extracted {} transactions from source"
                                 .format(self._records_written_to_stream))
             self._pc.total_count = self._records_written_to_stream
+            self._check_delivery_errors()
             self._pc.update()
 
         return func_wrapper
 
+    def _check_delivery_errors(self):
+        if self._kafka_producer is None:
+            return
+
+        error_count = (self._kafka_producer.delivery_error_count -
+                       self._window_delivery_error_start)
+        if error_count:
+            err_message = ("{count} messages failed delivery to stream"
+                           .format(count=error_count))
+            self._logger.error(err_message)
+            self._pc.comment = "{comment}. {err}".format(
+                comment=self._pc.comment, err=err_message)
+            self._pc.status = const.ERROR
+
     @_decorate_flush
     def flush(self):
         if self._kafka_producer:
+            self._send_envelopes()
             self._kafka_producer.flush()
         if self._output_file:
             self._output_file.flush()
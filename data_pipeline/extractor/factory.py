@@ -28,11 +28,11 @@ from data_pipeline.db.exceptions import UnsupportedDbTypeError
 import data_pipeline.constants.const as const
 
 
-def build(mode, db, argv, audit_factory):
+def build(mode, db, argv, audit_factory, mining_pool=None):
     """Return the specific extractor instance given the dbtype_name"""
     if db.dbtype == const.ORACLE:
         from .oracle_cdc_extractor import OracleCdcExtractor
-        return OracleCdcExtractor(db, argv, audit_factory)
+        return OracleCdcExtractor(db, argv, audit_factory, mining_pool)
     elif db.dbtype == const.MSSQL:
         from .mssql_cdc_extractor import MssqlCdcExtractor
         return MssqlCdcExtractor(db, argv, audit_factory)
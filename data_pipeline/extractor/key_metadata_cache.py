@@ -0,0 +1,112 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    key_metadata_cache
+# Purpose:   Persists the primary/unique key columns of a profile's tables
+#            between extractor runs
+#
+# Notes:     Looking up key columns from the source dictionary can take tens
+#            of seconds. The keys are kept in a local JSON file, one entry
+#            per profile, until they expire or a DDL event invalidates them.
+#
+###############################################################################
+
+import json
+import logging
+import os
+import time
+
+
+class KeyMetadataCache(object):
+    def __init__(self, filename, ttl):
+        """
+        :param str filename: JSON file holding the cached key columns
+        :param int ttl: Seconds after which cached key columns are looked
+            up from the source again
+        """
+        self._filename = filename
+        self._ttl = ttl
+        self._logger = logging.getLogger(__name__)
+
+    def load(self, profile_id, schemas, tables):
+        """Returns the cached {table: key columns} of a profile, or None if
+        there is no current entry for the profile's schemas and tables
+        :param str profile_id: Identifies the profile and its version
+        :param list schemas: The profile's active schemas
+        :param list tables: The profile's active tables
+        """
+        entry = self._read().get(profile_id)
+        if entry is None:
+            return None
+
+        if (entry.get('schemas') != sorted(schemas or []) or
+                entry.get('tables') != sorted(tables or [])):
+            self._logger.info("Cached key columns of {p} are for different "
+                              "tables".format(p=profile_id))
+            return None
+
+        age = time.time() - entry.get('created', 0)
+        if age > self._ttl:
+            self._logger.info("Cached key columns of {p} expired {a:.0f}s "
+                              "ago".format(p=profile_id, a=age - self._ttl))
+            return None
+
+        return entry.get('keys')
+
+    def save(self, profile_id, schemas, tables, keys):
+        """Caches the {table: key columns} of a profile
+        :param str profile_id: Identifies the profile and its version
+        :param list schemas: The profile's active schemas
+        :param list tables: The profile's active tables
+        :param dict keys: Key columns by table name
+        """
+        entries = self._read()
+        entries[profile_id] = {
+            'created': time.time(),
+            'schemas': sorted(schemas or []),
+            'tables': sorted(tables or []),
+            'keys': dict((t, k) for (t, k) in keys.iteritems()
+                         if t is not None),
+        }
+        self._write(entries)
+
+    def invalidate(self, profile_id):
+        """Discards the cached key columns of a profile"""
+        entries = self._read()
+        if entries.pop(profile_id, None) is not None:
+            self._logger.info("Invalidated cached key columns of {p}"
+                              .format(p=profile_id))
+            self._write(entries)
+
+    def _read(self):
+        if not os.path.exists(self._filename):
+            return {}
+        try:
+            with open(self._filename) as f:
+                return json.load(f)
+        except (IOError, ValueError), e:
+            self._logger.warn("Ignoring unreadable key column cache {f}: "
+                              "{err}".format(f=self._filename, err=str(e)))
+            return {}
+
+    def _write(self, entries):
+        # Replaced whole, so a concurrent reader never sees a partial file
+        tmp_filename = "{f}.tmp".format(f=self._filename)
+        with open(tmp_filename, 'w') as f:
+            json.dump(entries, f)
+        os.rename(tmp_filename, self._filename)
@@ -25,15 +25,49 @@
 
 from .cdc_extractor import CdcExtractor
 from .exceptions import InvalidArgumentsError
+from .table_pollers import FetchedQueryResults, poll_tables
+from data_pipeline.db.db_query_results import RowDecoder
 from data_pipeline.db.mssqldb import MssqlDb
 from data_pipeline.db.connection_details import ConnectionDetails
 from data_pipeline.stream.mssql_message import MssqlMessage
 
-import csv
-import cStringIO
 import data_pipeline.constants.const as const
+import data_pipeline.db.factory as dbfactory
+import data_pipeline.utils.dbuser as dbuser
 
 COL_NAME_START_INDEX = 10
+CDC_META_COLUMN_PREFIX = '__$'
+
+# (message field, CDC query column) pairs
+RECORD_FIELD_COLUMNS = [
+    ('operation_code', 'operation_code'),
+    ('operation_type', 'operation_type'),
+    ('table_name', 'table_name'),
+    ('statement_id', 'statement_id'),
+    ('commit_lsn', 'commit_lsn'),
+    ('commit_timestamp', 'commit_time'),
+]
+
+
+def to_field_strings(record):
+    """Converts a record's column values to strings, as the csv module
+    would, without writing and re-splitting a line per record"""
+    return [v if type(v) is str else
+            (const.EMPTY_STRING if v is None else
+             repr(v) if type(v) is float else str(v))
+            for v in record]
+
+
+def get_column_start_index(col_names):
+    """Returns the position of the first table column in the CDC query
+    results, following the CDC function's own __$ metadata columns. Their
+    number depends on the function (net changes return fewer) and the
+    server version"""
+    meta_indexes = [i for (i, name) in enumerate(col_names)
+                    if name.startswith(CDC_META_COLUMN_PREFIX)]
+    if not meta_indexes:
+        return COL_NAME_START_INDEX
+    return meta_indexes[-1] + 1
 
 
 class MssqlCdcExtractor(CdcExtractor):
@@ -43,6 +77,8 @@ class MssqlCdcExtractor(CdcExtractor):
         self._message = MssqlMessage()
         self.key_fields = const.EMPTY_STRING
         self.column_names = const.EMPTY_STRING
+        self._column_start_index = COL_NAME_START_INDEX
+        self._net_change_tables = None
         
     def get_source_minmax_cdc_point(self, last_run_max_lsn):
         min_lsn = None
@@ -71,96 +107,179 @@ class MssqlCdcExtractor(CdcExtractor):
     def poll_cdcs(self, start_lsn, end_lsn):
         super(MssqlCdcExtractor, self).poll_cdcs(start_lsn, end_lsn)
 
-        # Assume all tables reside in only one schema
-        if self._segowners:
-            schema = list(self._segowners)[0]
-        else:
-            schema = const.MSSQL_DEFAULT_SCHEMA
-
-        self._logger.debug("Looking for CDCs in tables={}".format(self._tables))
-
-        for table in self._tables:
-            if start_lsn and end_lsn:
-
-                #table="{}_{}".format(self._argv.sourceschema, table)
-                self._logger.info("Polling database CDC points: {} -> {}".format(start_lsn, end_lsn))
-               
-                #TODO consider further validations on start and end LSN numbers                
-                selectsamplestr = const.EMPTY_STRING
-                if (self._argv.samplerows):
-                    selectsamplestr = "TOP " + str(self._argv.samplerows)
-
-                sqldef = " ".join([
-                             "SELECT {selectsample}"
-                             ,      "'DML'                                     AS operation_type"
-                             ,      ",__$operation                             AS operation_code"
-                             ,      ",'{tablename}'                            AS table_name"
-                             ,      ",sys.fn_cdc_map_lsn_to_time(__$start_lsn) AS commit_time"
-                             ,      ",CONVERT(VARCHAR(50), __$start_lsn, 2)    AS commit_lsn"
-                             ,      ",CONVERT(VARCHAR(50), __$start_lsn, 2) + '.' + CONVERT(VARCHAR(50), __$seqval, 2)  AS statement_id"
-                             ,      ",* "
-                             ,"FROM   cdc.fn_cdc_get_all_changes_{tablename} (CONVERT(VARBINARY(20),0x{startlsn}, 1), CONVERT(VARBINARY(20),0x{endlsn}, 1), N'all'); "])
-
-                sqldef = sqldef.format(selectsample=selectsamplestr, tablename=table, startlsn=start_lsn, endlsn=end_lsn)
-
-                query_results = self._source_db.execute_query(sqldef)
-
-                # get the column names once per table
-                self.column_names = self.get_column_names(query_results)
-                
-                count = 0
-                self._init_batch_id()
-                self._write_sob_message(start_lsn)
-                for rec in query_results:
-
-                    count += 1
-                    membuf = cStringIO.StringIO()
-                    memwrt = csv.writer(membuf, delimiter=const.FIELD_DELIMITER)
-                    memwrt.writerow(rec)
-
-                    tmpbuf = membuf.getvalue().strip(const.CHAR_CRLF)
-                    row = tmpbuf.split(const.FIELD_DELIMITER)
-
-                    if (self._argv.rawfile):
-                        self.write_to_rawfile(tmpbuf)
-
-                    self.write(self._build_record_message(query_results, row))
-
-                # construct an end of batch record and write it to kafka topic
-                if query_results:
-                    count -= 1
-                    self._pcd.delta_startlsn = start_lsn
-                    self._pcd.delta_endlsn = end_lsn
-                    self._write_eob_message(table, count, end_lsn)
-
-            else:
-                self._logger.error("No start_lsn and msx_lsns were computed.")
-
-    def _build_record_message(self, query_results, row):
+        if not (start_lsn and end_lsn):
+            self._logger.error("No start_lsn and msx_lsns were computed.")
+            return
+
+        tables = sorted(self._active_tables)
+        self._logger.debug("Looking for CDCs in tables={}".format(tables))
+        self._logger.info("Polling database CDC points: {} -> {}".format(start_lsn, end_lsn))
+
+        if self._argv.netchanges:
+            # Resolved here, before any poller threads build their queries
+            self._get_net_change_tables()
+
+        if self._argv.pollworkers > 1 and len(tables) > 1:
+            self._poll_tables_in_parallel(tables, start_lsn, end_lsn)
+            return
+
+        for table in tables:
+            sqldef = self._build_cdc_query(table, start_lsn, end_lsn)
+            query_results = self._source_db.execute_query(sqldef)
+            self._write_table_batch(table, query_results)
+
+    def _poll_tables_in_parallel(self, tables, start_lsn, end_lsn):
+        """Queries the CDC functions of up to pollworkers tables at a time,
+        each over its own source connection. Each table is written as its
+        own batch once fetched"""
+        self._logger.info("Polling {n} tables with {w} workers"
+                          .format(n=len(tables), w=self._argv.pollworkers))
+
+        def fetch(db, table):
+            query_results = db.execute_query(
+                self._build_cdc_query(table, start_lsn, end_lsn))
+            return FetchedQueryResults(query_results.get_col_names(),
+                                       query_results.fetchall())
+
+        for (table, query_results) in poll_tables(
+                tables, self._connect_poller_db, fetch,
+                self._argv.pollworkers):
+            self._write_table_batch(table, query_results,
+                                    query_results.rowcount)
+
+    def _connect_poller_db(self):
+        db = dbfactory.build(const.MSSQL)
+        db.connect(dbuser.get_dbuser_properties(self._argv.sourceuser))
+        return db
+
+    def _get_net_change_tables(self):
+        """Returns the capture instances enabled with @supports_net_changes,
+        queried once per source session"""
+        if self._net_change_tables is None:
+            query_results = self._source_db.execute_query(
+                "SELECT LOWER(capture_instance) FROM cdc.change_tables "
+                "WHERE supports_net_changes = 1")
+            self._net_change_tables = set(row[0] for row in query_results)
+            self._logger.info("Capture instances supporting net changes: {}"
+                              .format(sorted(self._net_change_tables)))
+        return self._net_change_tables
+
+    def _clear_window_cache(self):
+        super(MssqlCdcExtractor, self)._clear_window_cache()
+        self._net_change_tables = None
+
+    def _use_net_changes(self, table):
+        return (self._argv.netchanges and
+                self._net_change_tables is not None and
+                table.lower() in self._net_change_tables)
+
+    def _build_cdc_query(self, table, start_lsn, end_lsn):
+        #TODO consider further validations on start and end LSN numbers
+        selectsamplestr = const.EMPTY_STRING
+        if (self._argv.samplerows):
+            selectsamplestr = "TOP " + str(self._argv.samplerows)
+
+        if self._use_net_changes(table):
+            return self._build_net_changes_query(
+                table, start_lsn, end_lsn, selectsamplestr)
+
+        sqldef = " ".join([
+                     "SELECT {selectsample}"
+                     ,      "'DML'                                     AS operation_type"
+                     ,      ",__$operation                             AS operation_code"
+                     ,      ",'{tablename}'                            AS table_name"
+                     ,      ",sys.fn_cdc_map_lsn_to_time(__$start_lsn) AS commit_time"
+                     ,      ",CONVERT(VARCHAR(50), __$start_lsn, 2)    AS commit_lsn"
+                     ,      ",CONVERT(VARCHAR(50), __$start_lsn, 2) + '.' + CONVERT(VARCHAR(50), __$seqval, 2)  AS statement_id"
+                     ,      ",* "
+                     ,"FROM   cdc.fn_cdc_get_all_changes_{tablename} (CONVERT(VARBINARY(20),0x{startlsn}, 1), CONVERT(VARBINARY(20),0x{endlsn}, 1), N'all'); "])
+
+        return sqldef.format(selectsample=selectsamplestr, tablename=table, startlsn=start_lsn, endlsn=end_lsn)
+
+    def _build_net_changes_query(self, table, start_lsn, end_lsn,
+                                 selectsamplestr):
+        """Builds a query returning one row per changed row: a delete
+        (__$operation 1) or, with 'all with merge', an insert or update
+        merged into a single upsert (__$operation 5). Net changes carry no
+        __$seqval, so the statement_id is the row's last change LSN"""
+        sqldef = " ".join([
+                     "SELECT {selectsample}"
+                     ,      "'DML'                                     AS operation_type"
+                     ,      ",__$operation                             AS operation_code"
+                     ,      ",'{tablename}'                            AS table_name"
+                     ,      ",sys.fn_cdc_map_lsn_to_time(__$start_lsn) AS commit_time"
+                     ,      ",CONVERT(VARCHAR(50), __$start_lsn, 2)    AS commit_lsn"
+                     ,      ",CONVERT(VARCHAR(50), __$start_lsn, 2)    AS statement_id"
+                     ,      ",* "
+                     ,"FROM   cdc.fn_cdc_get_net_changes_{tablename} (CONVERT(VARBINARY(20),0x{startlsn}, 1), CONVERT(VARBINARY(20),0x{endlsn}, 1), N'all with merge') "
+                     ,"ORDER BY __$start_lsn; "])
+
+        return sqldef.format(selectsample=selectsamplestr, tablename=table, startlsn=start_lsn, endlsn=end_lsn)
+
+    def _write_table_batch(self, table, query_results, record_count=0):
+        """Writes a table's CDCs framed by their own START/END_OF_BATCH. The
+        START_OF_BATCH record_count is 0 unless the rows were fetched up
+        front, as the exact count is sent with END_OF_BATCH"""
+        # get the column names once per table
+        self._column_start_index = get_column_start_index(
+            query_results.get_col_names())
+        self.column_names = self.get_column_names(query_results)
+
+        self._init_batch_id()
+        self._write_sob_message(record_count)
+        decoder = self._build_row_decoder(query_results)
+
+        count = 0
+        for rec in query_results:
+            count += 1
+            row = to_field_strings(rec)
+
+            if (self._argv.rawfile):
+                self.write_to_rawfile(const.FIELD_DELIMITER.join(row))
+
+            self.write(self._build_record_message(decoder, row))
+
+        self._records_written_to_stream += count
+
+        # construct an end of batch record and write it to kafka topic
+        self._write_table_eob_message(table, count)
+
+    def _write_table_eob_message(self, table, count):
+        eob_message = self._build_message(const.END_OF_BATCH, count, self._end_lsn)
+        self.write(eob_message.serialise())
+        self._sob_message_written = False
+
+        self._pcd = self._audit_factory.build_process_control_detail(self._pc)
+        self._pcd.delta_startlsn = self._start_lsn
+        self._pcd.delta_endlsn = self._end_lsn
+        self._insert_pcd(table, count)
+
+    def _build_row_decoder(self, query_results):
+        """Resolves the column positions of the query results once per
+        table, rather than for every row written"""
         self._reset_message()
+        self._message.message_sequence = ""
+        self._message.column_names = str(self.column_names)
 
-        self._message.operation_code     = str(row[query_results.get_col_index('operation_code')])
-        self._message.operation_type     = str(row[query_results.get_col_index('operation_type')])
-        self._message.table_name         = str(row[query_results.get_col_index('table_name')])
-        self._message.statement_id       = str(row[query_results.get_col_index('statement_id')])
-        self._message.commit_lsn         = str(row[query_results.get_col_index('commit_lsn')])
-        self._message.commit_timestamp   = str(row[query_results.get_col_index('commit_time')])
-        self._message.message_sequence   = ""
-        self._message.column_names       = str(self.column_names)
-        self._message.column_values      = const.FIELD_DELIMITER.join(str(val).decode(self._argv.clientencoding) for val in row[COL_NAME_START_INDEX:])
-        self._message.primary_key_fields = str(self._keyfieldslist.setdefault(row[query_results.get_col_index('table_name')]))
+        return RowDecoder(query_results, RECORD_FIELD_COLUMNS,
+                          defaults=self._message.serialise())
 
-        return self._message.serialise()
+    def _build_record_message(self, decoder, row):
+        message = decoder.decode(row)
+        message['column_values'] = const.FIELD_DELIMITER.join(val.decode(self._argv.clientencoding) for val in row[self._column_start_index:])
+        message['primary_key_fields'] = str(self._keyfieldslist.setdefault(message['table_name']))
+
+        return message
 
     
     def get_column_names(self, query_results):
-        # Column names of the table starts at field 8 of query_results
-        return const.FIELD_DELIMITER.join(query_results.get_col_names()[COL_NAME_START_INDEX:])
+        # Column names of the table follow the CDC metadata columns
+        return const.FIELD_DELIMITER.join(query_results.get_col_names()[self._column_start_index:])
 
 
     def get_column_values(self, row):
-        # Column values of the table starts at field 8 of query_results
-        return const.FIELD_DELIMITER.join(map(lambda x: '"{}"'.format(x), str(row[COL_NAME_START_INDEX:]).decode(self._argv.clientencoding)))
+        # Column values of the table follow the CDC metadata columns
+        return const.FIELD_DELIMITER.join(map(lambda x: '"{}"'.format(x), str(row[self._column_start_index:]).decode(self._argv.clientencoding)))
 
 
     def build_keycolumnlist(self, schemas, tables):
@@ -24,15 +24,38 @@
 #
 ###############################################################################
 
+import os
+
 import data_pipeline.constants.const as const
 
 from .cdc_extractor import CdcExtractor
 from .exceptions import InvalidArgumentsError
+from .parallel_logminer import (mine_scn_range,
+                                mining_start_scns,
+                                remove_spoolfile,
+                                split_scn_range,
+                                SpooledQueryResults)
+from data_pipeline.db.db_query_results import RowDecoder
 from data_pipeline.stream.oracle_message import OracleMessage
 
 
 STOP_LOGMINER_COMMAND = "DBMS_LOGMNR.END_LOGMNR"
 
+# Waiting on the mining processes with a timeout, rather than without,
+# lets the extractor handle signals while they mine
+MINING_WAIT_SECONDS = 7 * 24 * 60 * 60
+
+# (message field, LogMiner contents query column) pairs
+RECORD_FIELD_COLUMNS = [
+    ('operation_code', const.OPERATION_FIELD),
+    ('table_name', const.TABLE_NAME_FIELD),
+    ('commit_statement', const.SQLREDOSTMT_FIELD),
+    ('statement_id', const.STATEMENT_ID_FIELD),
+    ('commit_lsn', const.CSCN_FIELD),
+    ('commit_timestamp', const.SOURCE_TIMESTAMP_FIELD),
+    ('multiline_flag', const.CSF_FLAG_FIELD),
+]
+
 
 def build_where_in_list_filter(fieldname, values, negate=False):
     if not values:
@@ -49,16 +72,33 @@ def build_where_in_list_filter(fieldname, values, negate=False):
 
 class OracleCdcExtractor(CdcExtractor):
 
-    def __init__(self, db, argv, audit_factory):
+    def __init__(self, db, argv, audit_factory, mining_pool=None):
+        """
+        :param multiprocessing.Pool mining_pool: The processes SCN
+            sub-ranges are mined in, as built by build_mining_pool. If None,
+            SCN ranges are mined serially
+        """
         super(OracleCdcExtractor, self).__init__(db, argv, audit_factory)
+        self._mining_pool = mining_pool
         self._message = OracleMessage()
+        self._session_initialised = False
+        self._dictionary_logs = None
+        self._dictionary_lookup_scn = None
+        self._newest_dictionary_scn = None
 
     def get_source_minmax_cdc_point(self, last_run_max_scn):
+        # Also picks out dictionaries built since the last run, so a cached
+        # dictionary lookup is only repeated once a newer one exists
         query = """
-    SELECT MIN(log.firstchange) minscn, MAX(log.nextchange) maxscn
+    SELECT MIN(log.firstchange) minscn, MAX(log.nextchange) maxscn,
+           MAX(log.dictchange) dictscn
     FROM (
        SELECT NVL(first_change#, 0) firstchange,
-              NVL(next_change#, 0) nextchange
+              NVL(next_change#, 0) nextchange,
+              CASE WHEN dictionary_begin = 'YES'
+                    AND dictionary_end   = 'YES'
+                   THEN first_change#
+              END dictchange
        FROM v$archived_log
        WHERE 1 = 1
        AND   dest_id = 1 -- Prevent duplicate redo statements
@@ -80,6 +120,10 @@ class OracleCdcExtractor(CdcExtractor):
         for record in query_results:
             min_scn = record[query_results.get_col_index('MINSCN')]
             max_scn = record[query_results.get_col_index('MAXSCN')]
+            dictionary_scn = record[query_results.get_col_index('DICTSCN')]
+            if dictionary_scn is not None:
+                self._newest_dictionary_scn = max(self._newest_dictionary_scn,
+                                                  long(dictionary_scn))
 
         return (max(min_scn, last_run_max_scn), max_scn)
 
@@ -96,43 +140,175 @@ class OracleCdcExtractor(CdcExtractor):
                     "Invalid state: Start CDC point {} > End {}"
                     .format(start_scn, end_scn))
             else:
-                self._source_db.execute(
-                    const.ALTER_NLS_DATE_FORMAT_COMMAND)
-                self._source_db.execute(
-                    const.ALTER_NLS_TIMESTAMP_FORMAT_COMMAND)
-
-                start_logminer = self._build_logminer_start_command(
-                    start_scn, end_scn, self._argv.sourcedictionary)
-                self._source_db.execute_stored_proc(start_logminer)
-
-                query_logminer = self._build_logminer_contents_query()
-                query_results = self._source_db.execute_query(
-                    query_logminer, self._argv.arraysize)
-
-                self._init_batch_id()
-
-                # No peek() function exposed by cursor API, so need to pick
-                # off the first record to get the record count then process it
-                row = query_results.fetchone()
-                if row:
-                    index = query_results.get_col_index(const.COUNT_FIELD)
-                    rowcount = row[index]
-                    self._write_sob_message(rowcount)
-                    self._write_record(query_results, row, rowcount)
-                    self._records_written_to_stream += 1
-
-                    for row in query_results:
-                        if self._sample_rows_reached():
-                            break
-
-                        self._write_record(query_results, row, rowcount)
-                        self._records_written_to_stream += 1
-
-                self._source_db.execute_stored_proc(STOP_LOGMINER_COMMAND)
+                mining_ranges = self._get_mining_ranges(start_scn, end_scn)
+                if len(mining_ranges) > 1:
+                    self._poll_cdcs_in_parallel(mining_ranges)
+                else:
+                    self._poll_cdcs_serially(start_scn, end_scn)
         else:
             self._logger.error("No start/end scns were computed.")
 
+    def _poll_cdcs_serially(self, start_scn, end_scn):
+        # NLS settings are session scoped, so only need setting
+        # once per connection when running in streaming mode
+        if not self._session_initialised:
+            self._source_db.execute(
+                const.ALTER_NLS_DATE_FORMAT_COMMAND)
+            self._source_db.execute(
+                const.ALTER_NLS_TIMESTAMP_FORMAT_COMMAND)
+            self._session_initialised = True
+
+        start_logminer = self._build_logminer_start_command(
+            start_scn, end_scn, self._argv.sourcedictionary)
+        self._source_db.execute_stored_proc(start_logminer)
+
+        query_logminer = self._build_logminer_contents_query()
+        query_results = self._source_db.execute_query(
+            query_logminer, self._argv.arraysize)
+
+        self._init_batch_id()
+
+        # No peek() function exposed by cursor API, so need to pick
+        # off the first record to get the record count then process it
+        row = query_results.fetchone()
+        if row:
+            # With a deferred count, only END_OF_BATCH carries the count
+            rowcount = 0
+            if not self._argv.deferrecordcount:
+                index = query_results.get_col_index(const.COUNT_FIELD)
+                rowcount = row[index]
+            self._write_sob_message(rowcount)
+            self._write_records(query_results, row, rowcount)
+
+        self._source_db.execute_stored_proc(STOP_LOGMINER_COMMAND)
+
+    def _write_records(self, query_results, first_row, rowcount):
+        decoder = self._build_row_decoder(query_results, rowcount)
+        if first_row:
+            self._write_record(decoder, first_row)
+            self._records_written_to_stream += 1
+
+        for row in query_results:
+            if self._sample_rows_reached():
+                break
+
+            self._write_record(decoder, row)
+            self._records_written_to_stream += 1
+
+    def _get_mining_ranges(self, start_scn, end_scn):
+        """
+        :return: list of (mine from SCN, start SCN, end SCN) tuples, one per
+            LogMiner session, each mining the transactions committed from
+            its start to end SCN
+        """
+        if self._mining_pool is None or self._argv.miningprocesses <= 1:
+            return [(start_scn, start_scn, end_scn)]
+
+        log_boundaries = self._get_archived_log_boundaries(start_scn, end_scn)
+        scn_ranges = split_scn_range(start_scn, end_scn, log_boundaries,
+                                     self._argv.miningprocesses)
+        start_scns = mining_start_scns(scn_ranges, log_boundaries,
+                                       self._argv.miningoverlaplogs)
+        return [(mine_from_scn, range_start, range_end)
+                for (mine_from_scn, (range_start, range_end))
+                in zip(start_scns, scn_ranges)]
+
+    def _poll_cdcs_in_parallel(self, mining_ranges):
+        """Mines each SCN sub-range in its own LogMiner session and process.
+        The batch is only written once all sub-ranges are mined, as the SOB
+        carries the total record count"""
+        self._logger.info("Mining {n} SCN ranges in parallel: {ranges}"
+                          .format(n=len(mining_ranges), ranges=mining_ranges))
+
+        # The dictionary must predate the whole range, not each sub-range
+        start_scn = mining_ranges[0][0]
+        dictionary_procs, options = self._get_logminer_dictionary(
+            start_scn, self._argv.sourcedictionary)
+        contents_query = self._build_logminer_contents_query()
+
+        jobs = [self._build_mining_job(mine_from_scn, range_start, range_end,
+                                       dictionary_procs, options,
+                                       contents_query)
+                for (mine_from_scn, range_start, range_end) in mining_ranges]
+
+        results = [self._mining_pool.apply_async(mine_scn_range, (job,))
+                   for job in jobs]
+        try:
+            mined_ranges = [result.get(MINING_WAIT_SECONDS)
+                            for result in results]
+        except Exception:
+            # Lets the other sessions finish first, so none writes its spool
+            # file after it is removed
+            for result in results:
+                result.wait(MINING_WAIT_SECONDS)
+            for job in jobs:
+                remove_spoolfile(job['spoolfile'])
+            raise
+
+        self._init_batch_id()
+        rowcount = sum(count for (count, col_names, spoolfile)
+                       in mined_ranges)
+        try:
+            if rowcount:
+                self._write_sob_message(rowcount)
+                # Sub-ranges are in SCN order, so are read back in order
+                for (count, col_names, spoolfile) in mined_ranges:
+                    query_results = SpooledQueryResults(col_names, spoolfile)
+                    try:
+                        self._write_records(query_results, None, rowcount)
+                    finally:
+                        query_results.close()
+        finally:
+            for (count, col_names, spoolfile) in mined_ranges:
+                remove_spoolfile(spoolfile)
+
+    def _build_mining_job(self, mine_from_scn, start_scn, end_scn,
+                          dictionary_procs, options, contents_query):
+        """Builds the job mining transactions committed from start_scn to
+        end_scn, in a session mining from mine_from_scn
+        """
+        spoolfile = os.path.join(
+            self._argv.workdirectory,
+            "logminer_{start}_{end}.spool".format(start=start_scn,
+                                                  end=end_scn))
+        commit_scn_filter = ("AND cscn BETWEEN {start} AND {end}"
+                             .format(start=start_scn, end=end_scn))
+        return {
+            'sourceuser': self._argv.sourceuser,
+            'arraysize': self._argv.arraysize,
+            'session_commands': [const.ALTER_NLS_DATE_FORMAT_COMMAND,
+                                 const.ALTER_NLS_TIMESTAMP_FORMAT_COMMAND],
+            'start_procs': dictionary_procs + [
+                self._format_logminer_start_command(
+                    mine_from_scn, end_scn, options)],
+            'contents_query': "{query}  {filter}\n".format(
+                query=contents_query, filter=commit_scn_filter),
+            'stop_proc': STOP_LOGMINER_COMMAND,
+            'spoolfile': spoolfile,
+        }
+
+    def _get_archived_log_boundaries(self, start_scn, end_scn):
+        query = """
+    SELECT DISTINCT first_change#
+    FROM v$archived_log
+    WHERE dest_id = 1 -- Prevent duplicate redo statements
+    AND   first_change# > {start_scn}
+    AND   first_change# <= {end_scn}
+    ORDER BY first_change#""".format(start_scn=start_scn, end_scn=end_scn)
+
+        query_results = self._source_db.execute_query(query,
+                                                      self._argv.arraysize)
+        return [long(record[0]) for record in query_results]
+
     def _build_logminer_contents_query(self):
+        # The window count forces Oracle to materialise the entire result
+        # before returning the first row
+        count_column = const.EMPTY_STRING
+        if not self._argv.deferrecordcount:
+            count_column = (", COUNT(*) OVER()                                "
+                            "      AS {count_name}"
+                            .format(count_name=const.COUNT_FIELD))
+
         base_query = """SELECT
           RTRIM(LTRIM(operation))                              AS {op_name}
         , RTRIM(LTRIM(rs_id))||'-'||ssn                        AS {sid_name}
@@ -142,7 +318,7 @@ class OracleCdcExtractor(CdcExtractor):
         , TO_CHAR(csf)                                         AS {csf_name}
         , REPLACE(REPLACE(sql_redo, chr(13), ''), chr(10), '') AS {redo_name}
         , {segowner}
-        , COUNT(*) OVER()                                      AS {count_name}
+        {count_column}
         FROM v$logmnr_contents
         """.format(
             op_name=const.OPERATION_FIELD,
@@ -153,7 +329,7 @@ class OracleCdcExtractor(CdcExtractor):
             csf_name=const.CSF_FLAG_FIELD,
             redo_name=const.SQLREDOSTMT_FIELD,
             segowner=const.SEG_OWNER_FIELD,
-            count_name=const.COUNT_FIELD)
+            count_column=count_column)
 
         extract_new_tables_sql = self._build_extract_new_tables_sql_predicate()
 
@@ -214,6 +390,20 @@ class OracleCdcExtractor(CdcExtractor):
     def _build_logminer_start_command(
             self, start_scn, end_scn, sourcedictionary):
 
+        dictionary_procs, options = self._get_logminer_dictionary(
+            start_scn, sourcedictionary)
+
+        for stored_proc in dictionary_procs:
+            self._source_db.execute_stored_proc(stored_proc)
+
+        return self._format_logminer_start_command(start_scn, end_scn,
+                                                   options)
+
+    def _get_logminer_dictionary(self, start_scn, sourcedictionary):
+        """
+        :return: tuple of (stored procs adding the dictionary logs to the
+            LogMiner session, LogMiner options list)
+        """
         base_options = [
             "DBMS_LOGMNR.COMMITTED_DATA_ONLY",
             "DBMS_LOGMNR.CONTINUOUS_MINE",
@@ -223,11 +413,21 @@ class OracleCdcExtractor(CdcExtractor):
         ]
 
         options = None
+        dictionary_procs = []
 
         if sourcedictionary == const.REDOLOG_DICT:
             self._logger.info("Searching for LogMiner dictionary archive logs")
-            # Find the latest dictionary files before the start_scn
-            dict_logs = self._get_last_dictionary_files(start_scn)
+            # Find the latest dictionary files before the start_scn. The
+            # lookup is reused across streaming windows until a newer
+            # dictionary is built before the window's start_scn. DDL between
+            # the dictionary and start_scn is not tracked, so a cached
+            # dictionary must be no older than a fresh lookup would find
+            if (not self._dictionary_logs or
+                    self._newer_dictionary_built(start_scn)):
+                self._dictionary_logs = self._get_last_dictionary_files(
+                    start_scn)
+                self._dictionary_lookup_scn = start_scn
+            dict_logs = self._dictionary_logs
 
             # If no dictionary was found, use online dict
             if not dict_logs:
@@ -239,7 +439,8 @@ class OracleCdcExtractor(CdcExtractor):
                 self._logger.info("Found dictionary logs: {logs}"
                                   .format(logs=dict_logs))
 
-                self._add_dictionary_archive_logs(dict_logs)
+                dictionary_procs = self._build_add_dictionary_logs_procs(
+                    dict_logs)
 
                 options = base_options + [
                     "DBMS_LOGMNR.DICT_FROM_REDO_LOGS",
@@ -249,6 +450,9 @@ class OracleCdcExtractor(CdcExtractor):
         if sourcedictionary == const.ONLINE_DICT:
             options = base_options + ["DBMS_LOGMNR.DICT_FROM_ONLINE_CATALOG"]
 
+        return (dictionary_procs, options)
+
+    def _format_logminer_start_command(self, start_scn, end_scn, options):
         logminer_options = " + ".join(options)
 
         return """
@@ -260,6 +464,20 @@ class OracleCdcExtractor(CdcExtractor):
                     end_scn=end_scn,
                     options=logminer_options)
 
+    def _newer_dictionary_built(self, start_scn):
+        """Returns True if a dictionary was built after the cached lookup
+        was made and before start_scn, so would be found by a new lookup
+        """
+        return (self._newest_dictionary_scn is not None and
+                self._dictionary_lookup_scn <= self._newest_dictionary_scn <
+                start_scn)
+
+    def _clear_window_cache(self):
+        super(OracleCdcExtractor, self)._clear_window_cache()
+        self._session_initialised = False
+        self._dictionary_logs = None
+        self._dictionary_lookup_scn = None
+
     def _get_last_dictionary_files(self, start_next_extract_scn):
         sql = """
         SELECT name
@@ -280,26 +498,27 @@ class OracleCdcExtractor(CdcExtractor):
 
         return [item for item in map(lambda r: r[0], query_results) if item]
 
-    def _add_dictionary_archive_logs(self, dict_logs):
+    def _build_add_dictionary_logs_procs(self, dict_logs):
         logfilename_param = "LOGFILENAME => '{dict_log}'"
         new_dict_log_param = "OPTIONS => DBMS_LOGMNR.NEW"
         params = [logfilename_param, new_dict_log_param]
         new_dict_log_declared = False
+        procs = []
         for dict_log in dict_logs:
             params_str = ", ".join(params).format(dict_log=dict_log)
-            add_logfile_sql = ("DBMS_LOGMNR.ADD_LOGFILE({params})"
-                               .format(params=params_str))
+            procs.append("DBMS_LOGMNR.ADD_LOGFILE({params})"
+                         .format(params=params_str))
 
-            self._source_db.execute_stored_proc(add_logfile_sql)
             if not new_dict_log_declared:
                 params.pop()
                 new_dict_log_declared = True
+        return procs
 
     def _sample_rows_reached(self):
         return (self._argv.samplerows and
                 self._records_written_to_stream == self._argv.samplerows)
 
-    def _write_record(self, query_results, row, rowcount):
+    def _write_record(self, decoder, row):
         if (self._argv.rawfile):
             decoded_values = [
                 str(val).decode(self._argv.clientencoding)
@@ -308,45 +527,29 @@ class OracleCdcExtractor(CdcExtractor):
             tmpbuf = const.FIELD_DELIMITER.join(decoded_values)
             self.write_to_rawfile(tmpbuf)
 
-        self.write(self._build_record_message(query_results, row,
-                   rowcount))
+        self.write(self._build_record_message(decoder, row))
 
-    def _build_record_message(self, query_results, row, rowcount):
+    def _build_row_decoder(self, query_results, rowcount):
+        """Resolves the column positions of the query results once, rather
+        than for every row written"""
         self._reset_message()
-
         self._message.record_type = const.DATA
-
         self._message.record_count = rowcount
 
-        self._message.operation_code = self._sanitise_value(
-            row[query_results.get_col_index(const.OPERATION_FIELD)])
-
-        self._message.table_name = self._sanitise_value(
-            row[query_results.get_col_index(const.TABLE_NAME_FIELD)])
-
-        self._message.commit_statement = self._sanitise_value(
-            row[query_results.get_col_index(const.SQLREDOSTMT_FIELD)])
-
-        self._message.statement_id = self._sanitise_value(
-            row[query_results.get_col_index(const.STATEMENT_ID_FIELD)])
-
-        self._message.commit_lsn = self._sanitise_value(
-            row[query_results.get_col_index(const.CSCN_FIELD)])
-
-        self._message.commit_timestamp = self._sanitise_value(
-            row[query_results.get_col_index(const.SOURCE_TIMESTAMP_FIELD)])
-
-        self._message.message_sequence = str(self._records_written_to_stream)
-
-        self._message.multiline_flag = self._sanitise_value(
-            row[query_results.get_col_index(const.CSF_FLAG_FIELD)])
-
-        self._message.primary_key_fields = self._sanitise_value(
-            self._keyfieldslist.setdefault(
-                row[query_results.get_col_index(const.TABLE_NAME_FIELD)],
-                const.NO_KEYFIELD_STR))
-
-        return self._message.serialise()
+        return RowDecoder(query_results, RECORD_FIELD_COLUMNS,
+                          defaults=self._message.serialise(),
+                          null_value=const.EMPTY_STRING)
+
+    def _build_record_message(self, decoder, row):
+        message = decoder.decode(row)
+        message['message_sequence'] = str(self._records_written_to_stream)
+        if (message['operation_code'] == const.DDL and
+                self._keycolumns_profile is not None):
+            self._invalidate_key_columns()
+        message['primary_key_fields'] = self._sanitise_value(
+            self._keyfieldslist.setdefault(message['table_name'],
+                                           const.NO_KEYFIELD_STR))
+        return message
 
     def _sanitise_value(self, value):
         """To prevent any None types from being written to kafka"""
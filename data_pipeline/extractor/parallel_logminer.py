@@ -0,0 +1,207 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    parallel_logminer
+# Purpose:   Mines an SCN range with several LogMiner sessions, each in its
+#            own process and mining a contiguous sub-range of archived logs
+#
+# Notes:     Sub-ranges are split on archived log boundaries and do not
+#            overlap. Each session starts mining a number of archived logs
+#            before its sub-range, so sees the start of transactions
+#            committed in its sub-range but started up to that many logs
+#            earlier, and only returns those whose commit SCN is in its
+#            sub-range. So such a transaction spanning a split is returned
+#            whole, and once. As LogMiner returns committed data in commit
+#            order, reading the sub-ranges back in SCN order keeps the batch
+#            in commit SCN order.
+#
+#            The pool of mining processes is created before the extractor
+#            starts any thread, so no process inherits a lock held by one.
+#
+###############################################################################
+
+import cPickle
+import multiprocessing
+import os
+import signal
+
+import data_pipeline.constants.const as const
+import data_pipeline.db.factory as dbfactory
+import data_pipeline.utils.dbuser as dbuser
+
+from data_pipeline.db.query_results import QueryResults
+
+
+def split_scn_range(start_scn, end_scn, log_boundaries, ranges):
+    """Splits start_scn..end_scn into at most 'ranges' contiguous,
+    non-overlapping sub-ranges, each starting on an archived log boundary
+    :param long start_scn: First SCN of the range
+    :param long end_scn: Last SCN of the range
+    :param list log_boundaries: first_change# of the archived logs
+        within the range
+    :param int ranges: Maximum number of sub-ranges to split into
+    :return: list of (start_scn, end_scn) tuples in SCN order
+    """
+    boundaries = sorted(set(b for b in log_boundaries
+                            if start_scn < b <= end_scn))
+    ranges = min(ranges, len(boundaries) + 1)
+    if ranges <= 1:
+        return [(start_scn, end_scn)]
+
+    # Spread the logs evenly across the sub-ranges
+    step = float(len(boundaries) + 1) / ranges
+    split_points = [boundaries[int(round(i * step)) - 1]
+                    for i in range(1, ranges)]
+
+    scn_ranges = []
+    range_start = start_scn
+    for split_point in sorted(set(split_points)):
+        scn_ranges.append((range_start, split_point - 1))
+        range_start = split_point
+    scn_ranges.append((range_start, end_scn))
+    return scn_ranges
+
+
+def mining_start_scns(scn_ranges, log_boundaries, overlap_logs):
+    """Returns the SCN the session of each sub-range starts mining from,
+    being overlap_logs archived logs before the sub-range, but never before
+    the first sub-range
+    :param list scn_ranges: (start_scn, end_scn) tuples, as returned by
+        split_scn_range
+    :param list log_boundaries: first_change# of the archived logs
+        within the range
+    :param int overlap_logs: Number of archived logs before its sub-range
+        each session mines
+    :return: list of SCNs, one per sub-range
+    """
+    start_scn = scn_ranges[0][0]
+    boundaries = sorted(set(b for b in log_boundaries if start_scn < b))
+
+    start_scns = [start_scn]
+    for (range_start, range_end) in scn_ranges[1:]:
+        # Sub-ranges after the first start on a log boundary
+        index = boundaries.index(range_start) - overlap_logs
+        start_scns.append(boundaries[index] if index >= 0 else start_scn)
+    return start_scns
+
+
+def build_mining_pool(processes):
+    """Starts the processes sub-ranges are mined in. Must be called before
+    any thread is started
+    :param int processes: Number of mining processes
+    """
+    return multiprocessing.Pool(processes, initializer=init_mining_process)
+
+
+def init_mining_process():
+    """Initialises a mining process. Processes inherit the extractor's
+    handlers, which audit and exit the application, so only the extractor
+    handles signals, terminating the mining processes on exit
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+
+
+def mine_scn_range(job):
+    """Mines a single SCN sub-range in its own source session, spooling the
+    mined rows to file for the parent process to read back in order
+    :param dict job: The connection, commands and spool file for the
+        sub-range, as built by OracleCdcExtractor
+    :return: tuple of (row count, column names, spool file name)
+    """
+    db = dbfactory.build(const.ORACLE)
+    db.connect(dbuser.get_dbuser_properties(job['sourceuser']))
+    try:
+        for command in job['session_commands']:
+            db.execute(command)
+
+        for stored_proc in job['start_procs']:
+            db.execute_stored_proc(stored_proc)
+
+        query_results = db.execute_query(job['contents_query'],
+                                         job['arraysize'])
+        col_names = query_results.get_col_names()
+
+        count = 0
+        with open(job['spoolfile'], 'wb') as spool:
+            for row in query_results:
+                cPickle.dump(tuple(row), spool, cPickle.HIGHEST_PROTOCOL)
+                count += 1
+
+        db.execute_stored_proc(job['stop_proc'])
+    finally:
+        db.close()
+
+    return (count, col_names, job['spoolfile'])
+
+
+class SpooledQueryResults(QueryResults):
+    """Reads back the rows spooled by mine_scn_range"""
+
+    def __init__(self, col_names, spoolfile):
+        super(SpooledQueryResults, self).__init__()
+        self._col_map = dict((name, i) for i, name in enumerate(col_names))
+        self._col_names = col_names
+        self._handle = open(spoolfile, 'rb')
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if self._handle.closed:
+            raise StopIteration
+        try:
+            return list(cPickle.load(self._handle))
+        except EOFError:
+            self.close()
+            raise StopIteration
+
+    def fetchone(self):
+        record = None
+        try:
+            record = self.next()
+        except StopIteration, e:
+            pass
+        return record
+
+    def fetchall(self):
+        return [record for record in self]
+
+    def fetchmany(self, arraysize=None):
+        records = []
+        for record in self:
+            records.append(record)
+            if arraysize and len(records) == arraysize:
+                break
+        return records
+
+    def get_col_index(self, col):
+        return self._col_map[col]
+
+    def get_col_names(self):
+        return self._col_names
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+
+def remove_spoolfile(spoolfile):
+    if os.path.exists(spoolfile):
+        os.remove(spoolfile)
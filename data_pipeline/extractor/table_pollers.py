@@ -0,0 +1,142 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    table_pollers
+# Purpose:   Polls the CDCs of a number of tables concurrently, each poller
+#            querying tables over its own source connection
+#
+# Notes:     Threads are used as pollers spend most of their time waiting
+#            on the source db. Fetched tables are handed back in the order
+#            they complete; a bounded queue stops pollers running further
+#            ahead of the stream than one table each.
+#
+###############################################################################
+
+import logging
+import threading
+import Queue
+
+from data_pipeline.db.query_results import QueryResults
+
+
+class FetchedQueryResults(QueryResults):
+    """The rows of a query, fetched in full by a poller"""
+
+    def __init__(self, col_names, rows):
+        super(FetchedQueryResults, self).__init__()
+        self._col_map = dict((name, i) for i, name in enumerate(col_names))
+        self._col_names = col_names
+        self._rows = iter(rows)
+        self.rowcount = len(rows)
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return next(self._rows)
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def fetchmany(self, arraysize=None):
+        records = []
+        for record in self._rows:
+            records.append(record)
+            if arraysize and len(records) == arraysize:
+                break
+        return records
+
+    def get_col_index(self, col):
+        return self._col_map[col]
+
+    def get_col_names(self):
+        return self._col_names
+
+
+class TablePoller(threading.Thread):
+    def __init__(self, poller_id, connect, fetch, tables, results, stopped):
+        super(TablePoller, self).__init__(
+            name="TablePoller-{id}".format(id=poller_id))
+        self.daemon = True
+        self._connect = connect
+        self._fetch = fetch
+        self._tables = tables
+        self._results = results
+        self._stopped = stopped
+        self._logger = logging.getLogger(__name__)
+
+    def run(self):
+        db = None
+        table = None
+        try:
+            db = self._connect()
+            while not self._stopped.is_set():
+                try:
+                    table = self._tables.get_nowait()
+                except Queue.Empty:
+                    return
+
+                self._results.put((table, self._fetch(db, table), None))
+        except Exception, e:
+            self._logger.exception("{name} failed polling {table}: {err}"
+                                   .format(name=self.name, table=table,
+                                           err=str(e)))
+            self._results.put((table, None, e))
+        finally:
+            if db is not None:
+                db.close()
+
+
+def poll_tables(tables, connect, fetch, max_pollers):
+    """Polls the given tables with up to max_pollers concurrent pollers
+    :param list tables: Names of the tables to poll
+    :param function connect: Returns a new connected source db
+    :param function fetch: Given a db and table, returns the table's CDCs
+    :param int max_pollers: Maximum number of concurrent source connections
+    :return: A generator of (table, fetched CDCs) in order of completion.
+        Raises the first error encountered by a poller
+    """
+    pending = Queue.Queue()
+    for table in tables:
+        pending.put(table)
+
+    pollers_count = max(1, min(max_pollers, len(tables)))
+    results = Queue.Queue(maxsize=pollers_count)
+    stopped = threading.Event()
+    pollers = [TablePoller(i, connect, fetch, pending, results, stopped)
+               for i in range(pollers_count)]
+    for poller in pollers:
+        poller.start()
+
+    try:
+        for _ in tables:
+            (table, fetched, error) = results.get()
+            if error is not None:
+                raise error
+            yield (table, fetched)
+    finally:
+        stopped.set()
+        # Unblock any pollers waiting to hand back a fetched table
+        while any(poller.is_alive() for poller in pollers):
+            try:
+                results.get(timeout=0.1)
+            except Queue.Empty:
+                pass
@@ -31,6 +31,7 @@ import data_pipeline.utils.filesystem as filesystem_utils
 
 
 logfiles = {}
+file_handler_basenames = {}
 
 
 def setup_logging(
@@ -67,6 +68,7 @@ def setup_logging(
                         filename = os.path.join(workdirectory, joined_basename)
                         filesystem_utils.ensure_path_exists(filename)
                         v[const.FILENAME] = filename
+                        file_handler_basenames[k] = joined_basename
                         if k in const.CACHED_HANDLERS:
                             logfiles[k] = filename
 
@@ -78,5 +80,45 @@ def setup_logging(
         logging.basicConfig(level=default_level)
 
 
+def _get_file_handlers():
+    loggers = [logging.getLogger()]
+    loggers.extend([l for l in logging.Logger.manager.loggerDict.values()
+                    if isinstance(l, logging.Logger)])
+
+    handlers = set()
+    for logger in loggers:
+        for handler in logger.handlers:
+            if (isinstance(handler, logging.FileHandler) and
+                    handler.get_name() in file_handler_basenames):
+                handlers.add(handler)
+
+    return handlers
+
+
+def rotate_logfiles(workdirectory):
+    """Reopens the log files of all file handlers configured by
+    setup_logging under the given workdirectory, without reloading the
+    logging configuration
+    """
+    for handler in _get_file_handlers():
+        name = handler.get_name()
+        filename = os.path.join(workdirectory, file_handler_basenames[name])
+        filesystem_utils.ensure_path_exists(filename)
+
+        handler.acquire()
+        try:
+            if handler.stream:
+                handler.flush()
+                handler.stream.close()
+                handler.stream = None
+            handler.baseFilename = os.path.abspath(filename)
+            handler.stream = handler._open()
+        finally:
+            handler.release()
+
+        if name in const.CACHED_HANDLERS:
+            logfiles[name] = filename
+
+
 def get_logfile(handler_name):
     return logfiles.get(handler_name, const.EMPTY_STRING)
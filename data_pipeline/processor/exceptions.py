@@ -30,6 +30,7 @@ class UnsupportedSqlError(Exception):
     """
 
     def __init__(self, message):
+        super(UnsupportedSqlError, self).__init__(message)
         self.message = message
 
     def __str__(self):
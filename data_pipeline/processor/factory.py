@@ -30,12 +30,13 @@ from data_pipeline.processor.oracle_cdc_processor import OracleCdcProcessor
 from data_pipeline.processor.mssql_cdc_processor import MssqlCdcProcessor
 
 
-def build(source_dbtype, metacols=None):
+def build(source_dbtype, metacols=None,
+          redoparser=const.STATE_MACHINE_PARSER, shapecachesize=0):
     """Return the specific type of CDC Processor object given the
     source_dbtype
     """
     if source_dbtype == const.ORACLE:
-        return OracleCdcProcessor(metacols)
+        return OracleCdcProcessor(metacols, redoparser, shapecachesize)
     elif source_dbtype == const.MSSQL:
         return MssqlCdcProcessor()
     else:
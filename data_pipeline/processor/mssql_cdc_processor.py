@@ -36,6 +36,7 @@ from .processor import Processor
 from data_pipeline.sql.insert_statement import InsertStatement
 from data_pipeline.sql.update_statement import UpdateStatement
 from data_pipeline.sql.delete_statement import DeleteStatement
+from data_pipeline.sql.upsert_statement import UpsertStatement
 
 INSERT_VALUES_DIALECT = 'insert_values'
 INSERT_FIELDS_DIALECT = 'insert_fields'
@@ -74,6 +75,18 @@ def _parse_update(table_name, column_names, column_values, key_field_string):
     return UpdateStatement(table_name, set_values, where_values)
 
 
+def _parse_upsert(table_name, column_names, column_values, key_field_string):
+    field_values = utils.build_field_value_list(column_names, column_values,
+                                                START_POSITION)
+
+    key_field_list = utils.build_key_field_list(key_field_string)
+    if not key_field_list:
+        raise ValueError("Cannot merge net change into {t}: no primary key "
+                         "fields defined".format(t=table_name))
+
+    return UpsertStatement(table_name, field_values, key_field_list)
+
+
 def _parse_delete(table_name, column_names, column_values, key_field_list):
     field_values = dict()
     field_values = utils.build_field_value_list(column_names, column_values,
@@ -115,5 +128,10 @@ class MssqlCdcProcessor(Processor):
             return _parse_delete(msg.table_name, msg.column_names,
                                  msg.column_values, msg.primary_key_fields)
 
+        elif operation == const.MSSQL_MERGE_ACTION:
+            self._logger.debug("Processing MERGE: {}".format(msg))
+            return _parse_upsert(msg.table_name, msg.column_names,
+                                 msg.column_values, msg.primary_key_fields)
+
         raise ValueError("Unsupported operation code: '{}'"
                          .format(msg.operation_code))
@@ -38,6 +38,7 @@ class OracleBaseParser(object):
         self._parsing_state = None
         self._char_buff = None
         self._read_cursor = None
+        self._primarykey_list = None
 
     def _set_logger(self):
         self._logger = logging.getLogger(__name__)
@@ -45,6 +46,21 @@ class OracleBaseParser(object):
     def renew_workdirectory(self):
         self._set_logger()
 
+    def _set_primary_keys_from_string(self, pkstr, table_name):
+        pkstr = pkstr.strip() if pkstr else const.EMPTY_STRING
+        if pkstr:
+            if pkstr == const.NO_KEYFIELD_STR:
+                self._primarykey_list = []
+            else:
+                self._primarykey_list = [pk.strip().upper()
+                                         for pk in pkstr.split(const.COMMA)]
+
+        self._logger.debug(
+            "[{table}] Set primary keys = {pks}"
+            .format(table=table_name, pks=self._primarykey_list))
+
+        return self._primarykey_list
+
     @abstractmethod
     def parse(self, table_name, commit_statement, primary_key_fields=None):
         pass
@@ -74,7 +90,7 @@ class OracleBaseParser(object):
 
     def _init(self, commit_statement=const.EMPTY_STRING, parsing_state=None,
               seek_to_string=const.EMPTY_STRING, statement=None):
-        self._char_buff = const.EMPTY_STRING
+        self._empty_buffer()
         self._commit_statement = commit_statement
         self._read_cursor = self._get_index_after_string(seek_to_string)
         self._parsing_state = parsing_state
@@ -85,15 +101,21 @@ class OracleBaseParser(object):
                 len(string))
 
     def _consume(self):
-        self._char_buff += self._curr_char
+        # Characters are joined once flushed, so consuming a large value
+        # is linear in its size rather than copying the buffer per char
+        self._char_buff.append(self._curr_char)
 
     def _flush_buffer(self):
-        buff_contents = self._char_buff
+        buff_contents = const.EMPTY_STRING.join(self._char_buff)
         self._empty_buffer()
         return buff_contents
 
     def _empty_buffer(self):
-        self._char_buff = const.EMPTY_STRING
+        self._char_buff = []
+
+    def _buffer_endswith(self, string):
+        return (const.EMPTY_STRING.join(self._char_buff[-len(string):]) ==
+                string)
 
     def _next(self):
         self._read_cursor += 1
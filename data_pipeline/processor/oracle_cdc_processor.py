@@ -31,19 +31,44 @@ from .oracle_update_parser import OracleUpdateParser
 from .oracle_delete_parser import OracleDeleteParser
 from .oracle_alter_parser import OracleAlterParser
 from .oracle_create_parser import OracleCreateParser
+from .statement_shape_cache import StatementShapeCache
+from .oracle_redo_tokenizer import (OracleTokenizedInsertParser,
+                                    OracleTokenizedUpdateParser,
+                                    OracleTokenizedDeleteParser)
 
 
 class OracleCdcProcessor(Processor):
 
-    def __init__(self, metacols):
+    def __init__(self, metacols, redoparser=const.STATE_MACHINE_PARSER,
+                 shapecachesize=0):
+        """
+        :param dict metacols: Metadata columns added to each statement
+        :param str redoparser: Engine parsing INSERT, UPDATE and DELETE redo
+        :param int shapecachesize: Max number of INSERT statement shapes
+            cached across tables. 0 to parse every INSERT in full
+        """
         super(OracleCdcProcessor, self).__init__()
+        self._shapes = None
+        if shapecachesize > 0:
+            self._shapes = StatementShapeCache(shapecachesize)
+
         self._parsers = {
             const.ALTER_TABLE: OracleAlterParser(),
             const.CREATE_TABLE: OracleCreateParser(),
-            const.INSERT: OracleInsertParser(metacols),
-            const.UPDATE: OracleUpdateParser(metacols),
-            const.DELETE: OracleDeleteParser(),
         }
+        if redoparser == const.TOKENIZER_PARSER:
+            self._parsers.update({
+                const.INSERT: OracleTokenizedInsertParser(metacols,
+                                                          self._shapes),
+                const.UPDATE: OracleTokenizedUpdateParser(metacols),
+                const.DELETE: OracleTokenizedDeleteParser(),
+            })
+        else:
+            self._parsers.update({
+                const.INSERT: OracleInsertParser(metacols, self._shapes),
+                const.UPDATE: OracleUpdateParser(metacols),
+                const.DELETE: OracleDeleteParser(),
+            })
         self._pcd = None
 
     def renew_workdirectory(self):
@@ -74,6 +99,10 @@ class OracleCdcProcessor(Processor):
         else:
             self._logger.debug("Processing msg...")
 
+        if (self._shapes is not None and
+                parser is self._parsers[const.ALTER_TABLE]):
+            self._shapes.invalidate(msg.table_name)
+
         statement = parser.parse(msg.table_name,
                                  msg.commit_statement,
                                  msg.primary_key_fields)
@@ -36,9 +36,16 @@ InsertState = Enum('InsertState',
 
 
 class OracleInsertParser(OracleBaseParser):
-    def __init__(self, metacols):
+    def __init__(self, metacols, shapes=None):
+        """
+        :param dict metacols: Metadata columns added to each statement
+        :param StatementShapeCache shapes: Caches the fields parsed per
+            table, so only the values are parsed for subsequent INSERTs
+        """
         super(OracleInsertParser, self).__init__()
         self._metacols = metacols
+        self._shapes = shapes
+        self._values_start = None
         self._in_function = False
         self._consuming_in_function = False
         self._field_values = None
@@ -64,8 +71,25 @@ class OracleInsertParser(OracleBaseParser):
         self._fields = []
         self._values = []
 
+        pk_list = self._set_primary_keys_from_string(
+            primary_key_fields,
+            table_name)
+
         self._init(commit_statement, InsertState.fieldskip, const.LEFT_BRACKET,
-                   InsertStatement(table_name, self._field_values))
+                   InsertStatement(table_name, self._field_values, pk_list))
+
+        field_list_start = self._read_cursor
+        self._values_start = None
+        (fingerprint, shape) = (None, None)
+        if self._shapes is not None:
+            (fingerprint, shape) = self._shapes.get_insert_shape(
+                table_name, commit_statement, field_list_start)
+
+        if shape is not None:
+            # Only the values are left to parse
+            self._fields = list(shape.fields)
+            self._read_cursor = field_list_start + shape.values_offset
+            self._parsing_state = InsertState.valueskip
 
         while self._read_cursor < len(self._commit_statement):
             if self._parsing_field_or_value():
@@ -74,11 +98,18 @@ class OracleInsertParser(OracleBaseParser):
             self._transition_insert_parsing_state()
             self._next()
 
+        parsed_fields = list(self._fields)
         self._add_metacols()
 
         for (field, value) in zip(self._fields, self._values):
             self._field_values[field] = value
 
+        if shape is None and fingerprint is not None:
+            shape = self._shapes.put_insert_shape(
+                table_name, fingerprint, parsed_fields,
+                self._values_start - field_list_start, self._fields)
+        self._statement.shape = shape
+
         return self._statement
 
     def _add_metacols(self):
@@ -135,6 +166,7 @@ class OracleInsertParser(OracleBaseParser):
     def _transition_from_interfieldvalue_parsing(self):
         if self._at_value_group_start():
             self._parsing_state = InsertState.valueskip
+            self._values_start = self._read_cursor + 1
 
     def _transition_from_values_parsing(self):
         if self._at_escaped_single_quote():
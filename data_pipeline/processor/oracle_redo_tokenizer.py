@@ -0,0 +1,325 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    oracle_redo_tokenizer
+# Purpose:   Parses LogMiner Insert, Update and Delete statements by jumping
+#            between token boundaries rather than stepping through each
+#            character of the redo
+#
+# Notes:     Produces the same statements as the character state machines of
+#            OracleInsertParser, OracleUpdateParser and OracleDeleteParser,
+#            quirks included: each skip state jumps to the next string that
+#            would change its state, via str.find or a compiled regex, and
+#            quoted values are sliced out whole.
+#
+###############################################################################
+
+import re
+
+import data_pipeline.constants.const as const
+from .oracle_base_parser import OracleBaseParser
+from data_pipeline.sql.insert_statement import InsertStatement
+from data_pipeline.sql.update_statement import UpdateStatement
+from data_pipeline.sql.delete_statement import DeleteStatement
+
+ESCAPED_SINGLE_QUOTE = const.SINGLE_QUOTE * 2
+
+# Strings that change the state of the parser between Insert field names
+FIELDS_RE = re.compile('[{quote}{end}]'.format(
+    quote=re.escape(const.DOUBLE_QUOTE),
+    end=re.escape(const.RIGHT_BRACKET)))
+
+# Strings that change the state of the parser between Insert values. The
+# special values are matched before the single characters, as they are in
+# OracleInsertParser
+INSERT_VALUES_RE = re.compile('|'.join(
+    [re.escape(s) for s in [const.NULL,
+                            const.ORACLE_EMPTY_CLOB,
+                            const.ORACLE_EMPTY_BLOB]] +
+    ['[{chars}]'.format(chars=re.escape(const.LEFT_BRACKET +
+                                        const.RIGHT_BRACKET +
+                                        const.SINGLE_QUOTE))]))
+
+SET_VALUE_RE = re.compile('|'.join(
+    [re.escape(s) for s in [const.ORACLE_SET_NULL,
+                            const.ORACLE_EMPTY_CLOB,
+                            const.SINGLE_QUOTE]]))
+
+WHERE_VALUE_RE = re.compile('|'.join(
+    [re.escape(s) for s in [const.IS_NULL, const.SINGLE_QUOTE]]))
+
+
+def read_quoted_value(statement, start):
+    """Reads the single-quoted value starting at a quote
+    :param str statement: The redo statement
+    :param int start: Position of the value's opening quote
+    :return: The unescaped value and the position of its closing quote
+    :rtype: tuple
+    """
+    end = statement.find(const.SINGLE_QUOTE, start + 1)
+    while end != -1 and statement.startswith(ESCAPED_SINGLE_QUOTE, end):
+        end = statement.find(const.SINGLE_QUOTE, end + 2)
+
+    if end == -1:
+        # Unterminated: the state machines consume to the end of the line
+        # without ever closing the value
+        return (None, len(statement))
+
+    value = statement[start + 1:end]
+    if const.SINGLE_QUOTE in value:
+        value = value.replace(ESCAPED_SINGLE_QUOTE, const.SINGLE_QUOTE)
+    return (value, end)
+
+
+def read_quoted_name(statement, start):
+    """Reads the double-quoted name starting at a quote
+    :return: The name and the position of its closing quote, or None and -1
+        if it is not closed
+    :rtype: tuple
+    """
+    end = statement.find(const.DOUBLE_QUOTE, start + 1)
+    if end == -1:
+        return (None, end)
+    return (statement[start + 1:end], end)
+
+
+class OracleTokenizedInsertParser(OracleBaseParser):
+    def __init__(self, metacols, shapes=None):
+        super(OracleTokenizedInsertParser, self).__init__()
+        self._metacols = metacols
+        self._shapes = shapes
+
+    def parse(self, table_name, commit_statement, primary_key_fields):
+        pk_list = self._set_primary_keys_from_string(primary_key_fields,
+                                                     table_name)
+        self._commit_statement = commit_statement
+        field_values = {}
+        statement = InsertStatement(table_name, field_values, pk_list)
+
+        field_list_start = self._get_index_after_string(const.LEFT_BRACKET)
+        (fingerprint, shape) = (None, None)
+        if self._shapes is not None:
+            (fingerprint, shape) = self._shapes.get_insert_shape(
+                table_name, commit_statement, field_list_start)
+
+        if shape is None:
+            (fields, pos) = self._parse_fields(commit_statement,
+                                               field_list_start)
+        else:
+            fields = list(shape.fields)
+            pos = field_list_start + shape.values_offset
+        values = self._parse_values(commit_statement, pos)
+
+        parsed_fields = list(fields)
+        self._add_metacols(fields, values)
+
+        for (field, value) in zip(fields, values):
+            field_values[field] = value
+
+        if shape is None and fingerprint is not None:
+            shape = self._shapes.put_insert_shape(
+                table_name, fingerprint, parsed_fields,
+                pos - field_list_start, fields)
+        statement.shape = shape
+
+        return statement
+
+    def _parse_fields(self, statement, pos):
+        fields = []
+        length = len(statement)
+        while pos < length:
+            match = FIELDS_RE.search(statement, pos)
+            if match is None:
+                return (fields, length)
+
+            if match.group() == const.RIGHT_BRACKET:
+                # The values follow the next left bracket
+                start = statement.find(const.LEFT_BRACKET, match.end())
+                return (fields, length if start == -1 else start + 1)
+
+            (field, end) = read_quoted_name(statement, match.start())
+            if field is None:
+                return (fields, length)
+            fields.append(field)
+            pos = end + 1
+
+        return (fields, pos)
+
+    def _parse_values(self, statement, pos):
+        values = []
+        in_function = False
+        consuming_in_function = False
+        length = len(statement)
+
+        while pos < length:
+            match = INSERT_VALUES_RE.search(statement, pos)
+            if match is None:
+                break
+
+            token = match.group()
+            if token == const.LEFT_BRACKET:
+                in_function = True
+                consuming_in_function = True
+                pos = match.end()
+
+            elif token == const.RIGHT_BRACKET:
+                in_function = False
+                pos = match.end()
+
+            elif token == const.SINGLE_QUOTE:
+                if in_function and not consuming_in_function:
+                    # Only the first value of a function is kept, e.g.:
+                    # TO_DATE('2017-06-06 15:36:24', 'YYYY-MM-DD HH24:MI:SS')
+                    pos = match.end()
+                    continue
+
+                (value, end) = read_quoted_value(statement, match.start())
+                if value is None:
+                    break
+                values.append(value)
+                consuming_in_function = False
+                pos = end + 1
+
+            else:
+                # NULL, EMPTY_CLOB() or EMPTY_BLOB(), and the character
+                # following it, which the state machine steps over
+                values.append(None)
+                pos = match.end() + 1
+
+        return values
+
+    def _add_metacols(self, fields, values):
+        if not self._metacols:
+            return
+
+        for metacolname in [const.METADATA_INSERT_TS_COL,
+                            const.METADATA_UPDATE_TS_COL]:
+            if metacolname in self._metacols:
+                fields.append(self._metacols[metacolname].upper())
+                values.append(const.METADATA_CURRENT_TIME_SQL)
+
+
+class OracleTokenizedWhereParser(OracleBaseParser):
+    def _parse_where(self, statement, pos):
+        """Adds the conditions of a where clause starting at pos to
+        self._statement"""
+        length = len(statement)
+        while pos < length:
+            start = statement.find(const.DOUBLE_QUOTE, pos)
+            if start == -1:
+                return
+
+            (key, end) = read_quoted_name(statement, start)
+            if key is None:
+                return
+
+            match = WHERE_VALUE_RE.search(statement, end + 1)
+            if match is None:
+                return
+
+            if match.group() == const.IS_NULL:
+                # Prefer using None over const.IS_NULL in case a
+                # key's value is actually 'IS NULL'
+                self._statement.add_condition(key, None)
+                pos = match.end() + 1
+            else:
+                (value, end) = read_quoted_value(statement, match.start())
+                if value is None:
+                    return
+                self._statement.add_condition(key, value)
+                pos = end + 1
+
+
+class OracleTokenizedUpdateParser(OracleTokenizedWhereParser):
+    def __init__(self, metacols):
+        super(OracleTokenizedUpdateParser, self).__init__()
+        self._metacols = metacols
+
+    def parse(self, table_name, commit_statement, primary_key_fields):
+        pk_list = self._set_primary_keys_from_string(primary_key_fields,
+                                                     table_name)
+        self._commit_statement = commit_statement
+        self._statement = UpdateStatement(table_name,
+                                          primary_key_list=pk_list)
+
+        if self._metacols and const.METADATA_UPDATE_TS_COL in self._metacols:
+            metafield = self._metacols[const.METADATA_UPDATE_TS_COL].upper()
+            self._statement.add_set_value(metafield,
+                                          const.METADATA_CURRENT_TIME_SQL)
+
+        pos = self._get_index_after_string(" {} ".format(const.SET))
+        pos = self._parse_set(commit_statement, pos)
+        if pos is not None:
+            self._parse_where(commit_statement, pos)
+
+        return self._statement
+
+    def _parse_set(self, statement, pos):
+        """Adds the set values starting at pos to self._statement
+        :return: The position following the where keyword, or None if
+            the statement ends first
+        """
+        length = len(statement)
+        where_start = statement.find(const.WHERE, pos)
+        while pos < length:
+            key_start = statement.find(const.DOUBLE_QUOTE, pos)
+            if where_start != -1 and where_start < pos:
+                # The where keyword found was part of a value
+                where_start = statement.find(const.WHERE, pos)
+            if where_start != -1 and (key_start == -1 or
+                                      where_start < key_start):
+                return where_start + len(const.WHERE)
+
+            if key_start == -1:
+                return None
+
+            (key, end) = read_quoted_name(statement, key_start)
+            if key is None:
+                return None
+
+            # The character following the key's closing quote is skipped
+            match = SET_VALUE_RE.search(statement, end + 2)
+            if match is None:
+                return None
+
+            if match.group() == const.SINGLE_QUOTE:
+                (value, end) = read_quoted_value(statement, match.start())
+                if value is None:
+                    return None
+                self._statement.add_set_value(key, value)
+                pos = end + 1
+            else:
+                # = NULL or EMPTY_CLOB(), and the character following it
+                self._statement.add_set_value(key, None)
+                pos = match.end() + 1
+
+        return None
+
+
+class OracleTokenizedDeleteParser(OracleTokenizedWhereParser):
+    def parse(self, table_name, commit_statement, primary_key_fields):
+        pk_list = self._set_primary_keys_from_string(primary_key_fields,
+                                                     table_name)
+        self._commit_statement = commit_statement
+        self._statement = DeleteStatement(table_name,
+                                          primary_key_list=pk_list)
+
+        pos = self._get_index_after_string(" {} ".format(const.WHERE))
+        self._parse_where(commit_statement, pos)
+
+        return self._statement
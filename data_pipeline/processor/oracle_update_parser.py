@@ -108,7 +108,9 @@ class OracleUpdateParser(OracleWhereParser):
             self._empty_buffer()
             self._parsing_state = UpdateState.set_key
 
-        elif const.WHERE in self._char_buff:
+        # The buffer is checked after every char consumed, so a where
+        # keyword is always found at its end
+        elif self._buffer_endswith(const.WHERE):
             self._empty_buffer()
             self._parsing_state = UpdateState.where_start
 
@@ -34,25 +34,9 @@ WhereState = Enum('WhereState', 'start key operator value')
 class OracleWhereParser(OracleBaseParser):
     def __init__(self):
         super(OracleWhereParser, self).__init__()
-        self._primarykey_list = None
         self._curr_key = None
         self._statement = None
 
-    def _set_primary_keys_from_string(self, pkstr, table_name):
-        pkstr = pkstr.strip()
-        if pkstr:
-            if pkstr == const.NO_KEYFIELD_STR:
-                self._primarykey_list = []
-            else:
-                self._primarykey_list = [pk.strip().upper()
-                                         for pk in pkstr.split(const.COMMA)]
-
-        self._logger.debug(
-            "[{table}] Set primary keys = {pks}"
-            .format(table=table_name, pks=self._primarykey_list))
-
-        return self._primarykey_list
-
     def set_primary_keys(self, value):
         self._primarykey_list = value
 
@@ -60,7 +44,7 @@ class OracleWhereParser(OracleBaseParser):
         self._statement = value
 
     def parse(self):
-        self._char_buff = const.EMPTY_STRING
+        self._empty_buffer()
         self._parsing_state = WhereState.start
 
         while self._read_cursor < len(self._commit_statement):
@@ -98,10 +82,9 @@ class OracleWhereParser(OracleBaseParser):
             self._parsing_state = WhereState.operator
 
     def _transition_from_where_operator_parsing(self):
-        is_null_index = self._commit_statement.find(const.IS_NULL,
-                                                    self._read_cursor)
-
-        if self._read_cursor == is_null_index:
+        # Only compares the chars at the cursor, rather than searching the
+        # rest of the statement for every char of every operator
+        if self._is_special_string_at_cursor(const.IS_NULL):
             # Prefer using None over const.IS_NULL in case a
             # key's value is actually 'IS NULL'
             self._statement.add_condition(self._curr_key, None)
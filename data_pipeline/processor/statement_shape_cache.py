@@ -0,0 +1,114 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    statement_shape_cache
+# Purpose:   Least recently used cache of the statement shapes of tables
+#
+# Notes:     A table's redo INSERTs list the same columns in the same order,
+#            so the parsed field list is keyed on the table and the literal
+#            text of its field list. The text changes with the columns, so
+#            a stale shape is never matched; invalidating a table on ALTER
+#            only frees its shapes early.
+#
+###############################################################################
+
+import logging
+
+from collections import OrderedDict
+
+import data_pipeline.constants.const as const
+from data_pipeline.sql.insert_shape import InsertShape
+
+
+def get_field_list_fingerprint(commit_statement, field_list_start):
+    """Returns the text of an INSERT's field list, up to and including the
+    start of its values, or None if it cannot be found
+    :param str commit_statement: The INSERT redo statement
+    :param int field_list_start: Position following the field list's
+        opening bracket
+    """
+    end = commit_statement.find(const.ORACLE_INSERT_VALUES_SEPARATOR,
+                                field_list_start)
+    if end == -1:
+        return None
+    return commit_statement[field_list_start:
+                            end + len(const.ORACLE_INSERT_VALUES_SEPARATOR)]
+
+
+class StatementShapeCache(object):
+    def __init__(self, max_size):
+        """
+        :param int max_size: Number of shapes kept, across all tables
+        """
+        self._max_size = max_size
+        self._shapes = OrderedDict()
+        self._logger = logging.getLogger(__name__)
+
+    def get(self, table_name, fingerprint):
+        key = (table_name, fingerprint)
+        shape = self._shapes.pop(key, None)
+        if shape is not None:
+            # Reinserted as the most recently used
+            self._shapes[key] = shape
+        return shape
+
+    def put(self, table_name, fingerprint, shape):
+        self._shapes.pop((table_name, fingerprint), None)
+        self._shapes[(table_name, fingerprint)] = shape
+        if len(self._shapes) > self._max_size:
+            self._shapes.popitem(last=False)
+
+    def get_insert_shape(self, table_name, commit_statement,
+                         field_list_start):
+        """Looks up the shape of an INSERT redo statement
+        :return: The statement's field list fingerprint, or None if it has
+            none, and its cached shape, or None if not cached
+        :rtype: tuple
+        """
+        fingerprint = get_field_list_fingerprint(commit_statement,
+                                                 field_list_start)
+        if fingerprint is None:
+            return (None, None)
+        return (fingerprint, self.get(table_name, fingerprint))
+
+    def put_insert_shape(self, table_name, fingerprint, fields,
+                         values_offset, field_names):
+        """Caches the shape of a parsed INSERT redo statement. It is only
+        cached if parsing its fields read exactly its fingerprint, so any
+        statement with the same fingerprint has the same fields
+        :return: The new shape, or None if it was not cached
+        """
+        if fingerprint is None or values_offset != len(fingerprint):
+            return None
+
+        shape = InsertShape(tuple(fields), values_offset, tuple(field_names))
+        self.put(table_name, fingerprint, shape)
+        return shape
+
+    def invalidate(self, table_name):
+        """Discards the shapes of a table"""
+        keys = [key for key in self._shapes if key[0] == table_name]
+        for key in keys:
+            del self._shapes[key]
+
+        if keys:
+            self._logger.debug("Invalidated {n} statement shapes of {t}"
+                               .format(n=len(keys), t=table_name))
+
+    def __len__(self):
+        return len(self._shapes)
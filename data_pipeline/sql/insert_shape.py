@@ -0,0 +1,75 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    insert_shape
+# Purpose:   Describes the field layout shared by a table's INSERT statements
+#
+# Notes:     Field names are sorted and sanitised, and the SQL up to the
+#            values built, once per shape rather than once per statement.
+#
+###############################################################################
+
+import data_pipeline.constants.const as const
+import data_pipeline.sql.utils as sql_utils
+
+
+class InsertShape(object):
+    def __init__(self, fields, values_offset, field_names):
+        """
+        :param tuple fields: Field names parsed from the redo, in order
+        :param int values_offset: Position of the values in the redo
+            relative to the start of the field list
+        :param tuple field_names: All field names of statements with this
+            shape, including any metadata columns
+        """
+        self.fields = fields
+        self.values_offset = values_offset
+        self.field_names = field_names
+        self.sorted_field_names = sorted(set(field_names))
+        self._sql_prefixes = {}
+
+    def describes(self, insert_statement):
+        """Whether the statement still has only the fields of this shape"""
+        return (len(insert_statement.get_field_values()) ==
+                len(self.sorted_field_names))
+
+    def get_sql_prefix(self, table_name, schema, special_char_replacement):
+        """Returns the INSERT statement's SQL up to its first value"""
+        key = (table_name, schema, special_char_replacement)
+        prefix = self._sql_prefixes.get(key)
+        if prefix is None:
+            sql_field_names = self.sorted_field_names
+            if special_char_replacement:
+                sql_field_names = [
+                    sql_utils.replace_special_chars(f,
+                                                    special_char_replacement)
+                    for f in sql_field_names]
+
+            prefix = sql_utils.build_insert_sql_prefix(
+                table_name, schema, sql_field_names)
+            self._sql_prefixes[key] = prefix
+        return prefix
+
+    def __eq__(self, other):
+        return (isinstance(other, InsertShape) and
+                self.fields == other.fields and
+                self.values_offset == other.values_offset and
+                self.field_names == other.field_names)
+
+    def __ne__(self, other):
+        return not self == other
@@ -32,11 +32,29 @@ from .base_statement import BaseStatement
 class InsertStatement(BaseStatement):
     """Contains data necessary for producing a valid SQL INSERT statement"""
 
-    def __init__(self, table_name, field_values):
+    def __init__(self, table_name, field_values, primary_key_list=None):
+        """Construct a new InsertStatement instance
+
+        :param str table_name: The table name for this statement
+        :param dict field_values: The dictionary of field-value pairs to
+            insert
+        :param list primary_key_list: The list of primary keys
+        """
         super(InsertStatement, self).__init__(table_name)
         self._field_values = field_values
+        # The InsertShape of the statement's fields, if known
+        self.shape = None
+
+        if primary_key_list is None:
+            self.primary_key_list = []
+        else:
+            self.primary_key_list = primary_key_list
+
         self.statement_type = const.INSERT
 
+    def get_field_values(self):
+        return self._field_values
+
     def get_value(self, field_name):
         return self._field_values.get(field_name)
 
@@ -0,0 +1,55 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:    upsert_statement
+# Purpose:   Represents SQL statements inserting a row, or updating it if a
+#            row with the same primary key already exists
+#
+# Notes:
+#
+###############################################################################
+
+import data_pipeline.constants.const as const
+
+from .insert_statement import InsertStatement
+
+
+class UpsertStatement(InsertStatement):
+    """Contains data necessary for producing an insert-or-update SQL
+    statement, keyed on the primary key"""
+
+    def __init__(self, table_name, field_values, primary_key_list):
+        """Construct a new UpsertStatement instance
+
+        :param str table_name: The table name for this statement
+        :param dict field_values: The dictionary of field-value pairs to
+            insert, or update if the row exists
+        :param list primary_key_list: The list of primary keys identifying
+            the row
+        """
+        super(UpsertStatement, self).__init__(table_name, field_values,
+                                              primary_key_list)
+        self.statement_type = const.UPSERT
+
+    def tosql(self, applier):
+        return applier.build_upsert_sql(self)
+
+    def __str__(self):
+        return "{insert} ON KEY ( {keys} ) UPDATE".format(
+            insert=super(UpsertStatement, self).__str__(),
+            keys=const.COMMASPACE.join(self.primary_key_list))
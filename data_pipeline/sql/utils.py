@@ -133,25 +133,66 @@ def build_alter_sql(alter_statement, map_operation_func=_map_operation,
 def build_insert_sql(insert_statement, schema=None,
                      special_char_replacement=const.SPECIAL_CHAR_REPLACEMENT):
 
-    field_names = _get_insert_field_names(
-        insert_statement,
-        None)
+    shape = insert_statement.shape
+    if shape is not None and shape.describes(insert_statement):
+        # Fields sorted, sanitised and the prefix built once per shape
+        field_names = shape.sorted_field_names
+        sql_prefix = shape.get_sql_prefix(insert_statement.table_name,
+                                          schema, special_char_replacement)
+    else:
+        field_names = _get_insert_field_names(
+            insert_statement,
+            None)
 
-    sql_field_names = _get_insert_field_names(
-        insert_statement,
-        special_char_replacement)
+        sql_field_names = _get_insert_field_names(
+            insert_statement,
+            special_char_replacement)
+
+        sql_prefix = build_insert_sql_prefix(insert_statement.table_name,
+                                             schema, sql_field_names)
 
     field_values = [_build_insert_field_value(insert_statement, f)
                     for f in field_names]
 
-    table_name = _add_table_schema(schema, insert_statement.table_name)
-    sqlstr = ("INSERT INTO {table_name} ( {field_names} ) "
-              "VALUES ( {field_values} )"
-              .format(table_name=table_name,
-                      field_names=const.COMMASPACE.join(sql_field_names),
-                      field_values=const.COMMASPACE.join(field_values)))
+    return "{prefix}{field_values} )".format(
+        prefix=sql_prefix,
+        field_values=const.COMMASPACE.join(field_values))
+
+
+def build_insert_sql_prefix(table_name, schema, sql_field_names):
+    """Builds the SQL of an INSERT statement up to its first value"""
+    table_name = _add_table_schema(schema, table_name)
+    return ("INSERT INTO {table_name} ( {field_names} ) VALUES ( "
+            .format(table_name=table_name,
+                    field_names=const.COMMASPACE.join(sql_field_names)))
 
-    return sqlstr
+
+def build_upsert_sql(upsert_statement, schema=None,
+                     special_char_replacement=const.SPECIAL_CHAR_REPLACEMENT):
+    """Builds an INSERT ... ON CONFLICT statement, updating the non-key
+    fields of the row if one with the same primary key already exists
+    """
+    insert_sql = build_insert_sql(upsert_statement, schema,
+                                  special_char_replacement)
+
+    key_names = [replace_special_chars(k, special_char_replacement)
+                 for k in upsert_statement.primary_key_list]
+    lower_key_names = [k.lower() for k in key_names]
+    field_names = _get_insert_field_names(upsert_statement,
+                                          special_char_replacement)
+    set_clause = [
+        "{field} = EXCLUDED.{field}".format(field=f)
+        for f in field_names if f.lower() not in lower_key_names]
+
+    if not set_clause:
+        return ("{insert} ON CONFLICT ( {keys} ) DO NOTHING"
+                .format(insert=insert_sql,
+                        keys=const.COMMASPACE.join(key_names)))
+
+    return ("{insert} ON CONFLICT ( {keys} ) DO UPDATE SET {set_clause}"
+            .format(insert=insert_sql,
+                    keys=const.COMMASPACE.join(key_names),
+                    set_clause=const.COMMASPACE.join(set_clause)))
 
 
 def build_bulk_insert_sql(
@@ -163,44 +204,68 @@ def build_bulk_insert_sql(
     if not insert_statements:
         return None
 
-    table_name = None
-    field_names = None
-    sqlstr = "INSERT INTO {table_name} ( {field_names} ) VALUES\n"
-    field_value_list = []
+    (first_statement, commit_lsn, offset) = insert_statements[0]
+    table_name = _add_table_schema(schema, first_statement.table_name)
 
-    sep = const.SPACE * 2
-    first_loop = True
-    for (insert_statement, commit_lsn, offset) in insert_statements:
-        if first_loop:
-            table_name = _add_table_schema(schema, insert_statement.table_name)
-
-            field_names = _get_insert_field_names(
-                insert_statement,
-                None)
-
-            sql_field_names = _get_insert_field_names(
-                insert_statement,
-                special_char_replacement)
+    field_names = _get_insert_field_names(
+        first_statement,
+        None)
 
-            sqlstr = sqlstr.format(
-                table_name=table_name,
-                field_names=const.COMMASPACE.join(sql_field_names))
+    sql_field_names = _get_insert_field_names(
+        first_statement,
+        special_char_replacement)
 
+    # Rows are collected and joined once to keep string building linear
+    # in the number of rows
+    rows = []
+    for (insert_statement, commit_lsn, offset) in insert_statements:
         field_values = [_build_insert_field_value(insert_statement, f)
                         for f in field_names]
 
-        sqlstr += ("{sep}( {csv_values} ) -- lsn: {commit_lsn}, offset: "
-                   "{offset}\n"
-                   .format(sep=sep,
-                           csv_values=const.COMMASPACE.join(field_values),
-                           commit_lsn=commit_lsn,
-                           offset=offset))
-        if sep == const.SPACE * 2:
-            sep = const.COMMASPACE
+        rows.append("( {csv_values} ) -- lsn: {commit_lsn}, offset: "
+                    "{offset}\n"
+                    .format(csv_values=const.COMMASPACE.join(field_values),
+                            commit_lsn=commit_lsn,
+                            offset=offset))
+
+    return ("INSERT INTO {table_name} ( {field_names} ) VALUES\n"
+            "{sep}{rows}"
+            .format(table_name=table_name,
+                    field_names=const.COMMASPACE.join(sql_field_names),
+                    sep=const.SPACE * 2,
+                    rows=const.COMMASPACE.join(rows)))
+
+
+def build_insert_from_staging_sql(table_name, staging_table_name,
+                                  columns, staging_columns,
+                                  expression_values=None, schema=None):
+    """Builds an INSERT ... SELECT statement which inserts all rows staged
+    in staging_table_name into table_name
+    :param str table_name: The target table to insert into
+    :param str staging_table_name: The staging table holding the rows
+    :param list columns: The target table columns to insert from the
+        staging table
+    :param list staging_columns: The staging table columns holding the
+        values to insert, positionally paired with columns
+    :param dict expression_values: Target columns to set to a SQL
+        expression evaluated on target rather than a staged value
+    :param str schema: The schema of the target table
+    """
+    table_name = _add_table_schema(schema, table_name)
 
-        first_loop = False
+    columns = list(columns)
+    select_values = ["s.{}".format(stg) for stg in staging_columns]
+    if expression_values:
+        for (column, expression) in sorted(expression_values.items()):
+            columns.append(column)
+            select_values.append(expression)
 
-    return sqlstr
+    return ("INSERT INTO {table_name} ( {columns} ) "
+            "SELECT {select_values} FROM {staging_table_name} s"
+            .format(table_name=table_name,
+                    columns=const.COMMASPACE.join(columns),
+                    select_values=const.COMMASPACE.join(select_values),
+                    staging_table_name=staging_table_name))
 
 
 def _get_insert_field_names(insert_statement, special_char_replacement):
@@ -265,7 +330,287 @@ def build_delete_sql(
     return sqlstr
 
 
-def build_where_sql(where_statement, special_char_replacement):
+def get_primary_key_values(statement):
+    """Returns the tuple of primary key values, in primary key list order,
+    for the given statement. None is returned if the statement can't be
+    uniquely identified by its primary keys, for example when no primary keys
+    are defined or a primary key value is missing or NULL.
+    :param Statement statement: The insert, update or delete statement to key
+    """
+    pk_list = statement.primary_key_list
+    if not pk_list:
+        return None
+
+    if statement.statement_type == const.INSERT:
+        get_value = statement.get_value
+    else:
+        get_value = statement.conditions.get
+
+    key_values = []
+    for pk in pk_list:
+        value = get_value(pk)
+        if value is None:
+            return None
+        key_values.append(value)
+
+    return tuple(key_values)
+
+
+def build_staging_table_name(table_name, statement_type,
+                             special_char_replacement=
+                             const.SPECIAL_CHAR_REPLACEMENT):
+    name = "{table_name}_bulk_{op}".format(table_name=table_name,
+                                           op=statement_type)
+    return replace_special_chars(name, special_char_replacement).lower()
+
+
+def build_staging_table_sql(staging_table_name, table_name,
+                            source_columns, staging_columns, schema=None):
+    """Builds a CREATE TEMP TABLE statement for an empty staging table whose
+    columns take on the data types of the given target table columns
+    :param str staging_table_name: The name of the temp table to create
+    :param str table_name: The target table to derive column types from
+    :param list source_columns: The target table column names
+    :param list staging_columns: The staging table column names, positionally
+        paired with source_columns
+    :param str schema: The schema of the target table
+    """
+    table_name = _add_table_schema(schema, table_name)
+    columns = const.COMMASPACE.join(
+        ["{src} AS {stg}".format(src=src, stg=stg)
+         for (src, stg) in zip(source_columns, staging_columns)])
+
+    return ("CREATE TEMP TABLE {staging_table_name} AS "
+            "SELECT {columns} FROM {table_name} WITH NO DATA"
+            .format(staging_table_name=staging_table_name,
+                    columns=columns,
+                    table_name=table_name))
+
+
+def build_drop_table_sql(table_name):
+    return "DROP TABLE {table_name}".format(table_name=table_name)
+
+
+def _build_staging_join_sql(key_columns, staging_key_columns):
+    return " AND ".join(
+        ["t.{key} = s.{stg}".format(key=key, stg=stg)
+         for (key, stg) in zip(key_columns, staging_key_columns)])
+
+
+def build_bulk_update_sql(table_name, staging_table_name,
+                          key_columns, staging_key_columns,
+                          set_columns, staging_set_columns,
+                          expression_set_values=None, schema=None):
+    """Builds a set-based UPDATE statement which applies all row images
+    staged in staging_table_name to table_name, joined on the primary keys
+    :param str table_name: The target table to update
+    :param str staging_table_name: The staging table holding the row images
+    :param list key_columns: The target table primary key columns
+    :param list staging_key_columns: The staging table columns holding the
+        primary key values, positionally paired with key_columns
+    :param list set_columns: The target table columns to set from the
+        staging table
+    :param list staging_set_columns: The staging table columns holding the
+        values to set, positionally paired with set_columns
+    :param dict expression_set_values: Target columns to set to a SQL
+        expression evaluated on target rather than a staged value
+    :param str schema: The schema of the target table
+    """
+    table_name = _add_table_schema(schema, table_name)
+
+    set_clause_kv_pairs = [
+        "{col} = s.{stg}".format(col=col, stg=stg)
+        for (col, stg) in zip(set_columns, staging_set_columns)]
+
+    if expression_set_values:
+        set_clause_kv_pairs.extend(
+            ["{col} = {expr}".format(col=col, expr=expr)
+             for (col, expr) in sorted(expression_set_values.items())])
+
+    return ("UPDATE {table_name} t SET {set_clause} "
+            "FROM {staging_table_name} s WHERE {join}"
+            .format(table_name=table_name,
+                    set_clause=const.COMMASPACE.join(set_clause_kv_pairs),
+                    staging_table_name=staging_table_name,
+                    join=_build_staging_join_sql(key_columns,
+                                                 staging_key_columns)))
+
+
+def build_bulk_delete_sql(table_name, staging_table_name,
+                          key_columns, staging_key_columns, schema=None):
+    """Builds a set-based DELETE statement which deletes all rows from
+    table_name whose primary keys are staged in staging_table_name
+    :param str table_name: The target table to delete from
+    :param str staging_table_name: The staging table holding the keys
+    :param list key_columns: The target table primary key columns
+    :param list staging_key_columns: The staging table columns holding the
+        primary key values, positionally paired with key_columns
+    :param str schema: The schema of the target table
+    """
+    table_name = _add_table_schema(schema, table_name)
+
+    return ("DELETE FROM {table_name} t USING {staging_table_name} s "
+            "WHERE {join}"
+            .format(table_name=table_name,
+                    staging_table_name=staging_table_name,
+                    join=_build_staging_join_sql(key_columns,
+                                                 staging_key_columns)))
+
+
+def build_copy_value(value):
+    """Formats a value for a COPY ... CSV payload using the initsync quote
+    and escape chars. Values are always quoted so an empty string is
+    distinguishable from NULL, which is written as an unquoted empty field
+    """
+    if value is None:
+        return const.COPY_NULL_STRING
+
+    value = value.replace(const.COPY_ESCAPE_CHAR, const.COPY_ESCAPE_CHAR * 2)
+    value = value.replace(const.COPY_QUOTE_CHAR,
+                          const.COPY_ESCAPE_CHAR + const.COPY_QUOTE_CHAR)
+
+    return "{quote}{value}{quote}".format(quote=const.COPY_QUOTE_CHAR,
+                                          value=value)
+
+
+def build_copy_row(values):
+    return "{row}\n".format(
+        row=const.FIELD_DELIMITER.join([build_copy_value(v) for v in values]))
+
+
+def _build_parameter_sql(value, values):
+    """Returns the placeholder for value in a parameterised statement,
+    appending value to the list of values to bind. SQL expressions are
+    inlined as they're evaluated on target
+    """
+    if is_sql_expression(value):
+        return value
+
+    values.append(value)
+    return "${}".format(len(values))
+
+
+def build_parameterised_insert_sql(
+        insert_statement, schema=None,
+        special_char_replacement=const.SPECIAL_CHAR_REPLACEMENT):
+    """Builds an INSERT statement with $n parameter placeholders in place
+    of values, suitable for a PREPARE statement. Statements of the same
+    table and fields result in the same SQL text.
+    :return: The SQL text and the list of values to bind, in parameter order
+    :rtype: tuple
+    """
+    field_names = _get_insert_field_names(insert_statement, None)
+    sql_field_names = _get_insert_field_names(insert_statement,
+                                              special_char_replacement)
+
+    values = []
+    placeholders = [_build_parameter_sql(insert_statement.get_value(f),
+                                         values)
+                    for f in field_names]
+
+    table_name = _add_table_schema(schema, insert_statement.table_name)
+    sqlstr = ("INSERT INTO {table_name} ( {field_names} ) "
+              "VALUES ( {placeholders} )"
+              .format(table_name=table_name,
+                      field_names=const.COMMASPACE.join(sql_field_names),
+                      placeholders=const.COMMASPACE.join(placeholders)))
+
+    return (sqlstr, values)
+
+
+def build_parameterised_update_sql(
+        update_statement, schema=None,
+        filter_func=default_update_field_filter,
+        special_char_replacement=const.SPECIAL_CHAR_REPLACEMENT):
+    """Builds an UPDATE statement with $n parameter placeholders in place
+    of values, suitable for a PREPARE statement.
+    :return: The SQL text and the list of values to bind, in parameter
+        order. The SQL text is None if there are no fields to SET
+    :rtype: tuple
+    """
+    values = []
+    set_clause_kv_pairs = [
+        "{field_name} = {placeholder}"
+        .format(field_name=replace_special_chars(k, special_char_replacement),
+                placeholder=_build_parameter_sql(v, values))
+        for (k, v) in sorted(update_statement.set_values.items())
+        if filter_func(k)]
+
+    if not set_clause_kv_pairs:
+        return (None, None)
+
+    table_name = _add_table_schema(schema, update_statement.table_name)
+    sqlstr = ("UPDATE {table_name} SET {set_clause}{where_clause}"
+              .format(table_name=table_name,
+                      set_clause=const.COMMASPACE.join(set_clause_kv_pairs),
+                      where_clause=_build_parameterised_where_sql(
+                          update_statement, values,
+                          special_char_replacement)))
+
+    return (sqlstr, values)
+
+
+def build_parameterised_delete_sql(
+        delete_statement, schema=None,
+        special_char_replacement=const.SPECIAL_CHAR_REPLACEMENT):
+    """Builds a DELETE statement with $n parameter placeholders in place
+    of values, suitable for a PREPARE statement.
+    :return: The SQL text and the list of values to bind, in parameter order
+    :rtype: tuple
+    """
+    values = []
+    table_name = _add_table_schema(schema, delete_statement.table_name)
+    sqlstr = ("DELETE FROM {table_name}{where_clause}"
+              .format(table_name=table_name,
+                      where_clause=_build_parameterised_where_sql(
+                          delete_statement, values,
+                          special_char_replacement)))
+
+    return (sqlstr, values)
+
+
+def _build_parameterised_where_sql(where_statement, values,
+                                   special_char_replacement):
+    where_clause_items = _get_where_clause_items(where_statement)
+
+    conditions = []
+    for (field, value) in sorted(where_clause_items.items()):
+        field_name = replace_special_chars(field, special_char_replacement)
+        if value is None:
+            conditions.append("{field_name} {is_null}"
+                              .format(field_name=field_name,
+                                      is_null=const.IS_NULL))
+        else:
+            conditions.append("{field_name} = {placeholder}"
+                              .format(field_name=field_name,
+                                      placeholder=_build_parameter_sql(
+                                          value, values)))
+
+    if conditions:
+        return " WHERE {}".format(" AND ".join(conditions))
+    return const.EMPTY_STRING
+
+
+def build_prepare_sql(name, sql):
+    return "PREPARE {name} AS {sql}".format(name=name, sql=sql)
+
+
+def build_deallocate_sql(name):
+    return "DEALLOCATE {name}".format(name=name)
+
+
+def build_execute_prepared_sql(name, value_count):
+    """Builds an EXECUTE statement for the named prepared statement, with
+    a bind variable for each of its parameters"""
+    if not value_count:
+        return "EXECUTE {name}".format(name=name)
+
+    return ("EXECUTE {name} ( {bind_vars} )"
+            .format(name=name,
+                    bind_vars=const.COMMASPACE.join(["%s"] * value_count)))
+
+
+def _get_where_clause_items(where_statement):
     where_conditions = where_statement.conditions
     pk_list = where_statement.primary_key_list
     primary_keys_in_where_clause = len(pk_list) > 0
@@ -274,13 +619,17 @@ def build_where_sql(where_statement, special_char_replacement):
             primary_keys_in_where_clause = False
 
     if primary_keys_in_where_clause:
-        where_clause_items = {
+        return {
             field: value for field, value
             in where_conditions.iteritems()
             if field in pk_list
         }
-    else:
-        where_clause_items = where_statement.conditions
+
+    return where_conditions
+
+
+def build_where_sql(where_statement, special_char_replacement):
+    where_clause_items = _get_where_clause_items(where_statement)
 
     sqlstr = const.EMPTY_STRING
     c = special_char_replacement
@@ -330,6 +679,12 @@ def _is_metadata_current_time_sql(sql):
     return stripped_sql == const.METADATA_CURRENT_TIME_SQL
 
 
+def is_sql_expression(value):
+    """Returns True if the value is a SQL expression to be evaluated on
+    target rather than a literal value"""
+    return value is not None and _is_metadata_current_time_sql(value)
+
+
 def build_value_sql(value):
     if value is None:
         field_value = const.NULL
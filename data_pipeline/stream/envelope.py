@@ -0,0 +1,185 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:  envelope
+# Purpose: Packs multiple DATA records into a single stream message and
+#          unpacks them again
+#
+# Notes:   An envelope is a message of the stream's usual schema with a
+#          record_type of ENVELOPE. Its commit_statement holds the packed
+#          records as JSON, with field names listed once rather than per
+#          record. The batch_id and record_type shared by all records are
+#          restored from the envelope on unpacking.
+#
+###############################################################################
+
+import json
+import data_pipeline.constants.const as const
+
+
+_SHARED_FIELDS = ['batch_id', 'record_type']
+_SEPARATORS = (',', ':')
+
+# Fields of an envelope not taken from its first record
+_ENVELOPE_FIELDS = ['record_type', 'commit_lsn', 'commit_statement']
+
+
+def is_envelope(message):
+    """Returns True if the message dict is an envelope"""
+    return message.get('record_type') == const.ENVELOPE
+
+
+def pack(records):
+    """Packs the records into an envelope
+    :param list records: DATA record dicts, all of the same batch
+    :return: The envelope as a dict, taking its table_name and
+        message_sequence from the first record and its commit_lsn from the
+        last
+    :rtype: dict
+    """
+    fields = _packed_fields(records[0])
+
+    envelope = dict(records[0])
+    envelope['record_type'] = const.ENVELOPE
+    envelope['record_count'] = len(records)
+    envelope['commit_lsn'] = records[-1]['commit_lsn']
+    envelope['commit_statement'] = json.dumps({
+        'fields': fields,
+        'records': [[r[f] for f in fields] for r in records],
+    }, separators=_SEPARATORS)
+    return envelope
+
+
+def unpack(stream_message):
+    """Unpacks the records of an envelope read off the stream
+    :param Message stream_message: The envelope message
+    :return: An EnvelopeRecord per packed record, in the order packed
+    :rtype: list
+    """
+    envelope = stream_message.value()
+    contents = json.loads(envelope['commit_statement'])
+    fields = contents['fields']
+
+    records = []
+    for (index, values) in enumerate(contents['records']):
+        record = dict(zip(fields, values))
+        for field in _SHARED_FIELDS:
+            record[field] = envelope[field]
+        record['record_type'] = const.DATA
+        records.append(EnvelopeRecord(stream_message, index, record))
+    return records
+
+
+class EnvelopeRecord(object):
+    """A record unpacked from an envelope, standing in for the stream message
+    it was read from. The record shares the envelope's offset, so offsets
+    are only ever committed at envelope granularity
+    """
+    def __init__(self, envelope_message, index, record):
+        self._envelope_message = envelope_message
+        self._record = record
+        self.index = index
+
+    def value(self):
+        return self._record
+
+    def offset(self):
+        return self._envelope_message.offset()
+
+    def error(self):
+        return None
+
+
+class EnvelopePacker(object):
+    def __init__(self, max_records, max_bytes):
+        """Buffers DATA records into envelopes
+        :param int max_records: Max number of records in an envelope.
+            0 for no limit
+        :param int max_bytes: Max size of the string values of an envelope,
+            including its packed records. A record that would take an
+            envelope over it closes the envelope first, so only an envelope
+            of a single record larger than max_bytes can exceed it.
+            0 for no limit
+        """
+        self._max_records = max_records
+        self._max_bytes = max_bytes
+        self._records = {}
+        self._sizes = {}
+
+    def add(self, key, record):
+        """Buffers a copy of the record in the envelope for the given key
+        :param key: Identifies the envelope, e.g. the record's partition
+        :param dict record: The DATA record
+        :return: The packed envelopes closed by adding the record, in the
+            order they were filled
+        :rtype: list
+        """
+        envelopes = []
+        record_size = _record_size(record)
+
+        if (self._max_bytes and key in self._records and
+                self._sizes[key] + record_size > self._max_bytes):
+            envelopes.append(self._pop(key))
+
+        if key not in self._records:
+            self._records[key] = []
+            self._sizes[key] = _envelope_size(record)
+
+        records = self._records[key]
+        records.append(dict(record))
+        self._sizes[key] += record_size
+
+        if ((self._max_records and len(records) >= self._max_records) or
+                (self._max_bytes and self._sizes[key] >= self._max_bytes)):
+            envelopes.append(self._pop(key))
+        return envelopes
+
+    def drain(self):
+        """Returns all partially filled envelopes as (key, envelope) pairs,
+        ordered by key
+        """
+        return [(key, self._pop(key)) for key in sorted(self._records)]
+
+    def _pop(self, key):
+        self._sizes.pop(key)
+        return pack(self._records.pop(key))
+
+
+def _packed_fields(record):
+    return sorted(f for f in record.keys() if f not in _SHARED_FIELDS)
+
+
+def _envelope_size(record):
+    """Returns the size of an envelope of the record with no records packed
+    in it, being its string values other than the packed records and the
+    commit_lsn, which is counted per record
+    """
+    header = json.dumps({'fields': _packed_fields(record), 'records': []},
+                        separators=_SEPARATORS)
+    return (len(header) + len(const.ENVELOPE) +
+            sum(len(v) for (f, v) in record.iteritems()
+                if f not in _ENVELOPE_FIELDS and isinstance(v, basestring)))
+
+
+def _record_size(record):
+    """Returns the most bytes the record adds to an envelope"""
+    values = [record[f] for f in _packed_fields(record)]
+    # Plus the separator from the previous packed record, and the record's
+    # commit_lsn should it be the envelope's last
+    return (len(json.dumps(values, separators=_SEPARATORS)) + 1 +
+            len(record.get('commit_lsn') or const.EMPTY_STRING))
@@ -23,7 +23,7 @@
 #
 ###############################################################################
 
-from .kafka_producer import KafkaProducer
+from .kafka_producer import KafkaProducer, build_producer_config
 from .kafka_consumer import KafkaConsumer
 from .file_writer import FileWriter
 from .file_reader import FileReader
@@ -37,10 +37,16 @@ def build_kafka_producer(argv):
         argv.streamhost,
         argv.streamchannel,
         argv.streamschemahost,
-        argv.streamschemafile)
+        argv.streamschemafile,
+        build_producer_config(argv.producerprofile,
+                              argv.producercompression,
+                              argv.producerlingerms,
+                              argv.producerbatchmessages,
+                              argv.produceridempotence),
+        argv.producerkeys)
 
 
-def build_kafka_consumer(argv, applier):
+def build_kafka_consumer(argv, applier, partition=None):
     if not argv.streamhost or not argv.streamchannel:
         return None
 
@@ -49,7 +55,9 @@ def build_kafka_consumer(argv, applier):
         argv.streamgroup,
         argv.streamchannel,
         argv.streamschemahost,
-        applier)
+        applier,
+        argv.consumebatchsize,
+        partition)
 
 
 def build_file_writer(filename):
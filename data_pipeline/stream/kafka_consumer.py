@@ -31,19 +31,26 @@ import data_pipeline.constants.const as const
 
 from confluent_kafka import (KafkaError, KafkaException, TopicPartition,
                              OFFSET_END)
-from confluent_kafka.avro import AvroConsumer
+from confluent_kafka.avro import AvroConsumer, CachedSchemaRegistryClient
 from confluent_kafka.avro.serializer import SerializerError
+from confluent_kafka.avro.serializer.message_serializer import (
+    MessageSerializer)
 
 
 class KafkaConsumer:
 
-    def __init__(self, broker, group, topic, schema_registry_url, client):
+    def __init__(self, broker, group, topic, schema_registry_url, client,
+                 batch_size=0, partition=None):
         """ Constructer KafkaConsumer(broker, group, topic)
         :param str broker: The name of Kafka Broker Server and port
         :param str group: The name of Kafka Consumer Group
         :param str topic: The Kafka Topic name
         :param str schema_registry_url: The Kafka Schema Registry Server url
         :param object client: The client instance to pass the kafka message to
+        :param int batch_size: Max number of messages to consume and pass to
+            the client at once. 0 to poll and pass one message at a time
+        :param int partition: The topic partition to consume. If None, the
+            consumer subscribes to the topic, which must have one partition
         """
 
         self._logger = logging.getLogger(__name__)
@@ -53,10 +60,18 @@ class KafkaConsumer:
         self._broker = broker
         self._group = group
         self._topic = topic
-        self._topic_partition = TopicPartition(self._topic, 0)
+        self._partition = partition
+        self._topic_partition = TopicPartition(
+            self._topic, 0 if partition is None else partition)
         self._schema_registry_url = schema_registry_url
 
         self._consumer = self.build_consumer()
+        self._batch_size = batch_size
+        self._serializer = None
+        if self._batch_size:
+            # AvroConsumer only decodes messages returned by poll()
+            self._serializer = MessageSerializer(
+                CachedSchemaRegistryClient(self._schema_registry_url))
         self._eof_offset = None
         self._committed_offset = None
         self._last_message = None
@@ -92,8 +107,12 @@ class KafkaConsumer:
 
         try:
             while self._running:
-                message = self._consumer.poll(timeout)
-                self._process_message(message)
+                if self._batch_size:
+                    messages = self._consume(timeout)
+                    self._process_messages(messages)
+                else:
+                    message = self._consumer.poll(timeout)
+                    self._process_message(message)
         except Exception, e:
             self._logger.exception("Failed to poll kafka queue: {}"
                                    .format(str(e)))
@@ -102,6 +121,8 @@ class KafkaConsumer:
 
     def _process_message(self, message):
         if message is None:
+            # A pipelined client may have completed applying messages since
+            self._handle_apply_status(self._client.collect_status())
             return
 
         if not message.error():
@@ -112,25 +133,13 @@ class KafkaConsumer:
                                        v=message.value()))
 
             apply_status = self._client.apply(message)
+            self._handle_apply_status(apply_status)
 
-            if apply_status == const.COMMITTED or apply_status == const.KILLED:
-                # commit the last read offset since
-                # transaction is complete
-                try:
-                    self._consumer.commit(async=False)
-                except Exception, e:
-                    err_message = ("Failed to commit offsets: {}"
-                                   .format(str(e)))
-                    self._logger.warn(err_message)
-                    self._process_control.comment = err_message
-                    self._process_control.status = const.WARNING
-                    self._process_control.update()
-
-            # Signal consumer loop to stop
-            if apply_status == const.KILLED or apply_status == const.ERROR:
-                self._running = False
+        else:
+            self._process_error(message)
 
-        elif message.error().code() != KafkaError._PARTITION_EOF:
+    def _process_error(self, message):
+        if message.error().code() != KafkaError._PARTITION_EOF:
             err_message = ("Error reading topic: {topic}"
                            .format(topic=message.error()))
             self._logger.error(err_message)
@@ -138,6 +147,82 @@ class KafkaConsumer:
             self._process_control.status = const.ERROR
             self._process_control.update()
 
+    def _consume(self, timeout):
+        if timeout is None:
+            timeout = -1
+
+        messages = self._consumer.consume(self._batch_size, timeout)
+        for message in messages:
+            if not message.error():
+                self._decode(message)
+        return messages
+
+    def _decode(self, message):
+        try:
+            if message.value() is not None:
+                message.set_value(self._serializer.decode_message(
+                    message.value(), is_key=False))
+            if message.key() is not None:
+                message.set_key(self._serializer.decode_message(
+                    message.key(), is_key=True))
+        except SerializerError, e:
+            raise SerializerError("Message deserialization failed for "
+                                  "message at {t} [{p}] offset {o}: {err}"
+                                  .format(t=message.topic(),
+                                          p=message.partition(),
+                                          o=message.offset(),
+                                          err=str(e)))
+
+    def _process_messages(self, messages):
+        valid_messages = []
+        for message in messages:
+            if not message.error():
+                valid_messages.append(message)
+            else:
+                self._process_error(message)
+
+        if not valid_messages:
+            self._handle_apply_status(self._client.collect_status())
+            return
+
+        self._logger.debug("Received {n} messages: offsets {first}-{last}"
+                           .format(n=len(valid_messages),
+                                   first=valid_messages[0].offset(),
+                                   last=valid_messages[-1].offset()))
+
+        apply_status = self._client.apply_many(valid_messages)
+        self._handle_apply_status(apply_status)
+
+    def _handle_apply_status(self, apply_status):
+        if apply_status == const.COMMITTED or apply_status == const.KILLED:
+            # commit the last applied offset since
+            # transaction is complete
+            try:
+                self._commit_offsets()
+            except Exception, e:
+                err_message = ("Failed to commit offsets: {}"
+                               .format(str(e)))
+                self._logger.warn(err_message)
+                self._process_control.comment = err_message
+                self._process_control.status = const.WARNING
+                self._process_control.update()
+
+        # Signal consumer loop to stop
+        if apply_status == const.KILLED or apply_status == const.ERROR:
+            self._running = False
+
+    def _commit_offsets(self):
+        next_offset = self._client.next_offset_to_commit
+        if next_offset is None:
+            # All messages read so far have been applied
+            self._consumer.commit(async=False)
+        else:
+            self._consumer.commit(
+                offsets=[TopicPartition(self._topic,
+                                        self._topic_partition.partition,
+                                        next_offset)],
+                async=False)
+
     def build_consumer(self):
         try:
             consumer = AvroConsumer({
@@ -164,7 +249,13 @@ class KafkaConsumer:
             self._logger.exception(err_message)
             raise
 
-        consumer.subscribe([self._topic], on_assign=self._on_assign)
+        if self._partition is None:
+            consumer.subscribe([self._topic], on_assign=self._on_assign)
+        else:
+            # Each partition is applied by its own consumer, so partitions
+            # are assigned explicitly rather than balanced across the group
+            consumer.assign([self._topic_partition])
+            self._on_assign(consumer, [self._topic_partition])
         return consumer
 
     def seek_to_end(self, timeout):
@@ -233,7 +324,8 @@ class KafkaConsumer:
         if partitions is None:
             return
 
-        partition = partitions.get('0', None)
+        partition = partitions.get(str(self._topic_partition.partition),
+                                   None)
         if partition is None:
             return
 
@@ -246,6 +338,10 @@ class KafkaConsumer:
         self._committed_offset = committed_offset
 
     def _on_assign(self, consumer, partitions):
+        # Messages read but not yet applied will be read again from
+        # next_offset_to_read, so must not also be applied from before
+        self._client.discard_pending()
+
         kafka_committed = consumer.committed([self._topic_partition])
 
         if not kafka_committed:
@@ -35,17 +35,65 @@ from confluent_kafka import avro
 from confluent_kafka.avro import AvroProducer
 
 
+# Settings applied on top of the base producer config for each profile
+PRODUCER_PROFILES = {
+    const.PRODUCER_PROFILE_DEFAULT: {},
+    const.PRODUCER_PROFILE_THROUGHPUT: {
+        'compression.codec': const.COMPRESSION_LZ4,
+        'linger.ms': const.KAFKA_BATCH_LINGER_MS,
+        'batch.num.messages': const.KAFKA_BATCH_NUM_MESSAGES,
+    },
+    const.PRODUCER_PROFILE_RELIABLE: {
+        'compression.codec': const.COMPRESSION_LZ4,
+        'linger.ms': const.KAFKA_BATCH_LINGER_MS,
+        'batch.num.messages': const.KAFKA_BATCH_NUM_MESSAGES,
+        'enable.idempotence': True,
+    },
+}
+
+# Message keys are plain strings
+KEY_SCHEMA = '"string"'
+
+
+def build_producer_config(profile, compression=None, linger_ms=None,
+                          batch_messages=None, idempotence=False):
+    """Returns the producer settings for the given profile, with any given
+    settings overriding those of the profile
+    :param str profile: One of the PRODUCER_PROFILES
+    :param str compression: Compression codec, or None for the profile's
+    :param int linger_ms: Max milliseconds to wait for messages to fill a
+        batch, or None for the profile's
+    :param int batch_messages: Max number of messages in a batch, or None
+        for the profile's
+    :param bool idempotence: Enables idempotent delivery if True
+    """
+    config = dict(PRODUCER_PROFILES[profile])
+    if compression is not None:
+        config['compression.codec'] = compression
+    if linger_ms is not None:
+        config['linger.ms'] = linger_ms
+    if batch_messages is not None:
+        config['batch.num.messages'] = batch_messages
+    if idempotence:
+        config['enable.idempotence'] = True
+    return config
+
+
 class KafkaProducer(StreamWriter):
     """
     Class KafkaProducer is initiated from Extractor
     """
     def __init__(self, broker, topic,
-                 schema_registry_url, value_schema_filename):
+                 schema_registry_url, value_schema_filename,
+                 producer_config=None, keyed=False):
         """Construct a KafkaProducer
         :param str broker: The name of Kafka Broker Server and port
         :param str topic: The Kafka Topic name
         :param str schema_registry_url: The Kafka Schema Registry Server url
         :param str value_schema: The Kafka Avro Schema file name
+        :param dict producer_config: Producer settings overriding the
+            defaults, as built by build_producer_config
+        :param bool keyed: Keys DATA messages by table name if True
         :return: Returns True if successful otherwise False
         :rtype: Boolean
         """
@@ -54,13 +102,18 @@ class KafkaProducer(StreamWriter):
         self.topic = topic
         self.schema_registry_url = schema_registry_url
         self.value_schema_filename = value_schema_filename
+        self.keyed = keyed
+        self.delivery_error_count = 0
         self._logger = logging.getLogger(__name__)
         self.config = {
             'bootstrap.servers': self.broker,
             'schema.registry.url': self.schema_registry_url,
-            'queue.buffering.max.ms': const.KAFKA_MAX_BUFFERED_MS,
+            'linger.ms': const.KAFKA_MAX_BUFFERED_MS,
             'queue.buffering.max.messages': const.KAFKA_MAX_BUFFERED_MSG,
+            'on_delivery': self._on_delivery,
         }
+        if producer_config:
+            self.config.update(producer_config)
 
         try:
             # read the avro schema file
@@ -71,8 +124,10 @@ class KafkaProducer(StreamWriter):
                 .format(file=self.value_schema_filename))
             raise
         try:
+            key_schema = avro.loads(KEY_SCHEMA) if self.keyed else None
             self._producer = AvroProducer(
                 self.config,
+                default_key_schema=key_schema,
                 default_value_schema=self.value_schema)
 
             self._logger.info("Opened stream output for writing: {}/{}, "
@@ -94,12 +149,24 @@ class KafkaProducer(StreamWriter):
                     schema_file=self.value_schema_filename))
             raise
 
-    def write(self, message):
-        """ Sends a message to the Kafka Topic """
+    def write(self, message, partition=None):
+        """ Sends a message to the Kafka Topic
+        :param dict message: The message to send
+        :param int partition: The partition of the topic to send the message
+            to, or None to leave it to the configured partitioner
+        """
 
         try:
             # send message to kafka topic
-            self._producer.produce(topic=self.topic, value=message)
+            kwargs = {}
+            if partition is not None:
+                kwargs['partition'] = partition
+
+            key = self._get_key(message)
+            if key is not None:
+                kwargs['key'] = key
+
+            self._producer.produce(topic=self.topic, value=message, **kwargs)
 
             # As per the recommendation:
             # https://github.com/confluentinc/confluent-kafka-python/issues/16
@@ -114,6 +181,22 @@ class KafkaProducer(StreamWriter):
                            .format(topic=self.topic))
         return True
 
+    def _get_key(self, message):
+        if not self.keyed or message.get("record_type") != const.DATA:
+            return None
+        return message.get("table_name")
+
+    def _on_delivery(self, err, message):
+        """Called from poll() and flush() with the outcome of sending each
+        message. Failures are only reported here, after librdkafka has
+        exhausted its retries
+        """
+        if err is not None:
+            self.delivery_error_count += 1
+            self._logger.error(
+                "Failed to deliver message to topic {topic} [{p}]: {err}"
+                .format(topic=self.topic, p=message.partition(), err=err))
+
     def flush(self):
         self._logger.info("Flushing kafka producer queue")
         self._producer.flush()
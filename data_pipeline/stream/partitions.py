@@ -0,0 +1,55 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+###############################################################################
+# Module:  partitions
+# Purpose: Maps CDC records onto the partitions of a stream
+#
+# Notes:   Records are partitioned by table so that all changes to a table
+#          are read back in the order they were written
+#
+###############################################################################
+
+import zlib
+
+
+def partition_for_table(table_name, partition_count):
+    """Returns the partition all records for the given table are written to
+    :param str table_name: The name of the source table
+    :param int partition_count: The number of partitions in the stream
+    """
+    # crc32 rather than hash() so the mapping is stable across processes
+    # and platforms
+    return (zlib.crc32(table_name.upper()) & 0xffffffff) % partition_count
+
+
+def get_apply_partitions(argv):
+    """Returns the partitions of the stream to be applied by this process
+    :param Namespace argv: Program args, with streampartitions being the
+        number of partitions in the stream and applypartitions the
+        partitions to apply. All partitions are applied if none are given
+    """
+    if not argv.applypartitions:
+        return range(argv.streampartitions)
+
+    for partition in argv.applypartitions:
+        if partition >= argv.streampartitions:
+            raise ValueError("Partition {p} is not one of the {n} stream "
+                             "partitions".format(p=partition,
+                                                 n=argv.streampartitions))
+
+    return sorted(set(argv.applypartitions))
@@ -28,6 +28,7 @@
 #
 ###############################################################################
 
+import copy
 import json
 import os
 import sys
@@ -47,6 +48,14 @@ def positive_int_type(x):
     return x
 
 
+def partition_count_type(x):
+    x = int(x)
+    if x < 1:
+        raise configargparse.ArgumentTypeError(
+            "A stream must have at least one partition")
+    return x
+
+
 def commitpoint_type(x):
     x = int(x)
     if x < const.MIN_COMMIT_POINT:
@@ -135,6 +144,12 @@ def parse_args(arg_list, mode):
         "--streamhost",
         nargs='?',
         help="stream host name / kafka cluster host")
+    common_args_parser.add_argument(
+        "--streampartitions",
+        type=partition_count_type,
+        default=1,
+        help=("number of partitions in the stream / kafka topic. Records "
+              "are partitioned by table"))
     common_args_parser.add_argument(
         "--streamschemahost",
         nargs='?',
@@ -226,6 +241,16 @@ def parse_args(arg_list, mode):
         default=1000,
         help=("when looping over a large number of records, "
               "this will log audit updates every given number of records"))
+    common_args_parser.add_argument(
+        "--auditflushinterval",
+        type=positive_int_type,
+        default=0,
+        help=("buffer process control audit updates, writing them in bulk "
+              "at most every given number of seconds. Process control "
+              "updates to a success, warning, skipped, error or killed "
+              "status, or to a new committed offset, are always written "
+              "immediately, with all buffered updates. 0 writes every "
+              "update immediately"))
     common_args_parser.add_argument(
         "--arraysize",
         nargs='?',
@@ -508,6 +533,130 @@ def parse_args(arg_list, mode):
                   "profile name and version which are currently in progress. "
                   "Use this to prevent multiple extract process from running "
                   "concurrently."))
+        extract_args_parser.add_argument(
+            "--deferrecordcount",
+            action="store_true",
+            help=("Omits COUNT(*) OVER() from the LogMiner contents query, "
+                  "so rows stream back without Oracle first materialising "
+                  "the entire result. The exact record count is then only "
+                  "sent with END_OF_BATCH, rather than START_OF_BATCH"))
+        extract_args_parser.add_argument(
+            "--miningprocesses",
+            nargs='?',
+            type=positive_int_type,
+            default=1,
+            help=("Maximum number of LogMiner sessions, each in its own "
+                  "process, to mine an SCN range with. The range is split "
+                  "on archived log boundaries, so catching up on a backlog "
+                  "of archived logs is mined in parallel"))
+        extract_args_parser.add_argument(
+            "--miningoverlaplogs",
+            nargs='?',
+            type=positive_int_type,
+            default=2,
+            help=("Number of archived logs before its sub-range that each "
+                  "parallel LogMiner session also mines, so transactions "
+                  "started that many logs before the sub-range are "
+                  "extracted whole. Should cover the longest running "
+                  "transaction"))
+        extract_args_parser.add_argument(
+            "--pollworkers",
+            nargs='?',
+            type=positive_int_type,
+            default=1,
+            help=("Maximum number of MSSQL tables whose CDC functions are "
+                  "queried concurrently, each over its own source "
+                  "connection. Limits the load placed on the source"))
+        extract_args_parser.add_argument(
+            "--netchanges",
+            action="store_true",
+            help=("Extract only the net change per row over each MSSQL "
+                  "extract window rather than every change. Inserts and "
+                  "updates are merged into upserts on the target. Tables "
+                  "whose capture instance was not enabled with "
+                  "@supports_net_changes fall back to all changes"))
+        extract_args_parser.add_argument(
+            "--streaming",
+            action="store_true",
+            help=("Keeps the extract running, extracting new CDCs in "
+                  "successive windows over the same source session rather "
+                  "than exiting after a single run"))
+        extract_args_parser.add_argument(
+            "--extractinterval",
+            nargs='?',
+            type=positive_int_type,
+            default=10,
+            help=("Seconds to wait between checks for new CDCs when "
+                  "--streaming is enabled"))
+        extract_args_parser.add_argument(
+            "--keycachefile",
+            nargs='?',
+            help=("JSON file in which the primary/unique key columns of "
+                  "the profile's tables are cached between runs, instead "
+                  "of being looked up from the source dictionary on every "
+                  "run. The cache is invalidated by CREATE/ALTER DDL"))
+        extract_args_parser.add_argument(
+            "--keycachettl",
+            nargs='?',
+            type=positive_int_type,
+            default=86400,
+            help=("Seconds after which cached key columns are looked up "
+                  "from the source again"))
+        extract_args_parser.add_argument(
+            "--producerprofile",
+            nargs='?',
+            choices=[const.PRODUCER_PROFILE_DEFAULT,
+                     const.PRODUCER_PROFILE_THROUGHPUT,
+                     const.PRODUCER_PROFILE_RELIABLE],
+            default=const.PRODUCER_PROFILE_DEFAULT,
+            help=("Kafka producer settings to start from. 'throughput' "
+                  "compresses and batches messages, 'reliable' adds "
+                  "idempotent delivery to 'throughput'"))
+        extract_args_parser.add_argument(
+            "--producercompression",
+            nargs='?',
+            choices=[const.COMPRESSION_NONE,
+                     const.COMPRESSION_GZIP,
+                     const.COMPRESSION_SNAPPY,
+                     const.COMPRESSION_LZ4,
+                     const.COMPRESSION_ZSTD],
+            help="Overrides the producer profile's compression codec")
+        extract_args_parser.add_argument(
+            "--producerlingerms",
+            type=positive_int_type,
+            help=("Overrides the producer profile's max milliseconds to wait "
+                  "for messages to fill a batch before sending it"))
+        extract_args_parser.add_argument(
+            "--producerbatchmessages",
+            type=positive_int_type,
+            help=("Overrides the producer profile's max number of messages "
+                  "sent in a batch"))
+        extract_args_parser.add_argument(
+            "--produceridempotence",
+            action="store_true",
+            help=("Enables idempotent delivery, so retried sends are never "
+                  "duplicated or reordered on the stream"))
+        extract_args_parser.add_argument(
+            "--producerkeys",
+            action="store_true",
+            help=("Keys each DATA message with its table name, so a table's "
+                  "messages share a partition and compress together"))
+        extract_args_parser.add_argument(
+            "--enveloperecords",
+            type=positive_int_type,
+            default=0,
+            help=("Max number of DATA records packed into a single stream "
+                  "message. 0 for no limit. Records are only packed if this "
+                  "or --envelopebytes is set"))
+        extract_args_parser.add_argument(
+            "--envelopebytes",
+            type=positive_int_type,
+            default=0,
+            help=("Max size in bytes of the string values of a stream "
+                  "message packing DATA records. A record that would take "
+                  "the message over it is packed into the next message. "
+                  "Keep below the producer's message.max.bytes. "
+                  "0 for no limit"))
         extract_args_parser.add_argument(
             "--extractnewtables",
             action="store_true",
@@ -553,6 +702,116 @@ def parse_args(arg_list, mode):
             type=int,
             default=50,
             help="max number of rows within a bulk insert")
+        applier_args_parser.add_argument(
+            "--bulkinsertcopy",
+            action="store_true",
+            help=("Bulk applies buffered inserts by streaming them to "
+                  "target via COPY rather than a multi-row INSERT statement. "
+                  "Requires --bulkapply"))
+        applier_args_parser.add_argument(
+            "--bulkapplyupdatedelete",
+            action="store_true",
+            help=("Extends --bulkapply to UPDATE and DELETE statements keyed "
+                  "on primary keys. These are COPY-loaded into a temporary "
+                  "staging table per target table, then applied with a "
+                  "single UPDATE ... FROM or DELETE ... USING statement"))
+        applier_args_parser.add_argument(
+            "--compactchanges",
+            action="store_true",
+            help=("Folds all changes to the same primary key between commit "
+                  "points into a single net change prior to applying to "
+                  "target. For example, an INSERT followed by a DELETE of "
+                  "the same row is not applied at all"))
+        applier_args_parser.add_argument(
+            "--preparedstatements",
+            action="store_true",
+            help=("Executes individually applied DML statements via "
+                  "prepared statements, one per table, operation and set "
+                  "of fields, binding values as parameters rather than "
+                  "inlining them as literals"))
+        applier_args_parser.add_argument(
+            "--preparedstatementlimit",
+            type=positive_int_type,
+            default=100,
+            help=("Max number of statements kept prepared on target when "
+                  "--preparedstatements is set. The least recently used "
+                  "statement is deallocated to make room for a new one. "
+                  "0 for no limit"))
+        applier_args_parser.add_argument(
+            "--pipelinedapply",
+            action="store_true",
+            help=("Parses messages read from the stream on a separate "
+                  "thread to the one executing them on target, so parsing "
+                  "overlaps with target round trips"))
+        applier_args_parser.add_argument(
+            "--redoparser",
+            nargs='?',
+            choices=[const.STATE_MACHINE_PARSER, const.TOKENIZER_PARSER],
+            default=const.STATE_MACHINE_PARSER,
+            help=("Engine used to parse Oracle INSERT, UPDATE and DELETE "
+                  "redo statements. 'tokenizer' jumps between quote and "
+                  "bracket boundaries rather than stepping through the "
+                  "redo a character at a time"))
+        applier_args_parser.add_argument(
+            "--shapecachesize",
+            type=positive_int_type,
+            default=1000,
+            help=("Max number of Oracle INSERT field lists cached across "
+                  "tables, so only the values of subsequent INSERTs with "
+                  "the same field list are parsed. 0 to disable"))
+        applier_args_parser.add_argument(
+            "--pipelinequeuesize",
+            type=positive_int_type,
+            default=1000,
+            help=("Max number of parsed messages waiting to be executed on "
+                  "target when --pipelinedapply is set"))
+        applier_args_parser.add_argument(
+            "--parseworkers",
+            type=positive_int_type,
+            default=0,
+            help=("Number of processes parsing messages consumed in batches "
+                  "of --consumebatchsize, ahead of a single thread applying "
+                  "them to target in stream offset order. Implies "
+                  "--pipelinedapply. 0 to parse on the consuming thread"))
+        applier_args_parser.add_argument(
+            "--applypartitions",
+            nargs='*',
+            type=positive_int_type,
+            help=("Stream partitions to apply, each in its own process. "
+                  "Defaults to all partitions. Use this to spread the "
+                  "partitions of a stream across applier instances"))
+        applier_args_parser.add_argument(
+            "--consumebatchsize",
+            type=positive_int_type,
+            default=0,
+            help=("Max number of messages to consume from the stream in a "
+                  "single call and apply together. "
+                  "0 to poll and apply one message at a time"))
+        applier_args_parser.add_argument(
+            "--persistenttargetconnection",
+            action="store_true",
+            help=("Keeps the target connection open between batches rather "
+                  "than reconnecting for every batch. The connection is "
+                  "health checked before reuse and transparently replaced "
+                  "if it fails"))
+        applier_args_parser.add_argument(
+            "--targetidletimeout",
+            type=positive_int_type,
+            default=300,
+            help=("Max number of seconds a persistent target connection may "
+                  "sit idle between batches and still be reused. "
+                  "0 for no limit"))
+        applier_args_parser.add_argument(
+            "--applyworkers",
+            type=positive_int_type,
+            default=1,
+            help=("Number of target connections to apply DML over in "
+                  "parallel. Statements are partitioned by table, so all "
+                  "changes to a table are applied in order on the same "
+                  "connection. Each connection commits separately, so a "
+                  "batch is no longer committed atomically on target. Not "
+                  "supported with --bulkinsertcopy, "
+                  "--bulkapplyupdatedelete or --preparedstatements"))
         applier_args_parser.add_argument(
             "--insertnull",
             action="store_true",
@@ -635,6 +894,58 @@ def parse_args(arg_list, mode):
     return parsed_args
 
 
+def rollover_workdirectory(parsed_args):
+    """Moves parsed_args onto a new datetime-stamped work directory under the
+    same base directory, without re-parsing the program args and config file
+    :param Namespace parsed_args: Program args, which are updated in place
+    :return: The updated program args
+    """
+    if not parsed_args.workdirectory:
+        return parsed_args
+
+    basedir = os.path.dirname(parsed_args.workdirectory)
+    parsed_args.workdirectory = filesystem_utils.append_datetime_dir(basedir)
+
+    return _move_file_args_to_workdirectory(parsed_args)
+
+
+def get_partition_args(parsed_args, partition):
+    """Returns a copy of parsed_args for applying a single stream partition.
+    Partitions of a partitioned stream each get a work directory of their
+    own under the base directory, so the processes applying them never
+    share log or output files
+    :param Namespace parsed_args: Program args
+    :param int partition: The stream partition to apply
+    :return: The program args of the partition
+    """
+    partition_args = copy.copy(parsed_args)
+    partition_args.applypartitions = [partition]
+
+    if partition_args.streampartitions <= 1:
+        return partition_args
+
+    if not partition_args.workdirectory:
+        return partition_args
+
+    (basedir, datetime_dir) = os.path.split(partition_args.workdirectory)
+    partition_args.workdirectory = os.path.join(
+        basedir,
+        const.PARTITION_DIRECTORY.format(partition=partition),
+        datetime_dir)
+
+    return _move_file_args_to_workdirectory(partition_args)
+
+
+def _move_file_args_to_workdirectory(parsed_args):
+    for file_attribute_name in ['outputfile', 'rawfile']:
+        filename_arg = getattr(parsed_args, file_attribute_name)
+        if filename_arg:
+            setattr(parsed_args, file_attribute_name,
+                    os.path.basename(filename_arg))
+
+    return prefix_workdirectory_to_file_args(parsed_args)
+
+
 def prefix_workdirectory_to_file_args(parsed_args):
     parsed_args = join_dir_and_file(parsed_args,
                                     parsed_args.workdirectory,
@@ -34,6 +34,7 @@ create table process_control (
 ,infolog                varchar(1024)
 ,errorlog               varchar(1024)
 ,applier_marker         bigint                   
+,executor_partition     integer
 ,object_list            text
 );
 
@@ -149,3 +150,8 @@ create table connections (
 );
 
 
+-- Upgrade of existing audit schemas. executor_partition is only read and
+-- written by appliers of partitioned streams (streampartitions > 1)
+alter table process_control add column if not exists executor_partition integer;
+
+
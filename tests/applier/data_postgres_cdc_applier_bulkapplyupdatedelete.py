@@ -0,0 +1,107 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import data_pipeline.constants.const as const
+from .data_common import TestCase, UPDATE_SSP_SQL
+
+
+tests=[
+  TestCase(
+    description="Consecutive updates staged then flushed by a delete",
+    input_table_name="CONNCT_CDC_PK5_COLS10",
+    input_commit_statements=[
+        '',
+        'update "SYS"."CONNCT_CDC_PK5_COLS10" set "COL_V_2" = \'26.9\' where "COMPNDPK_1" = \'26\'',
+        'update "SYS"."CONNCT_CDC_PK5_COLS10" set "COL_V_2" = \'27.9\' where "COMPNDPK_1" = \'27\'',
+        'delete from "SYS"."CONNCT_CDC_PK5_COLS10" where "COMPNDPK_1" = \'26\'',
+        ''],
+    input_record_types=[const.START_OF_BATCH, const.DATA, const.DATA, const.DATA, const.END_OF_BATCH],
+    input_operation_codes=['', const.UPDATE, const.UPDATE, const.DELETE, ''],
+    input_primary_key_fields="COMPNDPK_1",
+    input_record_counts=[0, 0, 0, 0, 3],
+    input_commit_lsns=[0, 0, 0, 0, 0],
+    expect_sql_execute_called=[
+        None,
+        None,
+        None,
+        "DROP TABLE connct_cdc_pk5_cols10_bulk_update",
+        "DROP TABLE connct_cdc_pk5_cols10_bulk_delete"],
+    expect_execute_called_times=[0, 0, 0, 3, 6],
+    expect_audit_db_execute_sql_called=[None, None, None, None, (UPDATE_SSP_SQL, ('CDCApply', 0, 'myprofile', 1, 'ctl', 'connct_cdc_pk5_cols10'))],
+    expect_commit_called_times=[0, 0, 0, 0, 1],
+    expect_insert_row_count=[0, 0, 0, 0, 0],
+    expect_update_row_count=[0, 0, 0, 2, 2],
+    expect_delete_row_count=[0, 0, 0, 0, 1],
+    expect_source_row_count=[0, 1, 2, 3, 3],
+    expect_batch_committed=[const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.COMMITTED]
+  )
+
+, TestCase(
+    description="Update of a key already staged flushes the staged updates",
+    input_table_name="CONNCT_CDC_PK5_COLS10",
+    input_commit_statements=[
+        '',
+        'update "SYS"."CONNCT_CDC_PK5_COLS10" set "COL_V_2" = \'26.9\' where "COMPNDPK_1" = \'26\'',
+        'update "SYS"."CONNCT_CDC_PK5_COLS10" set "COL_V_2" = \'26.8\' where "COMPNDPK_1" = \'26\'',
+        ''],
+    input_record_types=[const.START_OF_BATCH, const.DATA, const.DATA, const.END_OF_BATCH],
+    input_operation_codes=['', const.UPDATE, const.UPDATE, ''],
+    input_primary_key_fields="COMPNDPK_1",
+    input_record_counts=[0, 0, 0, 2],
+    input_commit_lsns=[0, 0, 0, 0],
+    expect_sql_execute_called=[
+        None,
+        None,
+        "DROP TABLE connct_cdc_pk5_cols10_bulk_update",
+        "DROP TABLE connct_cdc_pk5_cols10_bulk_update"],
+    expect_execute_called_times=[0, 0, 3, 6],
+    expect_audit_db_execute_sql_called=[None, None, None, (UPDATE_SSP_SQL, ('CDCApply', 0, 'myprofile', 1, 'ctl', 'connct_cdc_pk5_cols10'))],
+    expect_commit_called_times=[0, 0, 0, 1],
+    expect_insert_row_count=[0, 0, 0, 0],
+    expect_update_row_count=[0, 0, 1, 2],
+    expect_delete_row_count=[0, 0, 0, 0],
+    expect_source_row_count=[0, 1, 2, 2],
+    expect_batch_committed=[const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.COMMITTED]
+  )
+
+, TestCase(
+    description="Update without all primary keys in where clause is applied individually",
+    input_table_name="CONNCT_CDC_PK5_COLS10",
+    input_commit_statements=[
+        '',
+        'update "SYS"."CONNCT_CDC_PK5_COLS10" set "COL_V_2" = \'26.9\' where "COL_V_1" = \'26\'',
+        ''],
+    input_record_types=[const.START_OF_BATCH, const.DATA, const.END_OF_BATCH],
+    input_operation_codes=['', const.UPDATE, ''],
+    input_primary_key_fields="COMPNDPK_1",
+    input_record_counts=[0, 0, 1],
+    input_commit_lsns=[0, 0, 0],
+    expect_sql_execute_called=[
+        None,
+        "UPDATE ctl.CONNCT_CDC_PK5_COLS10 SET COL_V_2 = '26.9' WHERE COL_V_1 = '26'; -- lsn: 0, offset: 1",
+        None],
+    expect_execute_called_times=[0, 1, 1],
+    expect_audit_db_execute_sql_called=[None, None, (UPDATE_SSP_SQL, ('CDCApply', 0, 'myprofile', 1, 'ctl', 'connct_cdc_pk5_cols10'))],
+    expect_commit_called_times=[0, 0, 1],
+    expect_insert_row_count=[0, 0, 0],
+    expect_update_row_count=[0, 1, 1],
+    expect_delete_row_count=[0, 0, 0],
+    expect_source_row_count=[0, 1, 1],
+    expect_batch_committed=[const.UNCOMMITTED, const.UNCOMMITTED, const.COMMITTED]
+  )
+
+]
@@ -0,0 +1,85 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import data_pipeline.constants.const as const
+from .data_common import TestCase, UPDATE_SSP_SQL
+
+
+tests=[
+  TestCase(
+    description="Insert then update folded into a single insert, insert then delete folded away",
+    input_table_name="MY_TABLE",
+    input_commit_statements=[
+        '',
+        """insert into "SYS"."MY_TABLE"("ID","NAME","CITY") values ('1','a','x')""",
+        """update "SYS"."MY_TABLE" set "NAME" = 'b' where "ID" = '1' and "NAME" = 'a'""",
+        """insert into "SYS"."MY_TABLE"("ID","NAME","CITY") values ('2','c','y')""",
+        """delete from "SYS"."MY_TABLE" where "ID" = '2' and "NAME" = 'c'""",
+        ''],
+    input_record_types=[const.START_OF_BATCH, const.DATA, const.DATA, const.DATA, const.DATA, const.END_OF_BATCH],
+    input_operation_codes=['', const.INSERT, const.UPDATE, const.INSERT, const.DELETE, ''],
+    input_primary_key_fields="ID",
+    input_record_counts=[0, 0, 0, 0, 0, 4],
+    input_commit_lsns=[0, 0, 0, 0, 0, 0],
+    expect_sql_execute_called=[
+        None,
+        None,
+        None,
+        None,
+        None,
+        "INSERT INTO ctl.MY_TABLE ( CITY, ID, NAME ) VALUES ( 'x', '1', 'b' ); -- lsn: 0, offset: 1"],
+    expect_execute_called_times=[0, 0, 0, 0, 0, 1],
+    expect_audit_db_execute_sql_called=[None, None, None, None, None, (UPDATE_SSP_SQL, ('CDCApply', 0, 'myprofile', 1, 'ctl', 'my_table'))],
+    expect_commit_called_times=[0, 0, 0, 0, 0, 1],
+    expect_insert_row_count=[0, 0, 0, 0, 1, 2],
+    expect_update_row_count=[0, 0, 1, 1, 1, 1],
+    expect_delete_row_count=[0, 0, 0, 0, 1, 1],
+    expect_source_row_count=[0, 1, 2, 3, 4, 4],
+    expect_batch_committed=[const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.COMMITTED]
+  )
+
+, TestCase(
+    description="Updates folded into a single update, flushed by a statement without primary keys",
+    input_table_name="MY_TABLE",
+    input_commit_statements=[
+        '',
+        """update "SYS"."MY_TABLE" set "NAME" = 'b' where "ID" = '1' and "NAME" = 'a'""",
+        """update "SYS"."MY_TABLE" set "CITY" = 'z' where "ID" = '1' and "CITY" = 'x'""",
+        """update "SYS"."MY_TABLE" set "NAME" = 'd' where "NAME" = 'c'""",
+        ''],
+    input_record_types=[const.START_OF_BATCH, const.DATA, const.DATA, const.DATA, const.END_OF_BATCH],
+    input_operation_codes=['', const.UPDATE, const.UPDATE, const.UPDATE, ''],
+    input_primary_key_fields="ID",
+    input_record_counts=[0, 0, 0, 0, 3],
+    input_commit_lsns=[0, 0, 0, 0, 0],
+    expect_sql_execute_called=[
+        None,
+        None,
+        None,
+        "UPDATE ctl.MY_TABLE SET NAME = 'd' WHERE NAME = 'c'; -- lsn: 0, offset: 1",
+        None],
+    expect_execute_called_times=[0, 0, 0, 2, 2],
+    expect_audit_db_execute_sql_called=[None, None, None, None, (UPDATE_SSP_SQL, ('CDCApply', 0, 'myprofile', 1, 'ctl', 'my_table'))],
+    expect_commit_called_times=[0, 0, 0, 0, 1],
+    expect_insert_row_count=[0, 0, 0, 0, 0],
+    expect_update_row_count=[0, 0, 1, 3, 3],
+    expect_delete_row_count=[0, 0, 0, 0, 0],
+    expect_source_row_count=[0, 1, 2, 3, 3],
+    expect_batch_committed=[const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.UNCOMMITTED, const.COMMITTED]
+  )
+
+]
@@ -16,6 +16,7 @@
 # under the License.
 # 
 import pytest
+import signal
 
 import data_pipeline.apply as apply
 import data_pipeline.constants.const as const
@@ -44,3 +45,106 @@ def test_get_target_db(dbtype, mocker, setup):
 
     db = apply.get_target_db(mockargv)
     assert type(db).__name__.lower() == "{}db".format(dbtype.lower())
+
+
+def test_apply_partitions(mocker, setup):
+    (mockargv_config) = setup
+    mockargv_config = utils.merge_dicts(mockargv_config, {
+        "streampartitions": 3
+    })
+    mockargv = mocker.Mock(**mockargv_config)
+    mock_process = mocker.patch("data_pipeline.apply.Process")
+    mock_process.return_value.exitcode = 0
+
+    apply.apply_partitions(const.CDCAPPLY, mockargv, [0, 2])
+
+    # One process per partition, each applying only its own partition
+    # under its own work directory
+    partition_argvs = [kwargs['args'][1]
+                       for (args, kwargs) in mock_process.call_args_list]
+    assert [a.applypartitions for a in partition_argvs] == [[0], [2]]
+    assert len(set([a.workdirectory for a in partition_argvs])) == 2
+    assert len(set([a.outputfile for a in partition_argvs])) == 2
+    assert mock_process.return_value.start.call_count == 2
+    assert mock_process.return_value.join.call_count == 2
+
+
+@pytest.mark.parametrize("signum", [signal.SIGINT, signal.SIGTERM])
+def test_apply_partitions_forwards_signals(signum, mocker, setup):
+    (mockargv_config) = setup
+    mockargv_config = utils.merge_dicts(mockargv_config, {
+        "streampartitions": 2
+    })
+    mockargv = mocker.Mock(**mockargv_config)
+    processes = [mocker.Mock(pid=100 + i, exitcode=0) for i in range(2)]
+    mocker.patch("data_pipeline.apply.Process", side_effect=processes)
+    mock_kill = mocker.patch("data_pipeline.apply.os.kill")
+
+    previous_handler = signal.getsignal(signum)
+
+    def receive_signal():
+        signal.getsignal(signum)(signum, None)
+
+    # The signal arrives while the parent waits on its partition processes
+    processes[0].join.side_effect = receive_signal
+    processes[1].is_alive.return_value = False
+
+    apply.apply_partitions(const.CDCAPPLY, mockargv, [0, 1])
+
+    mock_kill.assert_called_once_with(100, signum)
+    for process in processes:
+        assert process.join.call_count == 1
+    assert signal.getsignal(signum) == previous_handler
+
+
+@pytest.mark.parametrize("parseworkers", [0, 2])
+def test_build_parse_pool(parseworkers, mocker, setup):
+    (mockargv_config) = setup
+    mockargv_config = utils.merge_dicts(mockargv_config, {
+        "sourcedbtype": const.ORACLE,
+        "parseworkers": parseworkers
+    })
+    mockargv = mocker.Mock(**mockargv_config)
+    mock_parse_pool = mocker.patch("data_pipeline.apply.ParsePool")
+
+    parse_pool = apply.build_parse_pool(mockargv)
+
+    if parseworkers:
+        assert parse_pool is mock_parse_pool.return_value
+    else:
+        assert parse_pool is None
+        assert mock_parse_pool.call_count == 0
+
+
+def test_apply_partition_with_parse_pool(mocker, setup):
+    (mockargv_config) = setup
+    mockargv_config = utils.merge_dicts(mockargv_config, {
+        "sourcedbtype": const.ORACLE,
+        "parseworkers": 2,
+        "applypartitions": [0],
+        "streampartitions": 1
+    })
+    mockargv = mocker.Mock(**mockargv_config)
+    calls = mocker.Mock()
+    mocker.patch("data_pipeline.apply.ParsePool", calls.ParsePool)
+    mocker.patch("data_pipeline.apply.build_applier", calls.build_applier)
+    mocker.patch("data_pipeline.apply.ApplyPipeline", calls.ApplyPipeline)
+    mock_build_consumer = mocker.patch(
+        "data_pipeline.apply.stream_factory.build_kafka_consumer")
+    mock_build_consumer.return_value.consumer_loop.side_effect = Exception
+
+    with pytest.raises(Exception):
+        apply.apply_partition(const.CDCAPPLY, mockargv)
+
+    # The pool is forked before the applier starts any threads, and only
+    # closed once the pipeline and applier have stopped
+    assert [name for (name, args, kwargs) in calls.mock_calls] == [
+        "ParsePool",
+        "build_applier",
+        "ApplyPipeline",
+        "ApplyPipeline().close",
+        "build_applier().close",
+        "ParsePool().close",
+    ]
+    (args, kwargs) = calls.ApplyPipeline.call_args
+    assert args[3] is calls.ParsePool.return_value
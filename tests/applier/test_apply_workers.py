@@ -0,0 +1,138 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+
+from data_pipeline.applier.apply_workers import ApplyWorkerPool
+from data_pipeline.applier.exceptions import ApplyError
+
+
+@pytest.fixture()
+def setup(mocker):
+    mock_dbs = []
+
+    def build_db():
+        mock_db = mocker.Mock()
+        mock_dbs.append(mock_db)
+        return mock_db
+
+    pool = ApplyWorkerPool(2, build_db)
+    pool.connect(mocker.Mock())
+    yield(pool, mock_dbs)
+    if pool.connected():
+        pool.close()
+
+
+def executed(mock_db):
+    return [args for (args, kwargs) in mock_db.execute.call_args_list]
+
+
+def test_connect(setup):
+    (pool, mock_dbs) = setup
+
+    assert pool.connected()
+    assert len(mock_dbs) == 2
+    for mock_db in mock_dbs:
+        assert mock_db.connect.call_count == 1
+
+
+def test_statements_for_a_table_executed_in_order_on_one_worker(setup):
+    (pool, mock_dbs) = setup
+
+    for i in range(50):
+        pool.execute('TABLE_A', "sql {}".format(i))
+    pool.execute('TABLE_A', "sql with values", ['a'])
+    pool.commit()
+
+    executed_dbs = [mock_db for mock_db in mock_dbs if executed(mock_db)]
+    assert len(executed_dbs) == 1
+
+    expected = [("sql {}".format(i),) for i in range(50)]
+    expected.append(("sql with values", ['a']))
+    assert executed(executed_dbs[0]) == expected
+
+    for mock_db in mock_dbs:
+        assert mock_db.commit.call_count == 1
+
+
+def test_worker_error_raised_on_commit(setup):
+    (pool, mock_dbs) = setup
+
+    for mock_db in mock_dbs:
+        mock_db.execute.side_effect = [Exception("boom"), None]
+
+    pool.execute('TABLE_A', "bad sql")
+    pool.execute('TABLE_A', "skipped sql")
+
+    with pytest.raises(ApplyError) as e:
+        pool.commit()
+
+    assert "boom" in str(e.value)
+
+    failed_dbs = [mock_db for mock_db in mock_dbs if executed(mock_db)]
+    assert len(failed_dbs) == 1
+    assert executed(failed_dbs[0]) == [("bad sql",)]
+    assert failed_dbs[0].rollback.call_count == 1
+
+    # The error stays in place, so the batch can never be committed
+    with pytest.raises(ApplyError):
+        pool.commit()
+
+    for mock_db in mock_dbs:
+        assert mock_db.commit.call_count == 0
+
+
+def test_worker_error_rolls_back_all_workers(setup):
+    (pool, mock_dbs) = setup
+
+    def execute(sql):
+        if sql == "bad sql":
+            raise Exception("boom")
+
+    for mock_db in mock_dbs:
+        mock_db.execute.side_effect = execute
+
+    # Find two tables assigned to different workers
+    tables = ['TABLE_{}'.format(i) for i in range(10)]
+    table_a = tables[0]
+    table_b = [t for t in tables
+               if pool._get_worker(t) is not pool._get_worker(table_a)][0]
+
+    pool.execute(table_a, "good sql")
+    pool.execute(table_b, "bad sql")
+
+    with pytest.raises(ApplyError):
+        pool.commit()
+
+    for mock_db in mock_dbs:
+        assert mock_db.rollback.call_count == 1
+        assert mock_db.commit.call_count == 0
+
+    # A new batch starts afresh
+    pool.close()
+    pool.connect(None)
+    pool.commit()
+
+
+def test_close(setup):
+    (pool, mock_dbs) = setup
+
+    pool.close()
+
+    assert not pool.connected()
+    for mock_db in mock_dbs:
+        assert mock_db.close.call_count == 1
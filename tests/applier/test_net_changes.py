@@ -0,0 +1,105 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+import data_pipeline.constants.const as const
+
+from data_pipeline.applier.net_changes import NetChanges
+from data_pipeline.sql.insert_statement import InsertStatement
+from data_pipeline.sql.update_statement import UpdateStatement
+from data_pipeline.sql.delete_statement import DeleteStatement
+from data_pipeline.sql.alter_statement import AlterStatement
+
+
+def insert(id, name):
+    return InsertStatement('MY_TABLE', {'ID': id, 'NAME': name}, ['ID'])
+
+
+def update(id, name):
+    return UpdateStatement('MY_TABLE', {'NAME': name}, {'ID': id}, ['ID'])
+
+
+def delete(id):
+    return DeleteStatement('MY_TABLE', {'ID': id}, ['ID'])
+
+
+def net_statements(net_changes):
+    return [str(statement) for (statement, lsn, offset) in net_changes.items()]
+
+
+def test_can_fold():
+    net_changes = NetChanges()
+
+    assert net_changes.can_fold(insert('1', 'a'))
+    assert net_changes.can_fold(update('1', 'a'))
+    assert net_changes.can_fold(delete('1'))
+    assert not net_changes.can_fold(AlterStatement('MY_TABLE'))
+    assert not net_changes.can_fold(
+        UpdateStatement('MY_TABLE', {'NAME': 'a'}, {'NAME': 'b'}, ['ID']))
+    assert not net_changes.can_fold(
+        UpdateStatement('MY_TABLE', {'ID': '2'}, {'ID': '1'}, ['ID']))
+    assert not net_changes.can_fold(
+        InsertStatement('MY_TABLE', {'ID': '1'}))
+
+
+def test_update_then_delete_folds_to_delete():
+    net_changes = NetChanges()
+
+    assert net_changes.add(update('1', 'a'), 1, 10) == []
+    folded = net_changes.add(delete('1'), 2, 11)
+
+    assert [s.statement_type for s in folded] == [const.UPDATE]
+    assert net_statements(net_changes) == ["DELETE FROM MY_TABLE WHERE ID = '1'"]
+    assert net_changes.count == 2
+    assert net_changes.start_offset == 10
+
+
+def test_delete_then_insert_kept_in_order():
+    net_changes = NetChanges()
+
+    net_changes.add(insert('2', 'x'), 1, 10)
+    net_changes.add(delete('1'), 2, 11)
+    net_changes.add(insert('1', 'a'), 3, 12)
+    net_changes.add(update('1', 'b'), 4, 13)
+
+    assert net_statements(net_changes) == [
+        "INSERT INTO MY_TABLE ( ID, NAME ) VALUES ( '2', 'x' )",
+        "DELETE FROM MY_TABLE WHERE ID = '1'",
+        "INSERT INTO MY_TABLE ( ID, NAME ) VALUES ( '1', 'b' )",
+    ]
+
+    net_changes.reset()
+    assert net_changes.empty()
+    assert net_statements(net_changes) == []
+
+
+def test_net_changes_in_order_of_last_change():
+    net_changes = NetChanges()
+
+    # The unique value held by row 1 is freed by its delete before row 2
+    # is inserted with it, and row 3 is only updated after row 2 exists
+    net_changes.add(update('1', 'a'), 1, 10)
+    net_changes.add(update('3', 'b'), 2, 11)
+    net_changes.add(delete('1'), 3, 12)
+    net_changes.add(insert('2', 'a'), 4, 13)
+    net_changes.add(update('3', 'c'), 5, 14)
+
+    assert [(str(s), offset) for (s, lsn, offset) in net_changes.items()] == [
+        ("DELETE FROM MY_TABLE WHERE ID = '1'", 12),
+        ("INSERT INTO MY_TABLE ( ID, NAME ) VALUES ( '2', 'a' )", 13),
+        ("UPDATE MY_TABLE SET NAME = 'c' WHERE ID = '3'", 14),
+    ]
@@ -0,0 +1,129 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import os
+import pytest
+import signal
+import time
+import data_pipeline.constants.const as const
+
+from data_pipeline.applier.parse_pool import ParsePool
+from data_pipeline.applier.pipeline import ApplyPipeline, parse
+from data_pipeline.processor.exceptions import UnsupportedSqlError
+from data_pipeline.processor.oracle_cdc_processor import OracleCdcProcessor
+from data_pipeline.stream.envelope import pack
+from .test_pipeline import build_stream_message, build_batch, setup
+
+
+@pytest.fixture()
+def parse_pool(mocker):
+    argv = mocker.Mock(parseworkers=2,
+                       sourcedbtype=const.ORACLE,
+                       metacols=None,
+                       redoparser=const.STATE_MACHINE_PARSER,
+                       shapecachesize=10)
+    pool = ParsePool(OracleCdcProcessor(None), argv)
+    yield pool
+    pool.close()
+
+
+def build_inserts(mocker, count):
+    return [build_stream_message(
+        mocker, offset, const.DATA, const.INSERT,
+        """insert into "SYS"."MY_TABLE"("ID","NAME") values ('{i}','a')"""
+        .format(i=offset))
+        for offset in range(count)]
+
+
+def test_parse_many_preserves_offset_order(mocker, parse_pool):
+    stream_messages = build_inserts(mocker, 100)
+
+    parsed = parse_pool.parse_many(stream_messages)
+
+    assert [p.statement.get_field_values()['ID'] for p in parsed] == [
+        str(m.offset()) for m in stream_messages]
+
+
+def test_parse_many_matches_parse(mocker, parse_pool):
+    batch = build_batch(mocker)
+    envelope = mocker.Mock(**{
+        'value.return_value': pack([m.value() for m in batch[1:3]]),
+        'offset.return_value': 11})
+    rejected = build_stream_message(
+        mocker, 12, const.DATA, const.DDL,
+        "alter table MY_TABLE rename column A to B")
+    stream_messages = batch[:3] + [envelope, rejected, batch[3]]
+
+    parsed = parse_pool.parse_many(stream_messages)
+    expected = [parse(OracleCdcProcessor(None), m) for m in stream_messages]
+
+    def describe(p):
+        if isinstance(p, list):
+            return [describe(r) for r in p]
+        return (vars(p.message), str(p.statement), type(p.error))
+
+    assert [describe(p) for p in parsed] == [describe(p) for p in expected]
+    assert type(parsed[4].error) == UnsupportedSqlError
+    assert parsed[1].statement.shape is None
+
+
+def test_pipelined_apply_many_with_parse_pool(mocker, setup, parse_pool):
+    (pipeline, applier, mock_target_db) = setup
+    pipeline = ApplyPipeline(applier, OracleCdcProcessor(None), 2, parse_pool)
+
+    statuses = [pipeline.apply_many(build_batch(mocker))]
+    pipeline.wait()
+    statuses.append(pipeline.collect_status())
+
+    assert const.COMMITTED in statuses
+    assert pipeline.next_offset_to_commit == 14
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        "INSERT INTO ctl.MY_TABLE ( ID, NAME ) VALUES ( '1', 'a' ); -- lsn: 11, offset: 11",
+        "DELETE FROM ctl.MY_TABLE WHERE ID = '1'; -- lsn: 12, offset: 12",
+    ]
+
+
+def test_pool_restores_parent_signal_handlers(mocker):
+    def handler(signum, frame):
+        pass
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        argv = mocker.Mock(parseworkers=1,
+                           sourcedbtype=const.ORACLE,
+                           metacols=None,
+                           redoparser=const.STATE_MACHINE_PARSER,
+                           shapecachesize=10)
+        pool = ParsePool(OracleCdcProcessor(None), argv)
+        pool.close()
+
+        assert signal.getsignal(signal.SIGINT) == handler
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def test_workers_leave_signals_to_the_parent(mocker, parse_pool):
+    # A Ctrl-C reaches the whole process group, but only the parent acts
+    # on it, closing the pool on exit
+    workers = list(parse_pool._pool._pool)
+    for worker in workers:
+        os.kill(worker.pid, signal.SIGINT)
+    time.sleep(0.2)
+
+    assert all([worker.is_alive() for worker in workers])
+    assert len(parse_pool.parse_many(build_inserts(mocker, 10))) == 10
@@ -0,0 +1,203 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+import threading
+import time
+import data_pipeline.constants.const as const
+import cdc_applier_test_utils as cdc_utils
+
+from data_pipeline.applier.pipeline import ApplyPipeline, parse
+from data_pipeline.applier.postgres_cdc_applier import PostgresCdcApplier
+from data_pipeline.processor.oracle_cdc_processor import OracleCdcProcessor
+from data_pipeline.stream.oracle_message import OracleMessage
+from data_pipeline.stream.envelope import pack
+
+
+@pytest.fixture()
+def setup(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, None, None, None)
+
+    applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+    pipeline = ApplyPipeline(applier, OracleCdcProcessor(None), 2)
+
+    yield (pipeline, applier, mock_target_db)
+
+
+def build_stream_message(mocker, offset, record_type, operation_code='', statement=''):
+    oracle_message = OracleMessage()
+    oracle_message.record_type = record_type
+    oracle_message.operation_code = operation_code
+    oracle_message.table_name = 'MY_TABLE'
+    oracle_message.commit_statement = statement
+    oracle_message.primary_key_fields = 'ID'
+    oracle_message.record_count = 2
+    oracle_message.commit_lsn = offset
+
+    config = {'value.return_value': oracle_message.serialise(),
+              'offset.return_value': offset}
+    return mocker.Mock(**config)
+
+
+def build_batch(mocker):
+    return [
+        build_stream_message(mocker, 10, const.START_OF_BATCH),
+        build_stream_message(mocker, 11, const.DATA, const.INSERT,
+            """insert into "SYS"."MY_TABLE"("ID","NAME") values ('1','a')"""),
+        build_stream_message(mocker, 12, const.DATA, const.DELETE,
+            """delete from "SYS"."MY_TABLE" where "ID" = '1'"""),
+        build_stream_message(mocker, 13, const.END_OF_BATCH),
+    ]
+
+
+def test_parse(mocker):
+    parsed = parse(OracleCdcProcessor(None), build_stream_message(
+        mocker, 1, const.DATA, const.DELETE,
+        """delete from "SYS"."MY_TABLE" where "ID" = '1'"""))
+
+    assert parsed.message.table_name == 'MY_TABLE'
+    assert str(parsed.statement) == "DELETE FROM MY_TABLE WHERE ID = '1'"
+    assert parsed.error is None
+
+    parsed = parse(OracleCdcProcessor(None),
+                   build_stream_message(mocker, 1, const.START_OF_BATCH))
+    assert parsed.statement is None
+
+
+def test_pipelined_apply(mocker, setup):
+    (pipeline, applier, mock_target_db) = setup
+
+    statuses = [pipeline.apply(m) for m in build_batch(mocker)]
+    pipeline.wait()
+    statuses.append(pipeline.collect_status())
+
+    # The batch's commit is only reported once executed: by the final
+    # collect, or by the last apply() if the executor got there first
+    assert const.COMMITTED in statuses[-2:]
+    assert statuses.count(const.COMMITTED) == 1
+    assert pipeline.next_offset_to_commit == 14
+    assert pipeline.next_offset_to_read == 14
+
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        "INSERT INTO ctl.MY_TABLE ( ID, NAME ) VALUES ( '1', 'a' ); -- lsn: 11, offset: 11",
+        "DELETE FROM ctl.MY_TABLE WHERE ID = '1'; -- lsn: 12, offset: 12",
+    ]
+    assert mock_target_db.commit.call_count == 1
+    assert pipeline.collect_status() == const.UNCOMMITTED
+
+
+def test_recovery_offset_tracks_executed_messages(mocker, setup):
+    (pipeline, applier, mock_target_db) = setup
+
+    batch = build_batch(mocker)
+    for m in batch[:2]:
+        pipeline.apply(m)
+    pipeline.wait()
+
+    # Only the executed messages are reflected, however far parsing is ahead
+    assert applier.recovery_offset == 11
+    assert pipeline.next_offset_to_commit is None
+
+
+def test_pipeline_stops_on_error(mocker, setup):
+    (pipeline, applier, mock_target_db) = setup
+    mock_apply = mocker.patch.object(applier, 'apply',
+                                     side_effect=[const.ERROR, const.COMMITTED])
+
+    statuses = [pipeline.apply(build_stream_message(mocker, 1, const.START_OF_BATCH)),
+                pipeline.apply(build_stream_message(mocker, 2, const.END_OF_BATCH))]
+    pipeline.wait()
+    statuses.append(pipeline.collect_status())
+
+    assert const.ERROR in statuses
+    assert const.COMMITTED not in statuses
+    assert mock_apply.call_count == 1
+    assert pipeline.next_offset_to_commit is None
+
+
+def test_discard_pending(mocker, setup):
+    (pipeline, applier, mock_target_db) = setup
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_apply(stream_message, parsed_message):
+        started.set()
+        release.wait()
+        return const.UNCOMMITTED
+
+    mock_apply = mocker.patch.object(applier, 'apply', side_effect=slow_apply)
+
+    pipeline.apply(build_stream_message(mocker, 1, const.START_OF_BATCH))
+    started.wait()
+    pipeline.apply(build_stream_message(mocker, 2, const.END_OF_BATCH))
+
+    discard_thread = threading.Thread(target=pipeline.discard_pending)
+    discard_thread.start()
+    time.sleep(0.1)
+    release.set()
+    discard_thread.join()
+
+    # The in-flight message completes, the queued one is discarded
+    assert mock_apply.call_count == 1
+
+    pipeline.apply(build_stream_message(mocker, 2, const.END_OF_BATCH))
+    pipeline.wait()
+    assert mock_apply.call_count == 2
+
+
+def test_pipelined_apply_many(mocker, setup):
+    (pipeline, applier, mock_target_db) = setup
+
+    statuses = [pipeline.apply_many(build_batch(mocker))]
+    pipeline.wait()
+    statuses.append(pipeline.collect_status())
+
+    assert const.COMMITTED in statuses
+    assert pipeline.next_offset_to_commit == 14
+    assert mock_target_db.commit.call_count == 1
+
+
+def test_pipelined_apply_envelope(mocker, setup):
+    (pipeline, applier, mock_target_db) = setup
+
+    batch = build_batch(mocker)
+    envelope = mocker.Mock(**{
+        'value.return_value': pack([m.value() for m in batch[1:3]]),
+        'offset.return_value': 11})
+
+    parsed = parse(OracleCdcProcessor(None), envelope)
+    assert [str(p.statement) for p in parsed] == [
+        "INSERT INTO MY_TABLE ( ID, NAME ) VALUES ( '1', 'a' )",
+        "DELETE FROM MY_TABLE WHERE ID = '1'",
+    ]
+
+    statuses = [pipeline.apply(m) for m in [batch[0], envelope, batch[3]]]
+    pipeline.wait()
+    statuses.append(pipeline.collect_status())
+
+    assert const.COMMITTED in statuses
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        "INSERT INTO ctl.MY_TABLE ( ID, NAME ) VALUES ( '1', 'a' ); -- lsn: 11, offset: 11",
+        "DELETE FROM ctl.MY_TABLE WHERE ID = '1'; -- lsn: 12, offset: 11",
+    ]
@@ -19,13 +19,16 @@ import confluent_kafka
 import importlib
 import pytest
 import json
+import signal
 import smtplib
 import data_pipeline.constants.const as const
 import cdc_applier_test_utils as cdc_utils
 
 from pytest_mock import mocker
 from data_pipeline.stream.oracle_message import OracleMessage
+from data_pipeline.stream.envelope import pack
 from data_pipeline.applier.postgres_cdc_applier import PostgresCdcApplier
+from data_pipeline.applier.exceptions import ApplyError
 from data_pipeline.db.db import Db
 
 
@@ -124,6 +127,54 @@ def setup_bulkapply(tmpdir, mocker):
     yield(PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory), mock_target_db, mock_audit_db)
 
 
+@pytest.fixture()
+def setup_bulkapplyupdatedelete(tmpdir, mocker):
+    bulk_apply_config = { 'bulkapply': True, 'bulkapplyupdatedelete': True }
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, None, None, bulk_apply_config)
+
+    yield(PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory), mock_target_db, mock_audit_db)
+
+
+@pytest.fixture(params=[None, { 'insert_timestamp_column': 'ctl_ins_ts' }])
+def setup_bulkinsertcopy(request, tmpdir, mocker):
+    bulk_apply_config = { 'bulkapply': True, 'bulkinsertcopy': True }
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, request.param, None, bulk_apply_config)
+
+    yield(PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory), mock_target_db, request.param)
+
+
+@pytest.fixture()
+def setup_compactchanges(tmpdir, mocker):
+    compact_changes_config = { 'compactchanges': True }
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, None, None, compact_changes_config)
+
+    yield(PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory), mock_target_db, mock_audit_db)
+
+
+@pytest.fixture()
+def setup_preparedstatements(tmpdir, mocker):
+    prepared_statements_config = { 'preparedstatements': True }
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, None, None, prepared_statements_config)
+
+    yield(PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory), mock_target_db, mock_audit_db)
+
+
 @pytest.fixture()
 def setup_inactive_applied_tables(tmpdir, mocker):
     inactive_applied_tables = set()
@@ -167,6 +218,170 @@ def test_bulkapply(data_postgres_cdc_applier_bulkapply, mocker, setup_bulkapply)
     cdc_utils.execute_tests(postgres_applier, data_postgres_cdc_applier_bulkapply, mocker, mock_target_db, mock_audit_db)
 
 
+def test_bulkapplyupdatedelete(data_postgres_cdc_applier_bulkapplyupdatedelete, mocker, setup_bulkapplyupdatedelete):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup_bulkapplyupdatedelete
+    cdc_utils.execute_tests(postgres_applier, data_postgres_cdc_applier_bulkapplyupdatedelete, mocker, mock_target_db, mock_audit_db)
+
+
+def _apply_oracle_message(postgres_applier, mocker, record_type, operation_code='', statement='', lsn=0):
+    return postgres_applier.apply(
+        _build_oracle_message(mocker, record_type, operation_code, statement, lsn))
+
+
+def _build_oracle_message(mocker, record_type, operation_code='', statement='', lsn=0, offset=1):
+    oracle_message = OracleMessage()
+    oracle_message.record_type = record_type
+    oracle_message.operation_code = operation_code
+    oracle_message.table_name = 'MY_TABLE'
+    oracle_message.commit_statement = statement
+    oracle_message.primary_key_fields = 'ID'
+    oracle_message.record_count = 2
+    oracle_message.commit_lsn = lsn
+
+    config = {'value.return_value': oracle_message.serialise(),
+              'offset.return_value': offset}
+    return mocker.Mock(**config)
+
+
+def test_bulkapplyupdatedelete_staging_sql(mocker, setup_bulkapplyupdatedelete):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup_bulkapplyupdatedelete
+
+    copied = []
+    def copy_expert_se(input_file, table_name, **kwargs):
+        copied.append((table_name, kwargs['column_list'], input_file.getvalue()))
+    mock_target_db.copy_expert.side_effect = copy_expert_se
+
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.UPDATE,
+        """update "SYS"."MY_TABLE" set "NAME" = 'it''s' where "ID" = '1' and "NAME" = 'a'""")
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.UPDATE,
+        """update "SYS"."MY_TABLE" set "NAME" = NULL where "ID" = '2' and "NAME" = 'b'""")
+    _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH)
+
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        "CREATE TEMP TABLE my_table_bulk_update AS SELECT ID AS k0, NAME AS v0 FROM ctl.MY_TABLE WITH NO DATA",
+        "UPDATE ctl.MY_TABLE t SET NAME = s.v0 FROM my_table_bulk_update s WHERE t.ID = s.k0; -- lsn: 0, offset: 1",
+        "DROP TABLE my_table_bulk_update",
+    ]
+
+    q = const.COPY_QUOTE_CHAR
+    d = const.FIELD_DELIMITER
+    assert copied == [(
+        "my_table_bulk_update",
+        ["k0", "v0"],
+        "{q}1{q}{d}{q}it's{q}\n{q}2{q}{d}\n".format(q=q, d=d))]
+
+    assert mock_target_db.commit.call_count == 1
+
+
+def test_bulkinsertcopy(mocker, setup_bulkinsertcopy):
+    (postgres_applier, mock_target_db, metacols) = setup_bulkinsertcopy
+
+    copied = []
+    def copy_expert_se(input_file, table_name, **kwargs):
+        copied.append((table_name, kwargs['column_list'], input_file.getvalue()))
+    mock_target_db.copy_expert.side_effect = copy_expert_se
+
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.INSERT,
+        """insert into "SYS"."MY_TABLE"("ID","NAME") values ('1','it''s')""")
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.INSERT,
+        """insert into "SYS"."MY_TABLE"("ID","NAME") values ('2',NULL)""")
+
+    assert mock_target_db.copy_expert.call_count == 0
+
+    _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH)
+
+    q = const.COPY_QUOTE_CHAR
+    d = const.FIELD_DELIMITER
+    payload = "{q}1{q}{d}{q}it's{q}\n{q}2{q}{d}\n".format(q=q, d=d)
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+
+    if metacols:
+        assert copied == [("my_table_bulk_insert", ["v0", "v1"], payload)]
+        assert executed == [
+            "CREATE TEMP TABLE my_table_bulk_insert AS SELECT ID AS v0, NAME AS v1 FROM ctl.MY_TABLE WITH NO DATA",
+            "INSERT INTO ctl.MY_TABLE ( ID, NAME, CTL_INS_TS ) SELECT s.v0, s.v1, (SELECT CURRENT_TIMESTAMP) FROM my_table_bulk_insert s; -- lsn: 0, offset: 1",
+            "DROP TABLE my_table_bulk_insert",
+        ]
+    else:
+        assert copied == [("ctl.MY_TABLE", ["ID", "NAME"], payload)]
+        assert executed == []
+
+    assert postgres_applier.get_pcd('MY_TABLE').insert_row_count == 2
+    assert mock_target_db.commit.call_count == 1
+
+
+def test_compactchanges(data_postgres_cdc_applier_compactchanges, mocker, setup_compactchanges):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup_compactchanges
+    cdc_utils.execute_tests(postgres_applier, data_postgres_cdc_applier_compactchanges, mocker, mock_target_db, mock_audit_db)
+
+
+def test_preparedstatements(mocker, setup_preparedstatements):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup_preparedstatements
+
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.INSERT,
+        """insert into "SYS"."MY_TABLE"("ID","NAME") values ('1','it''s 100%')""")
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.INSERT,
+        """insert into "SYS"."MY_TABLE"("ID","NAME") values ('2',NULL)""")
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.UPDATE,
+        """update "SYS"."MY_TABLE" set "NAME" = 'b' where "ID" = '1' and "NAME" IS NULL""")
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.DELETE,
+        """delete from "SYS"."MY_TABLE" where "ID" = '2'""")
+    _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH)
+
+    executed = [args for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        ("PREPARE dp_stmt_0 AS INSERT INTO ctl.MY_TABLE ( ID, NAME ) VALUES ( $1, $2 )",),
+        ("EXECUTE dp_stmt_0 ( %s, %s ); -- lsn: 0, offset: 1", ['1', "it's 100%"]),
+        ("EXECUTE dp_stmt_0 ( %s, %s ); -- lsn: 0, offset: 1", ['2', None]),
+        ("PREPARE dp_stmt_1 AS UPDATE ctl.MY_TABLE SET NAME = $1 WHERE ID = $2",),
+        ("EXECUTE dp_stmt_1 ( %s, %s ); -- lsn: 0, offset: 1", ['b', '1']),
+        ("PREPARE dp_stmt_2 AS DELETE FROM ctl.MY_TABLE WHERE ID = $1",),
+        ("EXECUTE dp_stmt_2 ( %s ); -- lsn: 0, offset: 1", ['2']),
+    ]
+
+    pcd = postgres_applier.get_pcd('MY_TABLE')
+    assert (pcd.insert_row_count, pcd.update_row_count, pcd.delete_row_count) == (2, 1, 1)
+    assert mock_target_db.commit.call_count == 1
+
+
+def test_preparedstatementlimit(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(
+         tmpdir, mocker, None, None,
+         {'preparedstatements': True, 'preparedstatementlimit': 2})
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+    for statement in [
+            """delete from "SYS"."MY_TABLE" where "ID" = '1'""",
+            """delete from "SYS"."MY_TABLE" where "NAME" = 'a'""",
+            """delete from "SYS"."MY_TABLE" where "ID" = '2'""",
+            """delete from "SYS"."MY_TABLE" where "CITY" = 'b'"""]:
+        _apply_oracle_message(postgres_applier, mocker, const.DATA, const.DELETE, statement)
+    _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH)
+
+    # Reusing dp_stmt_0 makes dp_stmt_1 the least recently used
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        "PREPARE dp_stmt_0 AS DELETE FROM ctl.MY_TABLE WHERE ID = $1",
+        "EXECUTE dp_stmt_0 ( %s ); -- lsn: 0, offset: 1",
+        "PREPARE dp_stmt_1 AS DELETE FROM ctl.MY_TABLE WHERE NAME = $1",
+        "EXECUTE dp_stmt_1 ( %s ); -- lsn: 0, offset: 1",
+        "EXECUTE dp_stmt_0 ( %s ); -- lsn: 0, offset: 1",
+        "DEALLOCATE dp_stmt_1",
+        "PREPARE dp_stmt_2 AS DELETE FROM ctl.MY_TABLE WHERE CITY = $1",
+        "EXECUTE dp_stmt_2 ( %s ); -- lsn: 0, offset: 1",
+    ]
+
+
 def test_apply_batch_state(data_postgres_cdc_applier_batch_state, mocker, setup):
     (postgres_applier, mock_target_db, mock_audit_db) = setup
     cdc_utils.execute_batch_state_tests(postgres_applier, data_postgres_cdc_applier_batch_state, mocker, mock_target_db)
@@ -297,3 +512,300 @@ def test_plainsql_update_perf(mocker):
 
     t = Timer(lambda: update_pc())
     print t.timeit(number=50)
+
+
+def test_applyworkers_not_supported_with_session_state(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(
+         tmpdir, mocker, None, None,
+         {'applyworkers': 2, 'preparedstatements': True})
+
+    with pytest.raises(ApplyError):
+        PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+
+def test_applyworkers(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(
+         tmpdir, mocker, None, None, {'applyworkers': 2})
+
+    mock_worker_db = mocker.Mock()
+    mocker.patch('data_pipeline.applier.postgres_cdc_applier.db_factory.build',
+                 return_value=mock_worker_db)
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.INSERT,
+        """insert into "SYS"."MY_TABLE"("ID","NAME") values ('1','a')""")
+    _apply_oracle_message(postgres_applier, mocker, const.DATA, const.DELETE,
+        """delete from "SYS"."MY_TABLE" where "ID" = '1'""")
+    _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH)
+
+    assert mock_target_db.execute.call_count == 0
+    assert mock_target_db.commit.call_count == 1
+
+    # Both workers share the mock db, but only one receives MY_TABLE's SQL
+    assert mock_worker_db.connect.call_count == 2
+    assert [args for (args, kwargs) in mock_worker_db.execute.call_args_list] == [
+        ("INSERT INTO ctl.MY_TABLE ( ID, NAME ) VALUES ( '1', 'a' ); -- lsn: 0, offset: 1",),
+        ("DELETE FROM ctl.MY_TABLE WHERE ID = '1'; -- lsn: 0, offset: 1",),
+    ]
+    assert mock_worker_db.commit.call_count == 2
+    assert mock_worker_db.close.call_count == 2
+
+
+def test_applyworkers_connected_once_per_batch(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(
+         tmpdir, mocker, None, None, {'applyworkers': 2})
+
+    mock_build = mocker.patch(
+        'data_pipeline.applier.postgres_cdc_applier.db_factory.build',
+        return_value=mocker.Mock())
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+    # The batch never ends, so its workers are never closed
+    postgres_applier._target_connection.release()
+    postgres_applier._batch_started = False
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+
+    assert len(postgres_applier._apply_workers._workers) == 2
+    assert mock_build.call_count == 2
+
+    postgres_applier._apply_workers.close()
+
+
+def test_applyworkers_failure_commits_nothing(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(
+         tmpdir, mocker, None, None, {'applyworkers': 2, 'retry': 1,
+                                      'retrypause': 0})
+
+    def execute(sql, *args):
+        if "'bad'" in sql:
+            raise Exception("duplicate key")
+
+    mock_worker_dbs = []
+    def build_db(dbtype):
+        mock_worker_db = mocker.Mock(**{'execute.side_effect': execute})
+        mock_worker_dbs.append(mock_worker_db)
+        return mock_worker_db
+
+    mocker.patch('data_pipeline.applier.postgres_cdc_applier.db_factory.build',
+                 side_effect=build_db)
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    statuses = [
+        _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH),
+        _apply_oracle_message(postgres_applier, mocker, const.DATA, const.INSERT,
+            """insert into "SYS"."MY_TABLE"("ID","NAME") values ('1','bad')"""),
+        _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH),
+    ]
+
+    # Retrying the end of batch must not commit the rolled back batch
+    assert statuses[-1] == const.ERROR
+    assert mock_target_db.commit.call_count == 0
+    for mock_worker_db in mock_worker_dbs:
+        assert mock_worker_db.commit.call_count == 0
+    assert postgres_applier._pc.executor_status != const.COMMITTED
+
+
+def test_persistenttargetconnection(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(
+         tmpdir, mocker, None, None,
+         {'persistenttargetconnection': True, 'preparedstatements': True})
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    for i in range(2):
+        _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+        _apply_oracle_message(postgres_applier, mocker, const.DATA, const.DELETE,
+            """delete from "SYS"."MY_TABLE" where "ID" = '1'""")
+        _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH)
+
+    assert mock_target_db.connect.call_count == 1
+    assert mock_target_db.close.call_count == 0
+    assert mock_target_db.commit.call_count == 2
+
+    # The statement prepared in the first batch is still live in the session
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        "PREPARE dp_stmt_0 AS DELETE FROM ctl.MY_TABLE WHERE ID = $1",
+        "EXECUTE dp_stmt_0 ( %s ); -- lsn: 0, offset: 1",
+        "EXECUTE dp_stmt_0 ( %s ); -- lsn: 0, offset: 1",
+    ]
+
+
+def test_batch_rollover_reloads_config_only_on_sighup(mocker, setup):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup
+
+    mock_get_program_args = mocker.patch(
+        'data_pipeline.applier.applier.get_program_args',
+        return_value=postgres_applier._argv)
+    mock_get_inactive_applied_tables = mocker.patch(
+        'data_pipeline.applier.applier.get_inactive_applied_tables',
+        return_value=set())
+
+    def apply_batch():
+        _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+        _apply_oracle_message(postgres_applier, mocker, const.END_OF_BATCH)
+
+    apply_batch()
+    apply_batch()
+    assert mock_get_program_args.call_count == 0
+    assert mock_get_inactive_applied_tables.call_count == 0
+
+    postgres_applier.request_reload(signal.SIGHUP, None)
+    apply_batch()
+    assert mock_get_program_args.call_count == 1
+    assert mock_get_inactive_applied_tables.call_count == 1
+
+    apply_batch()
+    assert mock_get_program_args.call_count == 1
+
+
+def test_apply_many_checks_commit_points_once(mocker, setup):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup
+    postgres_applier._argv.targetcommitpoint = 2
+    postgres_applier._argv.auditcommitpoint = 2
+
+    insert = """insert into "SYS"."MY_TABLE"("ID") values ('1')"""
+    messages = [_build_oracle_message(mocker, const.START_OF_BATCH, offset=0)]
+    messages += [_build_oracle_message(mocker, const.DATA, const.INSERT, insert, offset=i)
+                 for i in range(1, 6)]
+
+    # Two target commit points are crossed, but only one commit is made
+    assert postgres_applier.apply_many(messages) == const.UNCOMMITTED
+    assert mock_target_db.commit.call_count == 1
+    assert postgres_applier.next_offset_to_commit is None
+
+    end_of_batch = _build_oracle_message(mocker, const.END_OF_BATCH, offset=6)
+    remaining = [end_of_batch,
+                 _build_oracle_message(mocker, const.START_OF_BATCH, offset=7)]
+    assert postgres_applier.apply_many(remaining) == const.COMMITTED
+    assert mock_target_db.commit.call_count == 2
+
+    # Only the messages up to the end of the committed batch may be committed
+    assert postgres_applier.next_offset_to_commit == 7
+
+
+def test_recovers_from_partition_offsets(tmpdir, mocker):
+    partition_config = {'streampartitions': 4, 'applypartitions': [2]}
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, None, None, partition_config)
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    (args, kwargs) = mock_audit_db.execute_query.call_args
+    assert "AND executor_partition = %s" in args[0]
+    assert args[2][-1] == 2
+
+    mock_audit_db.execute.assert_called_once_with(
+        "UPDATE ctl.process_control SET executor_partition = %s WHERE id = %s",
+        (2, postgres_applier.process_control.id))
+
+
+def test_unpartitioned_stream_ignores_executor_partition(tmpdir, mocker):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, None, None, None)
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    (args, kwargs) = mock_audit_db.execute_query.call_args
+    assert "executor_partition" not in args[0]
+    assert len(args[2]) == 3
+    mock_audit_db.execute.assert_not_called()
+
+
+def test_apply_envelope(mocker, setup):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup
+    postgres_applier._argv.targetcommitpoint = 2
+
+    records = [
+        _build_oracle_message(mocker, const.DATA, const.INSERT,
+            """insert into "SYS"."MY_TABLE"("ID") values ('{}')""".format(i),
+            lsn=i).value()
+        for i in range(3)]
+    envelope = mocker.Mock(**{'value.return_value': pack(records),
+                              'offset.return_value': 5})
+
+    _apply_oracle_message(postgres_applier, mocker, const.START_OF_BATCH)
+    assert postgres_applier.apply(envelope) == const.UNCOMMITTED
+
+    executed = [args[0] for (args, kwargs) in mock_target_db.execute.call_args_list]
+    assert executed == [
+        "INSERT INTO ctl.MY_TABLE ( ID ) VALUES ( '0' ); -- lsn: 0, offset: 5",
+        "INSERT INTO ctl.MY_TABLE ( ID ) VALUES ( '1' ); -- lsn: 1, offset: 5",
+        "INSERT INTO ctl.MY_TABLE ( ID ) VALUES ( '2' ); -- lsn: 2, offset: 5",
+    ]
+
+    # The commit point passed mid envelope is only committed after the
+    # whole envelope is applied, resuming from the following offset
+    assert mock_target_db.commit.call_count == 1
+    assert postgres_applier.process_control.executor_run_id == 6
+
+
+def test_deferred_record_count(mocker, setup):
+    (postgres_applier, mock_target_db, mock_audit_db) = setup
+
+    def build_message(record_type, record_count, statement=''):
+        oracle_message = OracleMessage()
+        oracle_message.record_type = record_type
+        oracle_message.operation_code = const.INSERT if statement else ''
+        oracle_message.table_name = 'MY_TABLE'
+        oracle_message.commit_statement = statement
+        oracle_message.primary_key_fields = 'ID'
+        oracle_message.record_count = record_count
+        return mocker.Mock(**{'value.return_value': oracle_message.serialise(),
+                              'offset.return_value': 1})
+
+    # The extract deferred the count, so it is only sent with END_OF_BATCH
+    postgres_applier.apply(build_message(const.START_OF_BATCH, 0))
+    assert postgres_applier.process_control.total_count == 0
+
+    postgres_applier.apply(build_message(
+        const.DATA, 0, """insert into "SYS"."MY_TABLE"("ID") values ('1')"""))
+    postgres_applier.apply(build_message(const.END_OF_BATCH, 1))
+    assert postgres_applier.process_control.total_count == 1
+
+
+def test_exit_gracefully_flushes_audit(mocker, tmpdir):
+    (oracle_processor,
+     mock_target_db,
+     mockargv,
+     mock_audit_factory,
+     mock_audit_db) = cdc_utils.setup_dependencies(tmpdir, mocker, None, None, None)
+
+    postgres_applier = PostgresCdcApplier(oracle_processor, mock_target_db, mockargv, mock_audit_factory)
+
+    with pytest.raises(SystemExit):
+        postgres_applier.exit_gracefully(15, None)
+
+    assert postgres_applier._pc.status == const.KILLED
+    assert mock_audit_factory.close.call_count == 1
@@ -0,0 +1,120 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+import data_pipeline.applier.target_connection as target_connection
+
+from data_pipeline.applier.target_connection import TargetConnection
+from data_pipeline.applier.exceptions import ApplyError
+
+
+@pytest.fixture()
+def mock_db(mocker):
+    state = {'connected': False}
+
+    def connect(conn_details):
+        state['connected'] = True
+
+    def close():
+        state['connected'] = False
+
+    return mocker.Mock(**{'connect.side_effect': connect,
+                          'close.side_effect': close,
+                          'closed.side_effect': lambda: not state['connected'],
+                          'ping.return_value': True})
+
+
+def test_non_persistent_connects_every_batch(mock_db):
+    conn = TargetConnection(mock_db, 'details')
+
+    for i in range(3):
+        assert conn.acquire()
+        conn.release()
+        assert conn.state == target_connection.DISCONNECTED
+
+    assert mock_db.connect.call_count == 3
+    assert mock_db.close.call_count == 3
+
+
+def test_persistent_reuses_connection(mock_db):
+    conn = TargetConnection(mock_db, 'details', persistent=True)
+
+    assert conn.acquire()
+    conn.release()
+    assert conn.state == target_connection.IDLE
+    assert not conn.acquire()
+    conn.release()
+
+    assert mock_db.connect.call_count == 1
+    assert mock_db.close.call_count == 0
+    assert mock_db.rollback.call_count == 2
+    assert mock_db.ping.call_count == 1
+
+    conn.close()
+    assert mock_db.close.call_count == 1
+
+
+def test_persistent_reconnects_on_failed_health_check(mock_db):
+    conn = TargetConnection(mock_db, 'details', persistent=True)
+
+    conn.acquire()
+    conn.release()
+    mock_db.ping.return_value = False
+
+    assert conn.acquire()
+    assert conn.state == target_connection.ACTIVE
+    assert mock_db.close.call_count == 1
+    assert mock_db.connect.call_count == 2
+
+
+def test_persistent_reconnects_after_idle_timeout(mocker, mock_db):
+    mock_time = mocker.patch('data_pipeline.applier.target_connection.time')
+    mock_time.time.return_value = 1000
+    conn = TargetConnection(mock_db, 'details', persistent=True,
+                            idle_timeout=60)
+
+    conn.acquire()
+    conn.release()
+
+    mock_time.time.return_value = 1030
+    assert not conn.acquire()
+    conn.release()
+
+    mock_time.time.return_value = 1100
+    assert conn.acquire()
+    assert mock_db.connect.call_count == 2
+
+
+def test_invalid_transitions(mock_db):
+    conn = TargetConnection(mock_db, 'details', persistent=True)
+
+    with pytest.raises(ApplyError):
+        conn.release()
+
+    conn.acquire()
+    with pytest.raises(ApplyError):
+        conn.acquire()
+
+
+def test_failed_connect(mocker):
+    mock_db = mocker.Mock(**{'closed.return_value': True})
+    conn = TargetConnection(mock_db, 'details')
+
+    with pytest.raises(ApplyError):
+        conn.acquire()
+
+    assert conn.state == target_connection.DISCONNECTED
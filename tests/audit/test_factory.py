@@ -58,3 +58,33 @@ def test_get_audit_db(mocker, setup):
 
         mock_db.connect.assert_called_once()
         mock_db_factory.build.assert_called_once_with(const.POSTGRES)
+
+
+def test_build_process_control_with_audit_writer(setup):
+    (mockargv) = setup
+    mockargv.auditflushinterval = 5
+
+    audit_factory = AuditFactory(mockargv)
+    pc = audit_factory.build_process_control(const.CDCAPPLY)
+    pcd = audit_factory.build_process_control_detail(pc)
+
+    assert audit_factory.audit_writer is not None
+    assert pc._audit_writer is audit_factory.audit_writer
+    assert pcd._audit_writer is audit_factory.audit_writer
+    audit_factory.audit_writer.stop()
+
+
+def test_close_flushes_audit_writer(mocker, setup):
+    (mockargv) = setup
+    mockargv.auditflushinterval = 5
+
+    audit_factory = AuditFactory(mockargv)
+    audit_writer = audit_factory.audit_writer
+    mock_stop = mocker.patch.object(audit_writer, 'stop',
+                                    wraps=audit_writer.stop)
+
+    audit_factory.close()
+    audit_factory.close()
+
+    assert mock_stop.call_count == 1
+    assert audit_factory.audit_writer is None
@@ -0,0 +1,190 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import time
+import pytest
+import data_pipeline.constants.const as const
+
+from data_pipeline.audit.audit_dao import ProcessControl, ProcessControlDetail
+from data_pipeline.audit.write_behind import AuditWriter, build_bulk_update_sql
+
+
+@pytest.fixture()
+def setup(mocker):
+    mock_conn = mocker.Mock()
+    mock_engine = mocker.MagicMock()
+    mock_engine.begin.return_value.__enter__.return_value = mock_conn
+
+    writer = AuditWriter(mock_engine, 3600)
+    yield (writer, mock_engine, mock_conn)
+    writer.stop()
+
+
+def build_pc(id, status=const.IN_PROGRESS):
+    pc = ProcessControl(None, None)
+    pc.id = id
+    pc.status = status
+    return pc
+
+
+def build_pcd(id, run_id):
+    pcd = ProcessControlDetail(None, None)
+    pcd.id = id
+    pcd.run_id = run_id
+    pcd.status = const.IN_PROGRESS
+    return pcd
+
+
+def test_build_bulk_update_sql():
+    pcds = [build_pcd(1, 10), build_pcd(2, 10)]
+    table = ProcessControlDetail.__table__
+    rows = [[getattr(pcd, c.name) for c in table.columns] for pcd in pcds]
+
+    (sql, values) = build_bulk_update_sql(table, rows)
+
+    assert sql.startswith("UPDATE process_control_detail AS t SET "
+                          "run_id = v.run_id::INTEGER, ")
+    assert sql.endswith("WHERE t.id = v.id")
+    assert "comment = v.comment::VARCHAR(300)" in sql
+    assert sql.count("%s") == len(values) == 2 * len(table.columns)
+    assert values[0] == 1
+
+
+def test_buffers_non_critical_updates(setup):
+    (writer, mock_engine, mock_conn) = setup
+
+    writer.update(build_pc(1))
+    writer.update(build_pcd(1, 1))
+    writer.update(build_pcd(1, 1))
+
+    assert writer.pending_count == 2
+    assert mock_conn.execute.call_count == 0
+
+    writer.flush()
+
+    assert writer.pending_count == 0
+    assert mock_engine.begin.call_count == 1
+    # One statement per audit table
+    assert mock_conn.execute.call_count == 2
+
+
+@pytest.mark.parametrize("status", [const.SUCCESS, const.WARNING,
+                                    const.SKIPPED, const.ERROR,
+                                    const.KILLED])
+def test_critical_status_flushed_synchronously(setup, status):
+    (writer, mock_engine, mock_conn) = setup
+
+    writer.update(build_pcd(1, 1))
+    writer.update(build_pc(1, status))
+
+    assert writer.pending_count == 0
+    assert mock_conn.execute.call_count == 2
+
+
+@pytest.mark.parametrize("status", [const.SUCCESS, const.ERROR])
+def test_detail_status_not_flushed_synchronously(setup, status):
+    (writer, mock_engine, mock_conn) = setup
+
+    pcd = build_pcd(1, 1)
+    pcd.status = status
+    writer.update(pcd)
+
+    assert writer.pending_count == 1
+    assert mock_engine.begin.call_count == 0
+
+
+def test_batch_details_flushed_with_process_control(setup):
+    (writer, mock_engine, mock_conn) = setup
+
+    for i in range(5):
+        pcd = build_pcd(i, 1)
+        pcd.status = const.SUCCESS
+        writer.update(pcd)
+
+    assert mock_engine.begin.call_count == 0
+
+    writer.update(build_pc(1, const.SUCCESS))
+
+    assert writer.pending_count == 0
+    assert mock_engine.begin.call_count == 1
+    assert mock_conn.execute.call_count == 2
+
+
+def test_committed_offset_flushed_synchronously(setup):
+    (writer, mock_engine, mock_conn) = setup
+
+    pc = build_pc(1)
+    pc.executor_status = const.COMMITTED
+    pc.executor_run_id = 5
+    writer.update(pc)
+    assert writer.pending_count == 0
+
+    # Same offset again is not critical
+    writer.update(pc)
+    assert writer.pending_count == 1
+
+    pc.executor_run_id = 6
+    writer.update(pc)
+    assert writer.pending_count == 0
+    assert mock_engine.begin.call_count == 2
+
+
+def test_failed_flush_keeps_pending(setup):
+    (writer, mock_engine, mock_conn) = setup
+
+    mock_conn.execute.side_effect = [Exception("audit db down"), None]
+    writer.update(build_pc(1))
+
+    writer.flush()
+    assert writer.pending_count == 1
+
+    writer.flush()
+    assert writer.pending_count == 0
+
+
+def test_failed_critical_flush_raises(setup):
+    (writer, mock_engine, mock_conn) = setup
+
+    mock_conn.execute.side_effect = [Exception("audit db down"), None]
+
+    with pytest.raises(Exception) as e:
+        writer.update(build_pc(1, const.ERROR))
+
+    assert str(e.value) == "audit db down"
+    assert writer.pending_count == 1
+
+    writer.stop()
+    assert writer.pending_count == 0
+
+
+def test_background_flush(mocker):
+    mock_conn = mocker.Mock()
+    mock_engine = mocker.MagicMock()
+    mock_engine.begin.return_value.__enter__.return_value = mock_conn
+
+    writer = AuditWriter(mock_engine, 0.01)
+    writer.start()
+    writer.update(build_pc(1))
+
+    for i in range(100):
+        if writer.pending_count == 0:
+            break
+        time.sleep(0.01)
+
+    writer.stop()
+    assert writer.pending_count == 0
+    assert mock_conn.execute.call_count == 1
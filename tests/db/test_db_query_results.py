@@ -0,0 +1,103 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+
+from pytest_mock import mocker
+from data_pipeline.db.db_query_results import DbQueryResults, RowDecoder
+
+
+def build_query_results(mocker, col_names, rows):
+    mock_cursor = mocker.Mock(**{
+        'description': [(name, None) for name in col_names],
+        'fetchone.side_effect': rows + [None]})
+    return DbQueryResults(mock_cursor)
+
+
+def test_decode(mocker):
+    query_results = build_query_results(
+        mocker, ['OP', 'TABLE_NAME', 'LSN'],
+        [('INSERT', 'MY_TABLE', None), ('DELETE', 'OTHER_TABLE', '2')])
+
+    decoder = RowDecoder(query_results,
+                         [('table_name', 'TABLE_NAME'),
+                          ('commit_lsn', 'LSN')],
+                         defaults={'record_type': 'DATA'},
+                         null_value='')
+
+    messages = [decoder.decode(row) for row in query_results]
+    assert messages == [
+        {'record_type': 'DATA', 'table_name': 'MY_TABLE', 'commit_lsn': ''},
+        {'record_type': 'DATA', 'table_name': 'OTHER_TABLE',
+         'commit_lsn': '2'}]
+
+    # Each row is decoded into its own dict
+    messages[0]['record_type'] = 'SOB'
+    assert messages[1]['record_type'] == 'DATA'
+
+
+def test_decode_single_field(mocker):
+    query_results = build_query_results(mocker, ['A', 'B'], [])
+    decoder = RowDecoder(query_results, [('b', 'B')])
+    assert decoder.decode(('x', 'y')) == {'b': 'y'}
+
+
+def test_decode_unknown_column(mocker):
+    query_results = build_query_results(mocker, ['A'], [])
+    with pytest.raises(KeyError):
+        RowDecoder(query_results, [('b', 'B')])
+
+
+@pytest.mark.skip(reason="Performance testing")
+def test_decode_perf(mocker):
+    from timeit import Timer
+
+    from data_pipeline.stream.oracle_message import OracleMessage
+
+    col_names = ['C{}'.format(i) for i in range(9)]
+    field_columns = [('operation_code', 'C0'),
+                     ('table_name', 'C1'),
+                     ('commit_statement', 'C2'),
+                     ('statement_id', 'C3'),
+                     ('commit_lsn', 'C4'),
+                     ('commit_timestamp', 'C5'),
+                     ('multiline_flag', 'C6')]
+    query_results = build_query_results(mocker, col_names, [])
+    row = tuple('value{}'.format(i) for i in range(8)) + (None,)
+    message = OracleMessage()
+
+    def sanitise(value):
+        return '' if value is None else value
+
+    # As the extractors decoded rows before RowDecoder
+    def decode_per_row():
+        message.reset()
+        message.record_type = 'DATA'
+        for (field, column) in field_columns:
+            setattr(message, field,
+                    sanitise(row[query_results.get_col_index(column)]))
+        return dict(message.serialise())
+
+    message.record_type = 'DATA'
+    decoder = RowDecoder(query_results, field_columns,
+                         defaults=message.serialise(), null_value='')
+
+    assert decode_per_row() == decoder.decode(row)
+    print("Column lookup per row: {}".format(
+        Timer(decode_per_row).timeit(number=100000)))
+    print("RowDecoder: {}".format(
+        Timer(lambda: decoder.decode(row)).timeit(number=100000)))
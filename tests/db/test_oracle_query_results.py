@@ -0,0 +1,57 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+import data_pipeline.constants.const as const
+
+from pytest_mock import mocker
+from data_pipeline.db.oracle_query_results import OracleQueryResults
+
+COL_NAMES = [const.STATEMENT_ID_FIELD, const.SQLREDOSTMT_FIELD,
+             const.CSF_FLAG_FIELD]
+
+
+def build_query_results(mocker, rows):
+    mock_cursor = mocker.Mock(**{
+        'description': [(name, None) for name in COL_NAMES],
+        'fetchone.side_effect': rows + [None]})
+    return OracleQueryResults(mock_cursor)
+
+
+def test_multiline_redo_statements_joined(mocker):
+    query_results = build_query_results(mocker, [
+        ('1', 'insert into "T"("A") ', '1'),
+        ('1', "values ('", '1'),
+        ('1', "x')", '0'),
+        ('2', 'delete from "T"', '0'),
+    ])
+
+    # The parent record keeps its own multiline flag
+    assert list(query_results) == [
+        ['1', 'insert into "T"("A") values (\'x\')', '1'],
+        ['2', 'delete from "T"', '0'],
+    ]
+
+
+def test_multiline_statement_ids_differ(mocker):
+    query_results = build_query_results(mocker, [
+        ('1', 'insert into ', '1'),
+        ('2', '"T"', '0'),
+    ])
+
+    with pytest.raises(ValueError):
+        list(query_results)
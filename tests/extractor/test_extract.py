@@ -44,3 +44,29 @@ def test_get_source_db(dbtype, mocker, setup):
 
     db = extract.get_source_db(mockargv)
     assert type(db).__name__.lower() == "{}db".format(dbtype.lower())
+
+
+@pytest.mark.parametrize("dbtype, miningprocesses, expect_pool", [
+    (const.ORACLE, 3, True),
+    (const.ORACLE, 1, False),
+    (const.MSSQL, 3, False),
+])
+def test_build_extractor_mining_pool(dbtype, miningprocesses, expect_pool,
+                                     mocker, setup):
+    (mockargv_config) = setup
+    mockargv_config = utils.merge_dicts(mockargv_config, {
+        "sourcedbtype": dbtype,
+        "miningprocesses": miningprocesses,
+    })
+    mockargv = mocker.Mock(**mockargv_config)
+    mock_build_pool = mocker.patch(
+        'data_pipeline.extract.build_mining_pool')
+
+    pool = extract.build_extractor_mining_pool(mockargv)
+
+    if expect_pool:
+        mock_build_pool.assert_called_once_with(miningprocesses)
+        assert pool == mock_build_pool.return_value
+    else:
+        mock_build_pool.assert_not_called()
+        assert pool is None
@@ -0,0 +1,75 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+
+from pytest_mock import mocker
+from data_pipeline.extractor.key_metadata_cache import KeyMetadataCache
+
+KEYS = {'TABLE_A': 'id', 'TABLE_B': 'id,seq', 'TABLE_C': None}
+
+
+@pytest.fixture()
+def cache(tmpdir, mocker):
+    mocker.patch('data_pipeline.extractor.key_metadata_cache.time.time',
+                 return_value=1000.0)
+    yield KeyMetadataCache(str(tmpdir.join('keys.json')), 60)
+
+
+def test_load_saved_keys(cache):
+    assert cache.load('profile:1', ['S'], ['TABLE_A']) is None
+
+    cache.save('profile:1', ['S'], ['TABLE_B', 'TABLE_A'],
+               dict(KEYS, **{None: None}))
+
+    assert cache.load('profile:1', ['S'], ['TABLE_A', 'TABLE_B']) == KEYS
+    assert cache.load('profile:2', ['S'], ['TABLE_A', 'TABLE_B']) is None
+    # The profile's tables have changed since the keys were cached
+    assert cache.load('profile:1', ['S'], ['TABLE_A']) is None
+
+
+def test_cached_keys_expire(cache, mocker):
+    cache.save('profile:1', None, None, KEYS)
+
+    mocker.patch('data_pipeline.extractor.key_metadata_cache.time.time',
+                 return_value=1060.0)
+    assert cache.load('profile:1', None, None) == KEYS
+
+    mocker.patch('data_pipeline.extractor.key_metadata_cache.time.time',
+                 return_value=1061.0)
+    assert cache.load('profile:1', None, None) is None
+
+
+def test_invalidate(cache):
+    cache.save('profile:1', None, None, KEYS)
+    cache.save('profile:2', None, None, KEYS)
+
+    cache.invalidate('profile:1')
+
+    assert cache.load('profile:1', None, None) is None
+    assert cache.load('profile:2', None, None) == KEYS
+
+
+def test_unreadable_cache_is_ignored(tmpdir):
+    filename = tmpdir.join('keys.json')
+    filename.write('{"profile:1": ')
+    cache = KeyMetadataCache(str(filename), 60)
+
+    assert cache.load('profile:1', None, None) is None
+
+    cache.save('profile:1', None, None, KEYS)
+    assert cache.load('profile:1', None, None) == KEYS
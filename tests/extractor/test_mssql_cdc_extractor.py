@@ -16,8 +16,14 @@
 # under the License.
 # 
 import pytest
+import data_pipeline.constants.const as const
+import data_pipeline.utils.utils as utils
+import tests.unittest_utils as unittest_utils
+
 from pytest_mock import mocker
-from data_pipeline.extractor.mssql_cdc_extractor import MssqlCdcExtractor
+from data_pipeline.extractor.mssql_cdc_extractor import (MssqlCdcExtractor,
+                                                      to_field_strings)
+from data_pipeline.extractor.table_pollers import FetchedQueryResults
 from data_pipeline.extractor.exceptions import InvalidArgumentsError
 from data_pipeline.db.connection_details import ConnectionDetails
 
@@ -93,3 +99,142 @@ def test_connect_data_source(mocker, extractor_mockdb):
                                      host='db', port=1234, dbsid='orcl')
     extractor.connect_data_source(conn_details)
     mockdb.connect.assert_called_once_with(conn_details)
+
+
+def test_to_field_strings():
+    assert (to_field_strings(('DML', 2, None, 1.1, 'a|b')) ==
+            ['DML', '2', '', '1.1', 'a|b'])
+
+
+@pytest.fixture()
+def setup(tmpdir, mocker):
+    mockargv_config = unittest_utils.get_default_argv_config(tmpdir)
+    mockargv_config = utils.merge_dicts(mockargv_config, {
+        'sourcedbtype': const.MSSQL,
+        'donotload': False,
+        'donotsend': False,
+        'pollworkers': 3})
+    mockargv = mocker.Mock(**mockargv_config)
+    unittest_utils.setup_logging(mockargv.workdirectory)
+
+    mockdb = mocker.Mock()
+    mock_audit_factory = unittest_utils.build_mock_audit_factory(mocker)
+    mock_producer = unittest_utils.mock_build_kafka_producer(mocker)
+
+    yield (MssqlCdcExtractor(mockdb, mockargv, mock_audit_factory),
+           mockdb, mockargv, mock_producer)
+
+
+def test_poll_cdcs_in_parallel(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer) = setup
+    extractor._active_tables = ['table_a', 'table_b', 'table_c']
+    col_names = ['operation_type', 'operation_code', 'table_name',
+                 'commit_time', 'commit_lsn', 'statement_id',
+                 '__$start_lsn', '__$seqval', '__$operation',
+                 '__$update_mask', 'id']
+    table_rows = {'table_a': 2, 'table_b': 0, 'table_c': 1}
+
+    def execute_query_se(query):
+        table = [t for t in table_rows if "'{}'".format(t) in query][0]
+        rows = [('DML', 2, table, 'ts', '0A', '0A.{}'.format(i),
+                 '0A', i, 2, None, i)
+                for i in range(table_rows[table])]
+        return mocker.Mock(**{'get_col_names.return_value': col_names,
+                              'fetchall.return_value': rows})
+
+    poller_dbs = []
+    def connect_se():
+        db = mocker.Mock(**{'execute_query.side_effect': execute_query_se})
+        poller_dbs.append(db)
+        return db
+
+    mocker.patch.object(extractor, '_connect_poller_db',
+                        side_effect=connect_se)
+
+    written = []
+    def write_se(message):
+        written.append(dict(message))
+        return True
+
+    mock_producer.write.side_effect = write_se
+
+    extractor.poll_cdcs('01', '0F')
+
+    assert len(poller_dbs) == 3
+    assert not mockdb.execute_query.called
+
+    # Each table is written as its own batch, in order of completion
+    batches = []
+    for message in written:
+        if message['record_type'] == const.START_OF_BATCH:
+            batches.append([])
+        batches[-1].append(message)
+
+    by_table = {}
+    for batch in batches:
+        assert batch[0]['record_type'] == const.START_OF_BATCH
+        assert batch[-1]['record_type'] == const.END_OF_BATCH
+        assert batch[0]['record_count'] == batch[-1]['record_count']
+        assert batch[-1]['record_count'] == len(batch) - 2
+        if len(batch) > 2:
+            by_table[batch[1]['table_name']] = len(batch) - 2
+
+    assert len(batches) == 3
+    assert by_table == {'table_a': 2, 'table_c': 1}
+    assert extractor._records_written_to_stream == 3
+
+
+def test_poll_cdcs_net_changes(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer) = setup
+    mockargv.netchanges = True
+    mockargv.pollworkers = 1
+    extractor._active_tables = ['table_a', 'table_b']
+
+    net_col_names = ['operation_type', 'operation_code', 'table_name',
+                     'commit_time', 'commit_lsn', 'statement_id',
+                     '__$start_lsn', '__$operation', '__$update_mask',
+                     'id', 'name']
+    all_col_names = ['operation_type', 'operation_code', 'table_name',
+                     'commit_time', 'commit_lsn', 'statement_id',
+                     '__$start_lsn', '__$seqval', '__$operation',
+                     '__$update_mask', 'id', 'name']
+    queries = []
+
+    def execute_query_se(query):
+        queries.append(query)
+        if 'cdc.change_tables' in query:
+            return FetchedQueryResults(['capture_instance'], [('table_a',)])
+        if 'fn_cdc_get_net_changes_table_a' in query:
+            return FetchedQueryResults(net_col_names, [
+                ('DML', 5, 'table_a', 'ts', '0B', '0B',
+                 '0B', 5, None, 1, 'Bob')])
+        return FetchedQueryResults(all_col_names, [
+            ('DML', 2, 'table_b', 'ts', '0C', '0C.01',
+             '0C', '01', 2, None, 2, 'Sue')])
+
+    mockdb.execute_query.side_effect = execute_query_se
+
+    written = []
+    def write_se(message):
+        written.append(dict(message))
+        return True
+
+    mock_producer.write.side_effect = write_se
+
+    extractor.poll_cdcs('01', '0F')
+
+    assert len([q for q in queries if 'cdc.change_tables' in q]) == 1
+    assert "N'all with merge'" in queries[1]
+    assert 'fn_cdc_get_all_changes_table_b' in queries[2]
+
+    records = [m for m in written if m['table_name']]
+    assert len(records) == 2
+    delim = const.FIELD_DELIMITER
+    for (record, values) in zip(records, [['1', 'Bob'], ['2', 'Sue']]):
+        assert record['column_names'] == delim.join(['id', 'name'])
+        assert record['column_values'] == delim.join(values)
+    assert records[0]['operation_code'] == const.MSSQL_MERGE_ACTION
+
+    # The supported capture instances are only looked up once per session
+    extractor.poll_cdcs('0F', '1F')
+    assert len([q for q in queries if 'cdc.change_tables' in q]) == 1
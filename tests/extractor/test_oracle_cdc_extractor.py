@@ -15,6 +15,7 @@
 # specific language governing permissions and limitations
 # under the License.
 # 
+import cPickle
 import os
 import pytest
 import data_pipeline.utils.args as args
@@ -33,6 +34,9 @@ from data_pipeline.audit.audit_dao import (ProcessControl,
                                            ProcessControlDetail,
                                            SourceSystemProfile)
 from data_pipeline.extractor.oracle_cdc_extractor import *
+from data_pipeline.extractor.parallel_logminer import init_mining_process
+from data_pipeline.stream.partitions import partition_for_table
+from data_pipeline.stream.envelope import EnvelopePacker
 
 GET_DICTIONARY_QUERY = """
         SELECT name
@@ -391,6 +395,39 @@ def test_redolog_dict(mocker, setup_redolog_dict):
     ])
 
 
+def test_redolog_dict_refreshed_once_newer_dict_built(mocker, setup_redolog_dict):
+    (extractor, mockdb, mockargv,
+     mock_producer, start_scn, end_scn) = setup_redolog_dict
+    mockargv.streaming = True
+    unittest_utils.mock_get_schemas_and_tables(mocker, [], [])
+
+    def dictionary_lookups():
+        return [args[0] for (args, kwargs) in mockdb.execute_query.call_args_list
+                if "WHERE DICTIONARY_BEGIN = 'YES'" in args[0]]
+
+    extractor.poll_cdcs(100, 200)
+    assert dictionary_lookups() == [GET_DICTIONARY_QUERY.format(scn=100)]
+
+    # A dictionary is built in the logs of the next window
+    minmax_results = Mock(**{'get_col_index.side_effect':
+                             ['MINSCN', 'MAXSCN', 'DICTSCN'].index})
+    minmax_results.__iter__ = Mock(return_value=iter([[200, 300, 250]]))
+    default_execute_query_se = mockdb.execute_query.side_effect
+    mockdb.execute_query.side_effect = [minmax_results]
+    assert extractor.get_source_minmax_cdc_point(200) == (200, 300)
+    mockdb.execute_query.side_effect = default_execute_query_se
+
+    # It's only looked up once it predates the window
+    extractor.poll_cdcs(200, 300)
+    assert len(dictionary_lookups()) == 1
+
+    extractor.poll_cdcs(300, 400)
+    assert dictionary_lookups()[1:] == [GET_DICTIONARY_QUERY.format(scn=300)]
+
+    extractor.poll_cdcs(400, 500)
+    assert len(dictionary_lookups()) == 2
+
+
 def test_no_redolog_dict(mocker, setup_no_redolog_dict):
     (extractor, mockdb, mockargv,
      mock_producer, start_scn, end_scn) = setup_no_redolog_dict
@@ -473,6 +510,96 @@ def test_write_to_file(mocker, setup):
         f.read() == message
 
 
+def test_flush_reports_delivery_errors(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    extractor._init_stream_output()
+    mock_producer.delivery_error_count = 3
+
+    extractor.flush()
+
+    assert extractor._pc.status == const.ERROR
+    assert "3 messages failed delivery to stream" in extractor._pc.comment
+
+
+def test_delivery_errors_reported_in_their_window_only(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    extractor._audit_factory.build_process_control.side_effect = (
+        lambda mode: mocker.Mock(status=const.IN_PROGRESS))
+
+    extractor._start_window()
+    extractor._start_window()
+    first_pc = extractor._pc
+    mock_producer.delivery_error_count = 2
+    extractor.flush()
+
+    assert first_pc.status == const.ERROR
+    assert "2 messages failed delivery to stream" in first_pc.comment
+
+    extractor._start_window()
+    second_pc = extractor._pc
+    extractor.flush()
+
+    assert second_pc is not first_pc
+    assert second_pc.status == const.IN_PROGRESS
+    assert "failed delivery" not in second_pc.comment
+
+
+def test_write_envelopes(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mock_producer.write.return_value = True
+    extractor._envelope_packer = EnvelopePacker(2, 0)
+    extractor._init_stream_output()
+
+    def data(i):
+        return {'record_type': const.DATA, 'table_name': 'MY_TABLE',
+                'batch_id': 'b', 'record_count': 0, 'commit_lsn': str(i),
+                'commit_statement': 'statement {}'.format(i)}
+
+    extractor.write_to_stream({'record_type': const.START_OF_BATCH,
+                               'table_name': '', 'record_count': 0})
+    for i in range(3):
+        extractor.write_to_stream(data(i))
+    extractor.write_to_stream({'record_type': const.END_OF_BATCH,
+                               'table_name': '', 'record_count': 3})
+
+    written = [args[0] for (args, kwargs) in mock_producer.write.call_args_list]
+    assert [(m['record_type'], m['record_count']) for m in written] == [
+        (const.START_OF_BATCH, 0),
+        (const.ENVELOPE, 2),
+        # The partially filled envelope is sent before the batch ends
+        (const.ENVELOPE, 1),
+        (const.END_OF_BATCH, 3),
+    ]
+
+
+def test_write_to_partitions(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mockargv.streampartitions = 2
+    mock_producer.write.return_value = True
+    extractor._init_stream_output()
+
+    table_partition = partition_for_table('MY_TABLE', 2)
+
+    extractor.write_to_stream({'record_type': const.START_OF_BATCH,
+                               'table_name': '', 'record_count': 0})
+    extractor.write_to_stream({'record_type': const.DATA,
+                               'table_name': 'MY_TABLE', 'record_count': 0})
+    extractor.write_to_stream({'record_type': const.END_OF_BATCH,
+                               'table_name': '', 'record_count': 1})
+
+    writes = [(args[1], args[0]['record_type'], args[0]['record_count'])
+              for (args, kwargs) in mock_producer.write.call_args_list]
+
+    # Batch boundaries go to every partition, with per partition counts
+    assert writes == [
+        (0, const.START_OF_BATCH, 0),
+        (1, const.START_OF_BATCH, 0),
+        (table_partition, const.DATA, 0),
+        (0, const.END_OF_BATCH, 1 if table_partition == 0 else 0),
+        (1, const.END_OF_BATCH, 1 if table_partition == 1 else 0),
+    ]
+
+
 @pytest.mark.parametrize(
     "logminer_contents_query_results, "
     "expected_record_count, "
@@ -584,3 +711,262 @@ def test_extract_with_schemas_no_tables(mocker, setup):
                      "defined in source_system_profile for profile "
                      "'myprofile'")
     assert expect_errstr in str(invalid_args_error.value)
+
+
+def test_streaming_reuses_source_session(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mockargv.streaming = True
+    unittest_utils.mock_get_schemas_and_tables(
+        mocker, ['MYSCHEMA'], ['MYTABLE'])
+    build_keycolumnlist_spy = mocker.spy(extractor, 'build_keycolumnlist')
+    mocker.patch.object(extractor, '_new_cdcs_available', return_value=True)
+
+    sleeps = []
+    def sleep_se(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:
+            extractor.stop()
+
+    mocker.patch('data_pipeline.extractor.extractor.time.sleep',
+                 side_effect=sleep_se)
+
+    extractor.extract()
+
+    assert sleeps == [mockargv.extractinterval] * 3
+    assert mockdb.connect.call_count == 1
+    assert build_keycolumnlist_spy.call_count == 1
+    # One process_control on construction, then one per subsequent window
+    assert extractor._audit_factory.build_process_control.call_count == 3
+
+    nls_calls = [c for c in mockdb.execute.call_args_list
+                 if c == mocker.call(const.ALTER_NLS_DATE_FORMAT_COMMAND)]
+    assert len(nls_calls) == 1
+
+
+def test_streaming_waits_for_new_archived_logs(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mockargv.streaming = True
+    unittest_utils.mock_get_schemas_and_tables(
+        mocker, ['MYSCHEMA'], ['MYTABLE'])
+
+    sleeps = []
+    def sleep_se(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            extractor.stop()
+
+    mocker.patch('data_pipeline.extractor.extractor.time.sleep',
+                 side_effect=sleep_se)
+
+    extractor.extract()
+
+    # The max SCN of the archived logs never moves past the first window
+    assert len(sleeps) == 2
+    assert extractor._audit_factory.build_process_control.call_count == 1
+
+
+def test_streaming_reconnects_after_error(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mockargv.streaming = True
+    unittest_utils.mock_get_schemas_and_tables(
+        mocker, ['MYSCHEMA'], ['MYTABLE'])
+    mockdb.connect.side_effect = [Exception("Connection lost"), None]
+
+    def sleep_se(seconds):
+        extractor.stop()
+
+    mocker.patch('data_pipeline.extractor.extractor.time.sleep',
+                 side_effect=sleep_se)
+    mocker.patch.object(extractor, '_report_error')
+
+    extractor.extract()
+    assert mockdb.connect.call_count == 1
+    assert not extractor._source_connected
+
+    extractor._running = True
+    extractor._extract_window()
+    assert mockdb.connect.call_count == 2
+    assert extractor._source_connected
+
+
+# (start scn, commit scn) of each change in the redo logs mined by
+# test_poll_cdcs_in_parallel
+REDO_CHANGES = [
+    (10, 10),
+    (12, 15),
+    # A transaction spanning the split at SCN 20
+    (18, 25),
+    (22, 25),
+    (31, 31),
+]
+
+
+def mine_redo_changes(job, col_names):
+    """Mines REDO_CHANGES as LogMiner does with COMMITTED_DATA_ONLY: only
+    transactions started and committed within the session's SCN range are
+    returned, filtered by the job's commit SCN range
+    """
+    start_logmnr = [p for p in job['start_procs'] if 'STARTSCN' in p][0]
+    (mine_from, mine_to) = [long(l.split("'")[1])
+                            for l in start_logmnr.splitlines()
+                            if 'SCN =>' in l]
+    (commit_from, commit_to) = [
+        long(scn) for scn in
+        job['contents_query'].split('cscn BETWEEN ')[1].split(' AND ')]
+
+    cscns = [str(cscn) for (scn, cscn) in REDO_CHANGES
+             if mine_from <= scn and cscn <= mine_to and
+             commit_from <= cscn <= commit_to]
+    with open(job['spoolfile'], 'wb') as spool:
+        for cscn in cscns:
+            cPickle.dump(('INSERT', 'sid', cscn, 'ts', 'MYTABLE', '0',
+                          'redo', 'MYSCHEMA', len(cscns)), spool)
+    return (len(cscns), col_names, job['spoolfile'])
+
+
+def test_poll_cdcs_in_parallel(tmpdir, mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mockargv.miningprocesses = 3
+    mockargv.miningoverlaplogs = 1
+    mockargv.workdirectory = str(tmpdir)
+    unittest_utils.mock_get_schemas_and_tables(
+        mocker, ['MYSCHEMA'], ['MYTABLE'])
+
+    def execute_query_se(query, arraysize):
+        mock_query_results = Mock()
+        if "SELECT DISTINCT first_change#" in query:
+            mock_query_results.__iter__ = Mock(
+                return_value=iter([[20], [30]]))
+        else:
+            mock_query_results.__iter__ = Mock(return_value=iter([]))
+        return mock_query_results
+
+    mockdb.execute_query.side_effect = execute_query_se
+
+    col_names = [const.OPERATION_FIELD, const.STATEMENT_ID_FIELD,
+                 const.CSCN_FIELD, const.SOURCE_TIMESTAMP_FIELD,
+                 const.TABLE_NAME_FIELD, const.CSF_FLAG_FIELD,
+                 const.SQLREDOSTMT_FIELD, const.SEG_OWNER_FIELD,
+                 const.COUNT_FIELD]
+
+    def apply_async_se(func, args):
+        return Mock(**{'get.return_value': mine_redo_changes(args[0],
+                                                             col_names)})
+
+    mock_pool = mocker.Mock(**{'apply_async.side_effect': apply_async_se})
+    extractor._mining_pool = mock_pool
+
+    written = []
+    def write_se(message):
+        written.append(dict(message))
+        return True
+
+    mock_producer.write.side_effect = write_se
+
+    extractor.poll_cdcs(10, 40)
+
+    # Each session mines from one archived log before its sub-range, each
+    # returning the transactions committed in its own sub-range
+    jobs = [args[1][0] for (args, kwargs)
+            in mock_pool.apply_async.call_args_list]
+    assert [j['start_procs'][-1] for j in jobs] == [
+        EXPECT_START_LOGMNR_CMD.format(s, e, build_logminer_options(
+            BASE_LOGMNR_OPTIONS + ONLINE_DICT))
+        for (s, e) in [(10, 19), (10, 29), (20, 40)]]
+    assert [j['contents_query'].split('cscn ')[1].strip() for j in jobs] == [
+        'BETWEEN 10 AND 19', 'BETWEEN 20 AND 29', 'BETWEEN 30 AND 40']
+
+    assert [m['record_type'] for m in written] == [
+        const.START_OF_BATCH] + [const.DATA] * 5
+    # The transaction spanning the split is extracted whole, and once
+    assert [m['commit_lsn'] for m in written[1:]] == [
+        '10', '15', '25', '25', '31']
+    assert all(m['record_count'] == 5 for m in written[1:])
+    assert not [f for f in os.listdir(str(tmpdir)) if f.endswith('.spool')]
+
+
+def test_init_mining_process(mocker):
+    mock_signal = mocker.patch(
+        'data_pipeline.extractor.parallel_logminer.signal')
+
+    init_mining_process()
+
+    assert mock_signal.signal.call_args_list == [
+        mocker.call(mock_signal.SIGINT, mock_signal.SIG_IGN),
+        mocker.call(mock_signal.SIGTERM, mock_signal.SIG_DFL),
+        mocker.call(mock_signal.SIGHUP, mock_signal.SIG_DFL),
+    ]
+
+
+def test_poll_cdcs_deferred_record_count(mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mockargv.deferrecordcount = True
+    unittest_utils.mock_get_schemas_and_tables(
+        mocker, ['MYSCHEMA'], ['MYTABLE'])
+
+    rows = deque([[1, 2], [3, 4]])
+    queries = []
+    def execute_query_se(query, arraysize):
+        queries.append(query)
+        mock_query_results = Mock(**{
+            'get_col_index.return_value': 1,
+            'fetchone.return_value': rows.popleft()})
+        mock_query_results.__iter__ = Mock(return_value=iter(rows))
+        return mock_query_results
+
+    mockdb.execute_query.side_effect = execute_query_se
+
+    written = []
+    def write_se(message):
+        written.append(dict(message))
+        return True
+
+    mock_producer.write.side_effect = write_se
+
+    extractor.poll_cdcs(start_scn, end_scn)
+    extractor._write_eob_message()
+
+    logminer_query = [q for q in queries if "v$logmnr_contents" in q][0]
+    assert "COUNT(*) OVER()" not in logminer_query
+    assert [(m['record_type'], m['record_count']) for m in written] == [
+        (const.START_OF_BATCH, 0),
+        (const.DATA, 0),
+        (const.DATA, 0),
+        (const.END_OF_BATCH, 2)]
+
+
+def test_key_columns_cached_across_runs(tmpdir, mocker, setup):
+    (extractor, mockdb, mockargv, mock_producer, start_scn, end_scn) = setup
+    mockargv.keycachefile = str(tmpdir.join('keys.json'))
+
+    def build_keycolumnlist_se(schemas, tables):
+        extractor._keyfieldslist['MYTABLE'] = 'id'
+
+    def build_extractor():
+        extractor = OracleCdcExtractor(
+            mockdb, mockargv, unittest_utils.build_mock_audit_factory(mocker))
+        extractor._active_schemas = ['MYSCHEMA']
+        extractor._active_tables = ['MYTABLE']
+        mocker.patch.object(extractor, 'build_keycolumnlist',
+                            side_effect=build_keycolumnlist_se)
+        return extractor
+
+    extractor = build_extractor()
+    extractor._extract_source_data()
+    assert extractor.build_keycolumnlist.call_count == 1
+
+    # The next run uses the cached key columns
+    extractor = build_extractor()
+    extractor._extract_source_data()
+    assert not extractor.build_keycolumnlist.called
+    assert extractor._keyfieldslist['MYTABLE'] == 'id'
+
+    # DDL observed in the redo invalidates the cached key columns
+    decoder = mocker.Mock(**{'decode.return_value': {
+        'operation_code': const.DDL, 'table_name': 'MYTABLE'}})
+    extractor._build_record_message(decoder, [])
+    extractor._build_record_message(decoder, [])
+
+    extractor = build_extractor()
+    extractor._extract_source_data()
+    assert extractor.build_keycolumnlist.call_count == 1
@@ -0,0 +1,119 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import cPickle
+import os
+import pytest
+import data_pipeline.constants.const as const
+
+from pytest_mock import mocker
+from data_pipeline.extractor.parallel_logminer import (mine_scn_range,
+                                                       mining_start_scns,
+                                                       split_scn_range,
+                                                       SpooledQueryResults)
+
+
+@pytest.mark.parametrize("boundaries, ranges, expected", [
+    ([], 4, [(100, 200)]),
+    ([150], 1, [(100, 200)]),
+    ([150], 4, [(100, 149), (150, 200)]),
+    ([120, 140, 160, 180], 2, [(100, 159), (160, 200)]),
+    ([120, 140, 160, 180], 5,
+     [(100, 119), (120, 139), (140, 159), (160, 179), (180, 200)]),
+    # Boundaries outside the range are ignored
+    ([50, 100, 150, 250], 4, [(100, 149), (150, 200)]),
+])
+def test_split_scn_range(boundaries, ranges, expected):
+    assert split_scn_range(100, 200, boundaries, ranges) == expected
+
+
+def test_split_scn_range_covers_range_without_overlap():
+    scn_ranges = split_scn_range(1, 1000, range(10, 1000, 10), 7)
+
+    assert len(scn_ranges) == 7
+    assert scn_ranges[0][0] == 1
+    assert scn_ranges[-1][1] == 1000
+    for (prev, curr) in zip(scn_ranges, scn_ranges[1:]):
+        assert curr[0] == prev[1] + 1
+
+
+@pytest.mark.parametrize("overlap_logs, expected", [
+    (0, [100, 140, 180]),
+    (1, [100, 120, 160]),
+    (2, [100, 100, 140]),
+    (5, [100, 100, 100]),
+])
+def test_mining_start_scns(overlap_logs, expected):
+    boundaries = [120, 140, 160, 180]
+    scn_ranges = [(100, 139), (140, 179), (180, 200)]
+    assert mining_start_scns(scn_ranges, boundaries, overlap_logs) == expected
+
+
+def test_mine_scn_range(tmpdir, mocker):
+    rows = [('INSERT', '10'), ('DELETE', '11')]
+    query_results = mocker.Mock(**{'get_col_names.return_value':
+                                   [const.OPERATION_FIELD, const.CSCN_FIELD]})
+    query_results.__iter__ = mocker.Mock(return_value=iter(rows))
+    mockdb = mocker.Mock(**{'execute_query.return_value': query_results})
+    mocker.patch('data_pipeline.extractor.parallel_logminer.dbfactory.build',
+                 return_value=mockdb)
+
+    spoolfile = str(tmpdir.join('range.spool'))
+    job = {'sourceuser': 'foo/bar@sourcehost:1234/mydb',
+           'arraysize': 1000,
+           'session_commands': ['ALTER 1', 'ALTER 2'],
+           'start_procs': ['ADD_LOGFILE', 'START_LOGMNR'],
+           'contents_query': 'SELECT',
+           'stop_proc': 'END_LOGMNR',
+           'spoolfile': spoolfile}
+
+    (count, col_names, filename) = mine_scn_range(job)
+
+    assert count == 2
+    assert col_names == [const.OPERATION_FIELD, const.CSCN_FIELD]
+    assert filename == spoolfile
+    assert mockdb.execute.call_args_list == [
+        mocker.call('ALTER 1'), mocker.call('ALTER 2')]
+    assert mockdb.execute_stored_proc.call_args_list == [
+        mocker.call('ADD_LOGFILE'),
+        mocker.call('START_LOGMNR'),
+        mocker.call('END_LOGMNR')]
+    mockdb.execute_query.assert_called_once_with('SELECT', 1000)
+    mockdb.close.assert_called_once_with()
+
+    query_results = SpooledQueryResults(col_names, spoolfile)
+    assert query_results.get_col_index(const.CSCN_FIELD) == 1
+    assert query_results.fetchall() == [list(r) for r in rows]
+    assert query_results.fetchone() is None
+
+
+def test_mine_scn_range_closes_session_on_error(tmpdir, mocker):
+    mockdb = mocker.Mock(**{'execute_query.side_effect': Exception("ORA")})
+    mocker.patch('data_pipeline.extractor.parallel_logminer.dbfactory.build',
+                 return_value=mockdb)
+    job = {'sourceuser': 'foo/bar@sourcehost:1234/mydb',
+           'arraysize': 1000,
+           'session_commands': [],
+           'start_procs': [],
+           'contents_query': 'SELECT',
+           'stop_proc': 'END_LOGMNR',
+           'spoolfile': str(tmpdir.join('range.spool'))}
+
+    with pytest.raises(Exception):
+        mine_scn_range(job)
+
+    mockdb.close.assert_called_once_with()
@@ -0,0 +1,75 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import threading
+import pytest
+
+from pytest_mock import mocker
+from data_pipeline.extractor.table_pollers import (FetchedQueryResults,
+                                                   poll_tables)
+
+
+def test_poll_tables(mocker):
+    connections = []
+    lock = threading.Lock()
+
+    def connect():
+        db = mocker.Mock()
+        with lock:
+            connections.append(db)
+        return db
+
+    def fetch(db, table):
+        return "rows of {}".format(table)
+
+    tables = ['t{}'.format(i) for i in range(10)]
+    fetched = list(poll_tables(tables, connect, fetch, 3))
+
+    assert sorted(fetched) == sorted(
+        [(t, "rows of {}".format(t)) for t in tables])
+    assert len(connections) == 3
+    for db in connections:
+        db.close.assert_called_once_with()
+
+
+def test_poll_tables_no_more_pollers_than_tables(mocker):
+    connect = mocker.Mock()
+    fetched = list(poll_tables(['t1'], connect, lambda db, t: t, 8))
+
+    assert fetched == [('t1', 't1')]
+    assert connect.call_count == 1
+
+
+def test_poll_tables_raises_poller_error(mocker):
+    def fetch(db, table):
+        if table == 't3':
+            raise ValueError("CDC function not found")
+        return table
+
+    tables = ['t{}'.format(i) for i in range(6)]
+    with pytest.raises(ValueError):
+        list(poll_tables(tables, mocker.Mock, fetch, 2))
+
+
+def test_fetched_query_results():
+    query_results = FetchedQueryResults(['A', 'B'], [(1, 2), (3, 4)])
+
+    assert query_results.rowcount == 2
+    assert query_results.get_col_index('B') == 1
+    assert query_results.fetchone() == (1, 2)
+    assert list(query_results) == [(3, 4)]
+    assert query_results.fetchone() is None
@@ -25,6 +25,12 @@ def test_build_oracle_processor():
     processor = processor_factory.build(const.ORACLE)
     assert type(processor).__name__ == 'OracleCdcProcessor'
 
+def test_build_oracle_processor_with_tokenizer():
+    processor = processor_factory.build(const.ORACLE,
+                                        redoparser=const.TOKENIZER_PARSER)
+    assert (type(processor._parsers[const.UPDATE]).__name__ ==
+            'OracleTokenizedUpdateParser')
+
 def test_build_mssql_processor():
     processor = processor_factory.build(const.MSSQL)
     assert type(processor).__name__ == 'MssqlCdcProcessor'
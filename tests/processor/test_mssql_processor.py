@@ -65,3 +65,23 @@ def test_process_mssql_update_statements(data_mssql_updates, mocker):
     assert str(statement) == data_mssql_updates.expected_sql
 
 
+
+
+def test_process_mssql_merge_statement():
+    message = MssqlMessage()
+    message.operation_code = const.MSSQL_MERGE_ACTION
+    message.table_name = 'customers'
+    message.column_names = const.FIELD_DELIMITER.join(['id', 'name'])
+    message.column_values = const.FIELD_DELIMITER.join(['1', 'Bob'])
+    message.primary_key_fields = 'id'
+
+    processor = processor_factory.build(const.MSSQL)
+    statement = processor.process(message)
+
+    assert statement.statement_type == const.UPSERT
+    assert statement.primary_key_list == ['id']
+    assert statement.get_field_values() == {'id': '1', 'name': 'Bob'}
+
+    message.primary_key_fields = const.NO_KEYFIELD_STR
+    with pytest.raises(ValueError):
+        processor.process(message)
@@ -152,3 +152,28 @@ def test_process_logminer_create_statements(data_logminer_creates, mocker):
     else:
         assert statement.entries == data_logminer_creates.expected_entries
         assert str(statement) == data_logminer_creates.expected_sql
+
+
+def test_alter_invalidates_statement_shapes():
+    processor = processor_factory.build(const.ORACLE, shapecachesize=10)
+
+    insert_message = OracleMessage()
+    insert_message.operation_code = const.INSERT
+    insert_message.table_name = 'ALS'
+    insert_message.commit_statement = (
+        """insert into "S"."ALS"("A","B") values ('1','2')""")
+    insert_message.primary_key_fields = "A"
+
+    first = processor.process(insert_message)
+    assert processor.process(insert_message).shape is first.shape
+
+    alter_message = OracleMessage()
+    alter_message.operation_code = const.DDL
+    alter_message.table_name = 'ALS'
+    alter_message.commit_statement = 'alter table als add ( c1 INTEGER )'
+    alter_message.primary_key_fields = "A"
+    processor.process(alter_message)
+
+    statement = processor.process(insert_message)
+    assert statement.shape is not first.shape
+    assert statement.shape == first.shape
@@ -0,0 +1,149 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import importlib
+import timeit
+import pytest
+import data_pipeline.constants.const as const
+
+from data_pipeline.processor.oracle_insert_parser import OracleInsertParser
+from data_pipeline.processor.oracle_update_parser import OracleUpdateParser
+from data_pipeline.processor.oracle_delete_parser import OracleDeleteParser
+from data_pipeline.processor.oracle_redo_tokenizer import (
+    OracleTokenizedInsertParser,
+    OracleTokenizedUpdateParser,
+    OracleTokenizedDeleteParser,
+    read_quoted_value)
+
+METACOLS = {const.METADATA_INSERT_TS_COL: 'ctl_ins_ts',
+            const.METADATA_UPDATE_TS_COL: 'ctl_upd_ts'}
+
+# Redo the state machines handle in peculiar ways, which the tokenizer
+# must reproduce
+EDGE_CASE_INSERTS = [
+    """insert into "S"."T"("A","B","C") values ('x''y','''',NULL)""",
+    """insert into "S"."T"("A","B") values (TO_DATE('2017-06-06', 'YYYY-MM-DD'),'1')""",
+    """insert into "S"."T"("A","B","C") values (HEXTORAW('0a'),EMPTY_BLOB(),EMPTY_CLOB())""",
+    """insert into "S"."T"("A","B") values ('a (NULL) b',NULL)""",
+    """insert into "S"."T"("A","B") values (TO_DATE('1', 'NULL'),'2')""",
+    """insert into "S"."T"("A","B") values ('unterminated""",
+    """insert into "S"."T"("A","B") values ('1','2'""",
+    """insert into "S"."T"("A","B""",
+    """insert into "S"."T"("A","B") values""",
+    """insert into "S"."T"() values ()""",
+]
+
+EDGE_CASE_UPDATES = [
+    """update "S"."T" set "A" = 'x''y', "B" = NULL, "C" = EMPTY_CLOB() where "ID" = '1' and "D" IS NULL""",
+    """update "S"."T" set "A" = 'where' where "ID" = 'it''s'""",
+    """update "S"."T" set "A" = TO_DATE('1', 'YYYY'), "B" = '2' where "ID" = '1'""",
+    """update "S"."T" set "A" = '1' WHERE "ID" = '1'""",
+    """update "S"."T" set "A" = '1'""",
+    """update "S"."T" set "A" = 'unterminated""",
+    """update "S"."T" set "A""",
+    """update table set where """,
+]
+
+EDGE_CASE_DELETES = [
+    """delete from "S"."T" where "ID" = '1' and "A" IS NULL and "B" = 'IS NULL'""",
+    """delete from "S"."T" where "ID" = 'x''' and "A" = TO_DATE('1', 'YYYY')""",
+    """delete from "S"."T" where "ID" = 'unterminated""",
+    """delete from "S"."T" where "ID""",
+    """delete from table where """,
+]
+
+
+def load_commit_statements(name):
+    tests_module = importlib.import_module(
+        "{}.{}".format(__name__.rpartition('.')[0], name))
+    return [(t.input_table_name, t.input_commit_statement,
+             t.input_primary_key_fields)
+            for t in tests_module.tests]
+
+
+def assert_same_statements(parser, tokenized_parser, table_name,
+                           commit_statement, primary_key_fields):
+    expected = parser.parse(table_name, commit_statement, primary_key_fields)
+    actual = tokenized_parser.parse(table_name, commit_statement,
+                                    primary_key_fields)
+
+    assert type(actual) == type(expected)
+    assert vars(actual) == vars(expected)
+    assert str(actual) == str(expected)
+
+
+def edge_cases(commit_statements):
+    return [('T', s, 'ID') for s in commit_statements]
+
+
+@pytest.mark.parametrize("metacols", [None, METACOLS])
+@pytest.mark.parametrize("table_name, commit_statement, primary_key_fields",
+                         load_commit_statements('data_logminer_inserts') +
+                         edge_cases(EDGE_CASE_INSERTS))
+def test_insert_parsers_agree(table_name, commit_statement,
+                              primary_key_fields, metacols):
+    assert_same_statements(OracleInsertParser(metacols),
+                           OracleTokenizedInsertParser(metacols),
+                           table_name, commit_statement, primary_key_fields)
+
+
+@pytest.mark.parametrize("metacols", [None, METACOLS])
+@pytest.mark.parametrize("table_name, commit_statement, primary_key_fields",
+                         load_commit_statements('data_logminer_updates') +
+                         edge_cases(EDGE_CASE_UPDATES))
+def test_update_parsers_agree(table_name, commit_statement,
+                              primary_key_fields, metacols):
+    assert_same_statements(OracleUpdateParser(metacols),
+                           OracleTokenizedUpdateParser(metacols),
+                           table_name, commit_statement, primary_key_fields)
+
+
+@pytest.mark.parametrize("table_name, commit_statement, primary_key_fields",
+                         load_commit_statements('data_logminer_deletes') +
+                         edge_cases(EDGE_CASE_DELETES))
+def test_delete_parsers_agree(table_name, commit_statement,
+                              primary_key_fields):
+    assert_same_statements(OracleDeleteParser(),
+                           OracleTokenizedDeleteParser(),
+                           table_name, commit_statement, primary_key_fields)
+
+
+@pytest.mark.parametrize("statement, start, expected", [
+    ("'abc',", 0, ('abc', 4)),
+    ("x'',", 1, ('', 2)),
+    ("'it''s'", 0, ("it's", 6)),
+    ("''''", 0, ("'", 3)),
+    ("'abc''", 0, (None, 6)),
+])
+def test_read_quoted_value(statement, start, expected):
+    assert read_quoted_value(statement, start) == expected
+
+
+@pytest.mark.skip(reason="Performance testing")
+def test_tokenizer_performance():
+    columns = ["COL{}".format(i) for i in range(200)]
+    commit_statement = (
+        'insert into "S"."T"({fields}) values ({values})'
+        .format(fields=",".join('"{}"'.format(c) for c in columns),
+                values=",".join("'{}'".format("x" * 100) for c in columns)))
+
+    for parser in [OracleInsertParser(None),
+                   OracleTokenizedInsertParser(None)]:
+        timer = timeit.Timer(
+            lambda: parser.parse('T', commit_statement, 'COL0'))
+        print("{p}: {t}".format(p=type(parser).__name__,
+                                t=timer.timeit(number=20)))
@@ -16,6 +16,7 @@
 # under the License.
 # 
 import pytest
+import timeit
 from data_pipeline.sql.where_statement import WhereStatement
 from data_pipeline.processor.oracle_where_parser import OracleWhereParser
 
@@ -37,3 +38,50 @@ def test_where_parse(commit_statement, primary_key_fields, where_beg_i, expected
     assert str(where_statement) == expected_conditions
 
 
+
+
+def build_where_clause(column_count, value_size=1, null_every=2):
+    conditions = []
+    for i in range(column_count):
+        if i % null_every == null_every - 1:
+            conditions.append('"COL{i}" IS NULL'.format(i=i))
+        else:
+            conditions.append('"COL{i}" = \'{value}\''
+                              .format(i=i, value='x' * value_size))
+    return "where " + " and ".join(conditions)
+
+
+def parse_where(commit_statement):
+    where_statement = WhereStatement("MY_SCHEMA", None, None)
+    parser = OracleWhereParser()
+    parser.set_commit_statement(commit_statement)
+    parser.set_read_cursor(0)
+    parser.set_statement(where_statement)
+    parser.parse()
+    return where_statement
+
+
+def test_where_parse_is_null():
+    where_statement = parse_where(
+        """where "A" IS NULL and "B" = 'IS NULL' and "C" IS NULL""")
+    assert where_statement.conditions == {'A': None, 'B': 'IS NULL',
+                                          'C': None}
+
+
+def test_where_parse_wide_clause():
+    where_statement = parse_where(build_where_clause(500, null_every=3))
+    assert len(where_statement.conditions) == 500
+    assert where_statement.conditions['COL0'] == 'x'
+    assert where_statement.conditions['COL2'] is None
+
+
+@pytest.mark.skip(reason="Performance testing")
+def test_where_parse_performance():
+    # IS NULL only on the last column is the worst case for looking ahead
+    # for it from each operator
+    for (value_size, null_every) in [(1, 2), (200, 2), (200, 500)]:
+        commit_statement = build_where_clause(500, value_size, null_every)
+        timer = timeit.Timer(lambda: parse_where(commit_statement))
+        print("500 columns, {v} char values, IS NULL every {n}: {t}"
+              .format(v=value_size, n=null_every,
+                      t=timer.timeit(number=20)))
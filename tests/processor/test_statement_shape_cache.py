@@ -0,0 +1,133 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import importlib
+import pytest
+import data_pipeline.constants.const as const
+
+from data_pipeline.processor.oracle_insert_parser import OracleInsertParser
+from data_pipeline.processor.oracle_redo_tokenizer import (
+    OracleTokenizedInsertParser)
+from data_pipeline.processor.statement_shape_cache import (
+    StatementShapeCache,
+    get_field_list_fingerprint)
+from data_pipeline.sql.insert_shape import InsertShape
+
+METACOLS = {const.METADATA_INSERT_TS_COL: 'ctl_ins_ts',
+            const.METADATA_UPDATE_TS_COL: 'ctl_upd_ts'}
+
+
+def load_insert_statements():
+    tests_module = importlib.import_module(
+        "{}.data_logminer_inserts".format(__name__.rpartition('.')[0]))
+    return [(t.input_table_name, t.input_commit_statement,
+             t.input_primary_key_fields)
+            for t in tests_module.tests]
+
+
+def without_shape(statement):
+    attributes = dict(vars(statement))
+    del attributes['shape']
+    return attributes
+
+
+def test_get_field_list_fingerprint():
+    statement = """insert into "S"."T"("A","B") values ('1','2')"""
+    start = statement.index('(') + 1
+    assert (get_field_list_fingerprint(statement, start) ==
+            '"A","B") values (')
+
+    assert get_field_list_fingerprint('insert into "S"."T"("A"', 20) is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = StatementShapeCache(2)
+    shapes = [InsertShape(('A',), i, ('A',)) for i in range(3)]
+
+    cache.put('T', 'a', shapes[0])
+    cache.put('T', 'b', shapes[1])
+    assert cache.get('T', 'a') is shapes[0]
+
+    cache.put('T', 'c', shapes[2])
+    assert len(cache) == 2
+    assert cache.get('T', 'b') is None
+    assert cache.get('T', 'a') is shapes[0]
+    assert cache.get('T', 'c') is shapes[2]
+
+
+def test_cache_invalidate():
+    cache = StatementShapeCache(10)
+    shape = InsertShape(('A',), 0, ('A',))
+    cache.put('T1', 'a', shape)
+    cache.put('T1', 'b', shape)
+    cache.put('T2', 'a', shape)
+
+    cache.invalidate('T1')
+
+    assert len(cache) == 1
+    assert cache.get('T1', 'a') is None
+    assert cache.get('T2', 'a') is shape
+
+
+def test_shape_not_cached_when_fields_end_elsewhere():
+    cache = StatementShapeCache(10)
+    statement = """insert into "S"."T"("A","B") values ('1')"""
+    (fingerprint, shape) = cache.get_insert_shape('T', statement, 20)
+    assert shape is None
+
+    assert cache.put_insert_shape('T', fingerprint, ['A'], 3, ['A']) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("parser_class", [OracleInsertParser,
+                                          OracleTokenizedInsertParser])
+@pytest.mark.parametrize("metacols", [None, METACOLS])
+@pytest.mark.parametrize("table_name, commit_statement, primary_key_fields",
+                         load_insert_statements())
+def test_cached_shape_parses_same_statement(
+        parser_class, metacols, table_name, commit_statement,
+        primary_key_fields):
+    expected = parser_class(metacols).parse(table_name, commit_statement,
+                                            primary_key_fields)
+
+    parser = parser_class(metacols, StatementShapeCache(10))
+    first = parser.parse(table_name, commit_statement, primary_key_fields)
+    second = parser.parse(table_name, commit_statement, primary_key_fields)
+
+    assert without_shape(first) == without_shape(expected)
+    assert without_shape(second) == without_shape(expected)
+    assert second.shape == first.shape
+
+
+@pytest.mark.parametrize("parser_class", [OracleInsertParser,
+                                          OracleTokenizedInsertParser])
+def test_cached_shape_parses_new_values(parser_class):
+    parser = parser_class(None, StatementShapeCache(10))
+    parser.parse('T', """insert into "S"."T"("A","B") values ('1',NULL)""",
+                 'A')
+
+    statement = parser.parse(
+        'T', """insert into "S"."T"("A","B") values ('it''s (2)','3')""", 'A')
+
+    assert statement.shape is not None
+    assert statement.get_field_values() == {'A': "it's (2)", 'B': '3'}
+
+    # A different field list is parsed in full
+    statement = parser.parse(
+        'T', """insert into "S"."T"("B","A") values ('4','5')""", 'A')
+    assert statement.get_field_values() == {'A': '5', 'B': '4'}
+    assert statement.shape.fields == ('B', 'A')
@@ -16,8 +16,11 @@
 # under the License.
 # 
 import pytest
+import data_pipeline.constants.const as const
+import data_pipeline.sql.utils as sql_utils
 
 from data_pipeline.sql.utils import TableName
+from data_pipeline.sql.delete_statement import DeleteStatement
 
 @pytest.mark.parametrize("schema, tablename, expected_fullname", [
     ('myschema', 'mytable', 'myschema.mytable'),
@@ -31,3 +34,114 @@ from data_pipeline.sql.utils import TableName
 def test_tablename(schema, tablename, expected_fullname):
     tn = TableName(schema, tablename)
     assert str(tn) == expected_fullname
+
+
+Q = const.COPY_QUOTE_CHAR
+E = const.COPY_ESCAPE_CHAR
+
+@pytest.mark.parametrize("value, expected_copy_value", [
+    (None, ''),
+    ('', Q + Q),
+    ('abc', Q + 'abc' + Q),
+    ("it's", Q + "it's" + Q),
+    ('a' + Q + 'b', Q + 'a' + E + Q + 'b' + Q),
+    ('a' + E + 'b', Q + 'a' + E + E + 'b' + Q),
+])
+def test_build_copy_value(value, expected_copy_value):
+    assert sql_utils.build_copy_value(value) == expected_copy_value
+
+
+@pytest.mark.parametrize("conditions, primary_key_list, expected_key", [
+    ({'ID': '1', 'NAME': 'a'}, ['ID'], ('1',)),
+    ({'ID': '1', 'SEQ': '2'}, ['SEQ', 'ID'], ('2', '1')),
+    ({'ID': None}, ['ID'], None),
+    ({'NAME': 'a'}, ['ID'], None),
+    ({'ID': '1'}, [], None),
+])
+def test_get_primary_key_values(conditions, primary_key_list, expected_key):
+    statement = DeleteStatement('MY_TABLE', conditions, primary_key_list)
+    assert sql_utils.get_primary_key_values(statement) == expected_key
+
+
+def test_build_bulk_update_sql():
+    sql = sql_utils.build_bulk_update_sql(
+        'MY_TABLE', 'my_table_bulk_update',
+        ['ID', 'SEQ'], ['k0', 'k1'],
+        ['NAME'], ['v0'],
+        expression_set_values={'CTL_UPD_TS': const.METADATA_CURRENT_TIME_SQL},
+        schema='ctl')
+
+    assert sql == ("UPDATE ctl.MY_TABLE t SET NAME = s.v0, "
+                   "CTL_UPD_TS = (SELECT CURRENT_TIMESTAMP) "
+                   "FROM my_table_bulk_update s "
+                   "WHERE t.ID = s.k0 AND t.SEQ = s.k1")
+
+
+def test_build_bulk_delete_sql():
+    sql = sql_utils.build_bulk_delete_sql(
+        'MY_TABLE', 'my_table_bulk_delete', ['ID'], ['k0'], schema='ctl')
+
+    assert sql == ("DELETE FROM ctl.MY_TABLE t USING my_table_bulk_delete s "
+                   "WHERE t.ID = s.k0")
+
+
+def test_build_parameterised_update_sql():
+    from data_pipeline.sql.update_statement import UpdateStatement
+    statement = UpdateStatement(
+        'MY_TABLE',
+        {'NAME': 'b', 'CTL_UPD_TS': const.METADATA_CURRENT_TIME_SQL},
+        {'NAME': 'a', 'CITY': None},
+        ['ID'])
+
+    (sql, values) = sql_utils.build_parameterised_update_sql(statement, schema='ctl')
+
+    assert sql == ("UPDATE ctl.MY_TABLE SET CTL_UPD_TS = (SELECT CURRENT_TIMESTAMP), "
+                   "NAME = $1 WHERE CITY IS NULL AND NAME = $2")
+    assert values == ['b', 'a']
+
+
+def test_build_execute_prepared_sql():
+    assert sql_utils.build_execute_prepared_sql('dp_stmt_0', 0) == "EXECUTE dp_stmt_0"
+    assert sql_utils.build_execute_prepared_sql('dp_stmt_0', 2) == "EXECUTE dp_stmt_0 ( %s, %s )"
+
+
+def test_build_upsert_sql():
+    from data_pipeline.sql.upsert_statement import UpsertStatement
+    statement = UpsertStatement(
+        'MY_TABLE', {'ID': '1', 'NAME': "O'Neil", 'CITY': None}, ['id'])
+
+    assert sql_utils.build_upsert_sql(statement, schema='ctl') == (
+        "INSERT INTO ctl.MY_TABLE ( CITY, ID, NAME ) "
+        "VALUES ( NULL, '1', 'O''Neil' ) "
+        "ON CONFLICT ( id ) DO UPDATE SET CITY = EXCLUDED.CITY, "
+        "NAME = EXCLUDED.NAME")
+
+    # A table made up only of its key has nothing to update
+    statement = UpsertStatement('MY_TABLE', {'ID': '1'}, ['id'])
+    assert sql_utils.build_upsert_sql(statement) == (
+        "INSERT INTO MY_TABLE ( ID ) VALUES ( '1' ) "
+        "ON CONFLICT ( id ) DO NOTHING")
+
+
+def test_build_insert_sql_with_shape():
+    from data_pipeline.sql.insert_shape import InsertShape
+    from data_pipeline.sql.insert_statement import InsertStatement
+    fields = ('NAME', 'ID', 'MY_COL')
+    shape = InsertShape(fields, 0, fields)
+
+    for values in [{'NAME': "O'Neil", 'ID': '1', 'MY_COL': None},
+                   {'NAME': 'Smith', 'ID': '2', 'MY_COL': 'x'}]:
+        statement = InsertStatement('MY_TABLE', values, ['ID'])
+        expected = sql_utils.build_insert_sql(statement, schema='ctl')
+
+        statement.shape = shape
+        assert sql_utils.build_insert_sql(statement, schema='ctl') == expected
+
+    # Fields added since parsing are not covered by the shape
+    statement = InsertStatement('MY_TABLE', {'NAME': 'a', 'ID': '3',
+                                             'MY_COL': 'b', 'EXTRA': 'c'},
+                                ['ID'])
+    statement.shape = shape
+    assert sql_utils.build_insert_sql(statement) == (
+        "INSERT INTO MY_TABLE ( EXTRA, ID, MY_COL, NAME ) "
+        "VALUES ( 'c', '3', 'b', 'a' )")
@@ -0,0 +1,117 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+import data_pipeline.constants.const as const
+
+from mock import Mock
+from pytest_mock import mocker
+from data_pipeline.stream.envelope import (EnvelopePacker, is_envelope,
+                                           pack, unpack)
+from data_pipeline.stream.oracle_message import OracleMessage
+
+
+def build_record(table_name, statement, lsn):
+    message = OracleMessage()
+    message.batch_id = 'batch'
+    message.record_type = const.DATA
+    message.table_name = table_name
+    message.commit_statement = statement
+    message.commit_lsn = str(lsn)
+    return dict(message.serialise())
+
+
+def test_pack_unpack(mocker):
+    records = [build_record('TABLE_A', "delete from A where id = '1'", 10),
+               build_record('TABLE_B', "delete from B where id = '2'", 11)]
+
+    envelope = pack(records)
+    assert is_envelope(envelope)
+    assert not is_envelope(records[0])
+    assert envelope['record_count'] == 2
+    assert envelope['table_name'] == 'TABLE_A'
+    assert envelope['commit_lsn'] == '11'
+    assert envelope['batch_id'] == 'batch'
+    assert sorted(envelope.keys()) == sorted(records[0].keys())
+
+    stream_message = mocker.Mock(**{'value.return_value': envelope,
+                                    'offset.return_value': 7})
+    unpacked = unpack(stream_message)
+
+    assert [r.value() for r in unpacked] == records
+    assert [r.index for r in unpacked] == [0, 1]
+    # Records are only addressable on the stream by their envelope
+    assert [r.offset() for r in unpacked] == [7, 7]
+
+
+def envelope_size(envelope):
+    return sum(len(v) for v in envelope.itervalues() if isinstance(v, basestring))
+
+
+def add_all(packer, records):
+    envelopes = []
+    for record in records:
+        envelopes.extend(packer.add(None, record))
+    envelopes.extend(e for (key, e) in packer.drain())
+    return envelopes
+
+
+@pytest.mark.parametrize("max_records, expected_sizes", [
+    (2, [2, 2, 1]),
+    (4, [4, 1]),
+    (0, [5]),
+])
+def test_packer_record_limit(max_records, expected_sizes):
+    packer = EnvelopePacker(max_records, 0)
+
+    envelopes = add_all(packer, [build_record('T', statement, i)
+                                 for (i, statement) in enumerate('abcde')])
+
+    assert [e['record_count'] for e in envelopes] == expected_sizes
+    assert packer.drain() == []
+
+
+def test_packer_byte_limit():
+    records = [build_record('T', statement, i) for (i, statement) in
+               enumerate(['a', 'b', 'c' * 100, 'd', 'e' * 400, 'f'])]
+    # Room for the first three records, as sizes are estimated from above
+    max_bytes = envelope_size(pack(records[:3])) + 5
+    packer = EnvelopePacker(0, max_bytes)
+
+    envelopes = add_all(packer, records)
+
+    # A record that would take the envelope over the limit is packed into
+    # the next one, so only an envelope of a single, oversized record
+    # exceeds it
+    assert [e['record_count'] for e in envelopes] == [3, 1, 1, 1]
+    for envelope in envelopes:
+        assert (envelope_size(envelope) <= max_bytes or
+                envelope['record_count'] == 1)
+    assert envelope_size(envelopes[2]) > max_bytes
+    assert [r.value() for e in envelopes
+            for r in unpack(Mock(**{'value.return_value': e}))] == records
+
+
+def test_packer_keeps_keys_apart():
+    packer = EnvelopePacker(2, 0)
+
+    assert packer.add(0, build_record('A', 'a', 1)) == []
+    assert packer.add(1, build_record('B', 'b', 2)) == []
+    [envelope] = packer.add(0, build_record('A', 'a', 3))
+
+    assert envelope['record_count'] == 2
+    assert [key for (key, e) in packer.drain()] == [1]
@@ -38,6 +38,8 @@ def setup(tmpdir, mocker):
     mock_applier_config = {
         "apply.side_effect": apply_side_effect,
         "process_control.return_value": mock_pc,
+        "collect_status.return_value": None,
+        "next_offset_to_commit": None,
     }
     mock_applier = mocker.Mock(**mock_applier_config)
 
@@ -136,3 +138,118 @@ def test_seek_to_end(mocker, setup):
     mock_avro_consumer.commit.assert_called_once_with(
         async=False,
         offsets=[expected_commit_topic_partition],)
+
+
+def test_commit_next_offset_to_commit(mocker, setup):
+    (mock_applier) = setup
+    mock_applier.next_offset_to_commit = 42
+    mock_applier.collect_status.return_value = const.KILLED
+
+    mock_avro_consumer_config = {
+        "poll.return_value": None,
+        "committed.return_value": [TopicPartition('topic', 0, 0)]
+    }
+    mock_avro_consumer = mocker.Mock(**mock_avro_consumer_config)
+    mock_avro_consumer_constructor = mocker.patch(
+        "data_pipeline.stream.kafka_consumer.AvroConsumer")
+    mock_avro_consumer_constructor.return_value = mock_avro_consumer
+
+    kafka_consumer = KafkaConsumer(
+        'broker',
+        'group',
+        'topic',
+        'schema_reg_url',
+        mock_applier)
+
+    # Status of messages applied in the background is collected on an
+    # empty poll, committing only up to the last applied message
+    kafka_consumer.consumer_loop()
+
+    mock_avro_consumer.commit.assert_called_once_with(
+        async=False,
+        offsets=[TopicPartition('topic', 0, 42)],)
+
+
+def test_consume_batch(mocker, setup):
+    (mock_applier) = setup
+    mock_applier.apply_many.return_value = const.KILLED
+
+    messages = []
+    for offset in range(3):
+        mock_message_config = {
+            "value.return_value": "value",
+            "key.return_value": None,
+            "error.return_value": None,
+            "offset.return_value": offset
+        }
+        messages.append(mocker.Mock(**mock_message_config))
+
+    mock_avro_consumer_config = {
+        "consume.return_value": messages,
+        "committed.return_value": [TopicPartition('topic', 0, 0)]
+    }
+    mock_avro_consumer = mocker.Mock(**mock_avro_consumer_config)
+    mock_avro_consumer_constructor = mocker.patch(
+        "data_pipeline.stream.kafka_consumer.AvroConsumer")
+    mock_avro_consumer_constructor.return_value = mock_avro_consumer
+
+    mocker.patch(
+        "data_pipeline.stream.kafka_consumer.CachedSchemaRegistryClient")
+    mock_serializer_constructor = mocker.patch(
+        "data_pipeline.stream.kafka_consumer.MessageSerializer")
+    mock_serializer = mock_serializer_constructor.return_value
+    mock_serializer.decode_message.return_value = "decoded"
+
+    kafka_consumer = KafkaConsumer(
+        'broker',
+        'group',
+        'topic',
+        'schema_reg_url',
+        mock_applier,
+        batch_size=10)
+
+    kafka_consumer.consumer_loop()
+
+    mock_avro_consumer.consume.assert_called_once_with(10, -1)
+    mock_avro_consumer.poll.assert_not_called()
+    mock_applier.apply_many.assert_called_once_with(messages)
+    mock_applier.apply.assert_not_called()
+    for message in messages:
+        message.set_value.assert_called_once_with("decoded")
+        message.set_key.assert_not_called()
+    mock_avro_consumer.commit.assert_called_once_with(async=False)
+
+
+def test_consume_assigned_partition(mocker, setup):
+    (mock_applier) = setup
+    mock_applier.next_offset_to_read = None
+    mock_applier.next_offset_to_commit = 42
+    mock_applier.collect_status.return_value = const.KILLED
+
+    mock_avro_consumer_config = {
+        "poll.return_value": None,
+        "committed.return_value": [TopicPartition('topic', 3, 0)]
+    }
+    mock_avro_consumer = mocker.Mock(**mock_avro_consumer_config)
+    mock_avro_consumer_constructor = mocker.patch(
+        "data_pipeline.stream.kafka_consumer.AvroConsumer")
+    mock_avro_consumer_constructor.return_value = mock_avro_consumer
+
+    kafka_consumer = KafkaConsumer(
+        'broker',
+        'group',
+        'topic',
+        'schema_reg_url',
+        mock_applier,
+        partition=3)
+
+    # The partition is assigned rather than balanced across the group
+    mock_avro_consumer.subscribe.assert_not_called()
+    mock_avro_consumer.assign.assert_called_once_with(
+        [TopicPartition('topic', 3)])
+
+    kafka_consumer.consumer_loop()
+
+    mock_avro_consumer.commit.assert_called_once_with(
+        async=False,
+        offsets=[TopicPartition('topic', 3, 42)],)
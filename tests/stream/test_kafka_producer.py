@@ -0,0 +1,95 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+import data_pipeline.constants.const as const
+
+from pytest_mock import mocker
+from data_pipeline.stream.kafka_producer import (KafkaProducer,
+                                                 build_producer_config)
+
+
+@pytest.fixture
+def setup(mocker):
+    mocker.patch("data_pipeline.stream.kafka_producer.avro")
+    mock_avro_producer_constructor = mocker.patch(
+        "data_pipeline.stream.kafka_producer.AvroProducer")
+    yield (mock_avro_producer_constructor)
+
+
+def test_build_producer_config():
+    assert build_producer_config(const.PRODUCER_PROFILE_DEFAULT) == {}
+
+    config = build_producer_config(const.PRODUCER_PROFILE_RELIABLE,
+                                   compression=const.COMPRESSION_ZSTD,
+                                   batch_messages=500)
+    assert config == {
+        'compression.codec': const.COMPRESSION_ZSTD,
+        'linger.ms': const.KAFKA_BATCH_LINGER_MS,
+        'batch.num.messages': 500,
+        'enable.idempotence': True,
+    }
+
+    config = build_producer_config(const.PRODUCER_PROFILE_DEFAULT,
+                                   idempotence=True)
+    assert config == {'enable.idempotence': True}
+
+
+def test_profile_overrides_defaults(mocker, setup):
+    (mock_avro_producer_constructor) = setup
+
+    KafkaProducer('broker', 'topic', 'schema_reg_url', 'schema_file',
+                  build_producer_config(const.PRODUCER_PROFILE_THROUGHPUT))
+
+    (args, kwargs) = mock_avro_producer_constructor.call_args
+    config = args[0]
+    assert config['compression.codec'] == const.COMPRESSION_LZ4
+    assert config['linger.ms'] == const.KAFKA_BATCH_LINGER_MS
+    assert config['batch.num.messages'] == const.KAFKA_BATCH_NUM_MESSAGES
+    assert kwargs['default_key_schema'] is None
+
+
+def test_write_keyed(mocker, setup):
+    (mock_avro_producer_constructor) = setup
+    mock_avro_producer = mock_avro_producer_constructor.return_value
+
+    producer = KafkaProducer('broker', 'topic', 'schema_reg_url',
+                             'schema_file', keyed=True)
+
+    data = {'record_type': const.DATA, 'table_name': 'MY_TABLE'}
+    assert producer.write(data, 1)
+    mock_avro_producer.produce.assert_called_with(
+        topic='topic', value=data, key='MY_TABLE', partition=1)
+
+    # Batch markers aren't specific to any table
+    end_of_batch = {'record_type': const.END_OF_BATCH, 'table_name': ''}
+    assert producer.write(end_of_batch)
+    mock_avro_producer.produce.assert_called_with(
+        topic='topic', value=end_of_batch)
+
+
+def test_delivery_error_count(mocker, setup):
+    producer = KafkaProducer('broker', 'topic', 'schema_reg_url',
+                             'schema_file')
+
+    mock_message = mocker.Mock(**{'partition.return_value': 0})
+    producer._on_delivery(None, mock_message)
+    assert producer.delivery_error_count == 0
+
+    producer._on_delivery("Message timed out", mock_message)
+    producer._on_delivery("Message timed out", mock_message)
+    assert producer.delivery_error_count == 2
@@ -0,0 +1,50 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+
+from data_pipeline.stream.partitions import (partition_for_table,
+                                             get_apply_partitions)
+
+
+def test_partition_for_table():
+    partitions = set([partition_for_table("TABLE_{}".format(i), 4)
+                      for i in range(100)])
+    assert partitions == set([0, 1, 2, 3])
+
+    # A table always maps to the same partition, regardless of case
+    assert (partition_for_table("MY_TABLE", 4) ==
+            partition_for_table("my_table", 4))
+    assert partition_for_table("MY_TABLE", 1) == 0
+
+
+@pytest.mark.parametrize("streampartitions, applypartitions, expected", [
+    (1, None, [0]),
+    (3, None, [0, 1, 2]),
+    (3, [], [0, 1, 2]),
+    (3, [2, 0, 2], [0, 2]),
+])
+def test_get_apply_partitions(streampartitions, applypartitions, expected, mocker):
+    mockargv = mocker.Mock(streampartitions=streampartitions,
+                           applypartitions=applypartitions)
+    assert get_apply_partitions(mockargv) == expected
+
+
+def test_get_apply_partitions_out_of_range(mocker):
+    mockargv = mocker.Mock(streampartitions=2, applypartitions=[2])
+    with pytest.raises(ValueError):
+        get_apply_partitions(mockargv)
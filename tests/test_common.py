@@ -0,0 +1,41 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# 
+import pytest
+import signal
+import data_pipeline.constants.const as const
+
+from data_pipeline.common import SignalHandler
+
+
+@pytest.mark.parametrize("mode, streaming, handles_sighup", [
+    (const.CDCAPPLY, False, True),
+    (const.CDCEXTRACT, True, True),
+    (const.CDCEXTRACT, False, False),
+    (const.INITSYNC, False, False),
+])
+def test_sighup_only_handled_by_long_running_modes(
+        mode, streaming, handles_sighup, mocker):
+    mock_signal = mocker.patch('data_pipeline.common.signal.signal')
+    mocker.patch('data_pipeline.common.dbuser.get_dbuser_properties')
+
+    SignalHandler(mode, mocker.Mock(streaming=streaming), mocker.Mock())
+
+    handled = [args[0] for (args, kwargs) in mock_signal.call_args_list]
+    assert signal.SIGINT in handled
+    assert signal.SIGTERM in handled
+    assert (signal.SIGHUP in handled) == handles_sighup
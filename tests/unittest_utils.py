@@ -48,7 +48,7 @@ def mock_get_inactive_applied_tables(mocker, tables):
 
 
 def mock_build_kafka_producer(mocker):
-    mock_producer_config = {}
+    mock_producer_config = {"delivery_error_count": 0}
     mock_producer = mocker.Mock(**mock_producer_config)
 
     mock_build_producer = mocker.patch('data_pipeline.extractor.extractor.build_kafka_producer')
@@ -99,14 +99,48 @@ def get_default_argv_config(tmpdir):
             "donotload": False,
             "skipbatch": 0,
             "auditcommitpoint": const.MIN_COMMIT_POINT,
+            "auditflushinterval": 0,
             "targetcommitpoint": const.MIN_COMMIT_POINT,
             "bulkapply": False,
+            "bulkapplyupdatedelete": False,
+            "bulkinsertcopy": False,
+            "compactchanges": False,
+            "preparedstatements": False,
+            "preparedstatementlimit": 100,
+            "applyworkers": 1,
+            "pipelinedapply": False,
+            "pipelinequeuesize": 1000,
+            "parseworkers": 0,
+            "redoparser": const.STATE_MACHINE_PARSER,
+            "shapecachesize": 0,
+            "consumebatchsize": 0,
+            "streampartitions": 1,
+            "producerprofile": const.PRODUCER_PROFILE_DEFAULT,
+            "producercompression": None,
+            "producerlingerms": None,
+            "producerbatchmessages": None,
+            "produceridempotence": False,
+            "producerkeys": False,
+            "enveloperecords": 0,
+            "envelopebytes": 0,
+            "applypartitions": None,
+            "persistenttargetconnection": False,
+            "targetidletimeout": 300,
             "targetuser": "foo/bar@targethost:1234/mydb",
             "notifysmtpserver": "localhost",
             "notifysender": "someone",
             "notifyerrorlist": ["someone@error.com"],
             "notifysummarylist": ["someone@gmail.com"],
             "sourcedictionary": const.ONLINE_DICT,
+            "deferrecordcount": False,
+            "miningprocesses": 1,
+            "miningoverlaplogs": 2,
+            "pollworkers": 1,
+            "netchanges": False,
+            "keycachefile": None,
+            "keycachettl": 86400,
+            "streaming": False,
+            "extractinterval": 10,
             "startscn": None,
             "endscn": None,
             "checkexistingextract": False,
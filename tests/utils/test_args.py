@@ -77,6 +77,73 @@ def test_workdirectory_append_datetime(mode, config_file, mocker, setup):
     assert argv.workdirectory == os.path.join(tmppath, mock_current_datetime)
 
 
+def test_rollover_workdirectory(mocker, setup):
+    (tmppath,) = setup
+
+    mock_sys = mocker.patch("data_pipeline.utils.args.sys")
+    mock_sys.argv = ["myprogram",
+        "--config", "conf/sample_applier_config.yaml",
+        "--workdirectory", tmppath,
+    ]
+    mock_time = mocker.patch("data_pipeline.utils.filesystem.time")
+    mock_time.strftime.return_value = "20170922_163347"
+    argv = args.get_program_args(const.CDCAPPLY)
+    outputfile = os.path.basename(argv.outputfile)
+
+    mock_time.strftime.return_value = "20170922_163412"
+    mock_parse_args = mocker.patch("data_pipeline.utils.args.parse_args")
+    assert args.rollover_workdirectory(argv) is argv
+
+    new_workdirectory = os.path.join(tmppath, "20170922_163412")
+    assert argv.workdirectory == new_workdirectory
+    assert argv.outputfile == os.path.join(new_workdirectory, outputfile)
+    assert os.path.isdir(new_workdirectory)
+    assert mock_parse_args.call_count == 0
+
+
+@pytest.mark.parametrize("streampartitions, expect_partition_dir", [
+    (1, False),
+    (3, True),
+])
+def test_get_partition_args(streampartitions, expect_partition_dir, mocker, setup):
+    (tmppath,) = setup
+
+    mock_sys = mocker.patch("data_pipeline.utils.args.sys")
+    mock_sys.argv = ["myprogram",
+        "--config", "conf/sample_applier_config.yaml",
+        "--workdirectory", tmppath,
+        "--streampartitions", str(streampartitions),
+    ]
+    mock_time = mocker.patch("data_pipeline.utils.filesystem.time")
+    mock_time.strftime.return_value = "20170922_163347"
+    argv = args.get_program_args(const.CDCAPPLY)
+    workdirectory = argv.workdirectory
+    outputfile = argv.outputfile
+
+    partition_argv = args.get_partition_args(argv, 0)
+
+    assert partition_argv is not argv
+    assert partition_argv.applypartitions == [0]
+    assert argv.workdirectory == workdirectory
+    assert argv.outputfile == outputfile
+
+    if expect_partition_dir:
+        partition_workdirectory = os.path.join(
+            tmppath, "partition0", "20170922_163347")
+        assert partition_argv.workdirectory == partition_workdirectory
+        assert partition_argv.outputfile == os.path.join(
+            partition_workdirectory, os.path.basename(outputfile))
+
+        # Rollovers stay under the partition's own directory
+        mock_time.strftime.return_value = "20170922_163412"
+        args.rollover_workdirectory(partition_argv)
+        assert partition_argv.workdirectory == os.path.join(
+            tmppath, "partition0", "20170922_163412")
+    else:
+        assert partition_argv.workdirectory == workdirectory
+        assert partition_argv.outputfile == outputfile
+
+
 @pytest.mark.parametrize("mode, config_file, auditcommitpoint, expect_error", [
     (const.INITSYNC, "sample_initsync_config.yaml", const.MIN_COMMIT_POINT, False),
     (const.INITSYNC, "sample_initsync_config.yaml", const.MIN_COMMIT_POINT - 1, True),